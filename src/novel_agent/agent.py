@@ -3,6 +3,7 @@
 使用 LangChain + LangGraph 创建 ReAct Agent
 """
 
+import functools
 import os
 from typing import Any
 
@@ -354,51 +355,58 @@ def create_specialized_agent(
     )
 
     original_invoke = agent.invoke
+    original_stream = agent.stream
 
-    def invoke_with_context_and_confidence(
-        input_data: dict[str, Any], *args: Any, **kwargs: Any
-    ) -> Any:
-        """包装 invoke：自动注入上下文 + 置信度评估"""
+    def inject_context(input_data: dict[str, Any]) -> None:
+        """根据最后一条用户消息检索相关上下文，插入到消息列表前"""
+        if not (context_retriever and "messages" in input_data):
+            return
 
-        # 1. 自动注入上下文
-        if context_retriever and "messages" in input_data:
-            messages = input_data["messages"]
-            if messages:
-                # 获取最后一条用户消息
-                last_message = messages[-1]
-                query = (
-                    last_message.content if hasattr(last_message, "content") else str(last_message)
-                )
+        messages = input_data["messages"]
+        if not messages:
+            return
 
-                # 检索相关上下文
-                try:
-                    context_docs = context_retriever.retrieve_context(
-                        query=query, max_tokens=8000, max_docs=3
-                    )
+        # 获取最后一条用户消息
+        last_message = messages[-1]
+        query = last_message.content if hasattr(last_message, "content") else str(last_message)
 
-                    if context_docs:
-                        # 格式化上下文
-                        context_text = context_retriever.format_context(context_docs)
+        # 检索相关上下文
+        try:
+            context_docs = context_retriever.retrieve_context(
+                query=query, max_tokens=8000, max_docs=3
+            )
+
+            if context_docs:
+                # 格式化上下文
+                context_text = context_retriever.format_context(context_docs)
+
+                # 将上下文添加到第一条消息（system message）
+                # 或者作为新的 system message
+                from langchain_core.messages import SystemMessage
 
-                        # 将上下文添加到第一条消息（system message）
-                        # 或者作为新的 system message
-                        from langchain_core.messages import SystemMessage
+                context_msg = SystemMessage(content=context_text)
 
-                        context_msg = SystemMessage(content=context_text)
+                # 在用户消息前插入上下文
+                input_data["messages"] = [context_msg] + messages
 
-                        # 在用户消息前插入上下文
-                        input_data["messages"] = [context_msg] + messages
+                from .logging_config import get_logger
 
-                        from .logging_config import get_logger
+                logger = get_logger(__name__)
+                logger.info(f"✓ 自动注入上下文: {len(context_docs)} 个文档")
+
+        except Exception as e:
+            from .logging_config import get_logger
 
-                        logger = get_logger(__name__)
-                        logger.info(f"✓ 自动注入上下文: {len(context_docs)} 个文档")
+            logger = get_logger(__name__)
+            logger.warning(f"上下文检索失败: {e}")
 
-                except Exception as e:
-                    from .logging_config import get_logger
+    def invoke_with_context_and_confidence(
+        input_data: dict[str, Any], *args: Any, **kwargs: Any
+    ) -> Any:
+        """包装 invoke：自动注入上下文 + 置信度评估"""
 
-                    logger = get_logger(__name__)
-                    logger.warning(f"上下文检索失败: {e}")
+        # 1. 自动注入上下文
+        inject_context(input_data)
 
         # 2. 调用原始 invoke
         result = original_invoke(input_data, *args, **kwargs)
@@ -411,7 +419,13 @@ def create_specialized_agent(
 
         return result
 
+    def stream_with_context(input_data: dict[str, Any], *args: Any, **kwargs: Any) -> Any:
+        """包装 stream：与 invoke 一样自动注入上下文（置信度由调用方按最终回复评估）"""
+        inject_context(input_data)
+        return original_stream(input_data, *args, **kwargs)
+
     agent.invoke = invoke_with_context_and_confidence  # type: ignore[assignment]
+    agent.stream = stream_with_context  # type: ignore[assignment]
     return agent
 
 
@@ -805,7 +819,18 @@ def _estimate_confidence(messages: Any) -> int:
 
     last = messages[-1]
     content = getattr(last, "content", None) or str(last)
+    if not isinstance(content, str):
+        content = str(content)
+    return _score_content(content)
+
 
+@functools.lru_cache(maxsize=128)
+def _score_content(content: str) -> int:
+    """按评分标准计算单条回复的置信度
+
+    结果只依赖内容本身，按内容缓存：同一回复在 Agent invoke 包装层和
+    CLI 输出层各评估一次时，第二次直接命中缓存。
+    """
     # 基础分：根据输出长度
     words = len(content.split())
     if words < 20:
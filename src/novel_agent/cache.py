@@ -1,25 +1,67 @@
 """智能缓存模块
 
 提供多层缓存支持：
-1. LLM 响应缓存（基于 LangChain InMemoryCache）
+1. LLM 响应缓存（基于 diskcache，跨进程复用）
 2. 图查询缓存（基于 diskcache）
 3. 文件读取缓存（基于文件修改时间）
+4. Agent 响应缓存（基于 diskcache，跨进程复用）
 """
 
 import hashlib
 import os
+from collections.abc import Sequence
 from pathlib import Path
 from typing import Any, Optional
 
 import diskcache  # type: ignore[import-untyped]
-from langchain_core.caches import InMemoryCache
+from langchain_core.caches import BaseCache
 from langchain_core.globals import set_llm_cache
+from langchain_core.outputs import Generation
 
 from .logging_config import get_logger
 
 logger = get_logger(__name__)
 
 
+class DiskLLMCache(BaseCache):
+    """基于 diskcache 的 LangChain LLM 缓存
+
+    InMemoryCache 随进程结束而失效，对 --print、check 等一次性命令没有作用；
+    写入磁盘后，相同提示词 + 模型配置的调用可在后续命令中直接复用。
+    """
+
+    def __init__(self, cache_dir: Path, ttl: Optional[int] = None):
+        """初始化磁盘 LLM 缓存
+
+        Args:
+            cache_dir: 缓存目录
+            ttl: 过期时间（秒），None 表示不过期
+        """
+        self._cache = diskcache.Cache(str(cache_dir))
+        self._ttl = ttl
+
+    @staticmethod
+    def _key(prompt: str, llm_string: str) -> str:
+        return hashlib.sha256(f"{llm_string}\x00{prompt}".encode()).hexdigest()
+
+    def lookup(self, prompt: str, llm_string: str) -> Optional[Sequence[Generation]]:
+        """查找缓存的生成结果"""
+        result: Optional[Sequence[Generation]] = self._cache.get(self._key(prompt, llm_string))
+        return result
+
+    def update(self, prompt: str, llm_string: str, return_val: Sequence[Generation]) -> None:
+        """写入生成结果"""
+        self._cache.set(self._key(prompt, llm_string), list(return_val), expire=self._ttl)
+
+    def clear(self, **kwargs: Any) -> None:
+        """清空缓存"""
+        self._cache.clear()
+
+    def close(self) -> None:
+        """关闭底层 diskcache"""
+        self._cache.close()
+
+
 class CacheManager:
     """缓存管理器"""
 
@@ -37,18 +79,32 @@ class CacheManager:
         # 图查询缓存
         self.graph_cache = diskcache.Cache(str(self.cache_dir / "graph"))
 
+        # Agent 响应缓存（key 由调用方根据输入内容生成）
+        self.response_cache = diskcache.Cache(str(self.cache_dir / "responses"))
+
+        # LLM 响应缓存（首次启用时创建，之后复用同一实例）
+        self._llm_cache: Optional[DiskLLMCache] = None
+
         # 文件缓存（内存缓存，key: path, value: (mtime, content)）
         self.file_cache: dict[str, tuple[float, str]] = {}
 
         # 统计
-        self.stats = {"hits": 0, "misses": 0, "graph_hits": 0, "file_hits": 0}
+        self.stats = {
+            "hits": 0,
+            "misses": 0,
+            "graph_hits": 0,
+            "file_hits": 0,
+            "response_hits": 0,
+        }
 
         logger.info(f"缓存管理器初始化完成: {cache_dir}")
 
     def enable_llm_cache(self) -> None:
-        """启用 LLM 响应缓存（内存缓存）"""
-        set_llm_cache(InMemoryCache())
-        logger.info("LLM 缓存已启用（内存模式）")
+        """启用 LLM 响应缓存（磁盘缓存，跨命令复用）"""
+        if self._llm_cache is None:
+            self._llm_cache = DiskLLMCache(self.cache_dir / "llm", ttl=self.ttl)
+        set_llm_cache(self._llm_cache)
+        logger.info("LLM 缓存已启用（磁盘模式）")
 
     def disable_llm_cache(self) -> None:
         """禁用 LLM 响应缓存"""
@@ -87,6 +143,38 @@ class CacheManager:
             self.stats["misses"] += 1
         return result
 
+    def cache_response(self, response_key: str, result: Any, ttl: Optional[int] = None) -> None:
+        """缓存 Agent 响应
+
+        Args:
+            response_key: 响应键（应包含输入内容的 hash，自动 hash）
+            result: 可 pickle 的响应结果
+            ttl: 过期时间（秒），None 使用默认值
+        """
+        key = self._hash_key(response_key)
+        expire_time = ttl if ttl is not None else self.ttl
+        self.response_cache.set(key, result, expire=expire_time)
+        logger.debug(f"响应缓存: {response_key[:50]}... (TTL: {expire_time}s)")
+
+    def get_response(self, response_key: str) -> Optional[Any]:
+        """获取 Agent 响应缓存
+
+        Args:
+            response_key: 响应键
+
+        Returns:
+            缓存的结果，如果不存在返回 None
+        """
+        key = self._hash_key(response_key)
+        result = self.response_cache.get(key)
+        if result is not None:
+            self.stats["response_hits"] += 1
+            self.stats["hits"] += 1
+            logger.debug(f"响应缓存命中: {response_key[:50]}...")
+        else:
+            self.stats["misses"] += 1
+        return result
+
     def cache_file_content(self, path: str, content: str) -> None:
         """缓存文件内容
 
@@ -141,10 +229,32 @@ class CacheManager:
     def clear(self) -> None:
         """清空所有缓存"""
         self.graph_cache.clear()
+        self.response_cache.clear()
+        self._clear_llm_cache()
         self.file_cache.clear()
-        self.stats = {"hits": 0, "misses": 0, "graph_hits": 0, "file_hits": 0}
+        self.stats = {
+            "hits": 0,
+            "misses": 0,
+            "graph_hits": 0,
+            "file_hits": 0,
+            "response_hits": 0,
+        }
         logger.info("所有缓存已清空")
 
+    def _clear_llm_cache(self) -> None:
+        """清空磁盘 LLM 缓存（未启用时直接打开目录清理，避免遗留上次命令的响应）"""
+        if self._llm_cache is not None:
+            self._llm_cache.clear()
+            return
+
+        llm_dir = self.cache_dir / "llm"
+        if llm_dir.exists():
+            llm_cache = DiskLLMCache(llm_dir)
+            try:
+                llm_cache.clear()
+            finally:
+                llm_cache.close()
+
     def get_stats(self) -> dict[str, Any]:
         """获取缓存统计信息
 
@@ -161,6 +271,7 @@ class CacheManager:
             "hit_rate": hit_rate,
             "graph_hits": self.stats["graph_hits"],
             "file_hits": self.stats["file_hits"],
+            "response_hits": self.stats["response_hits"],
         }
 
     def _hash_key(self, key: str) -> str:
@@ -3,28 +3,34 @@
 使用 Typer + Rich 创建命令行界面
 """
 
+import atexit
+import functools
+import hashlib
 import json
 import os
+import re
+import secrets
+import signal
 import sys
-import uuid
+import threading
+from collections.abc import Iterator
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+from contextlib import AbstractContextManager, contextmanager, nullcontext
 from pathlib import Path
-from typing import Any, Optional
+from typing import Any, Callable, Optional
 
 import typer
-from langchain_google_genai import ChatGoogleGenerativeAI
-from prompt_toolkit import PromptSession
 from rich.console import Console
-from rich.markdown import Markdown
 from rich.panel import Panel
+from rich.table import Table
+from rich.text import Text
 
+# LangChain / Gemini 相关模块（.agent、.session_store、.workflows 等）、文件监控（watchdog）
+# 和 rich.markdown 导入耗时较长，统一在用到的地方导入，使 --help、sessions 等轻量命令无需加载它们
 from . import memory_ingest as memory_ingest_module
-from .agent import AGENT_CONFIGS, create_novel_agent, create_specialized_agent
-from .continuity import build_continuity_index
+from .continuity import build_continuity_index, load_or_build_continuity_index
 from .logging_config import get_logger
 from .permissions import get_readonly_tools
-from .session_store import delete_session, open_checkpointer
-from .session_store import list_sessions as list_session_ids
-from .workflows import build_chapter_workflow
 
 logger = get_logger(__name__)
 
@@ -36,6 +42,259 @@ app = typer.Typer(
 console = Console()
 
 
+# 加载动画刷新频率：Rich 默认 12.5 Hz，对等待模型响应的 spinner 而言 4 Hz 足够
+_STATUS_REFRESH_PER_SECOND = 4
+
+
+def _status(message: str) -> AbstractContextManager[Any]:
+    """终端中显示加载动画；输出被重定向（管道、CI 日志）时什么也不做"""
+    if not console.is_terminal:
+        return nullcontext()
+    return console.status(message, refresh_per_second=_STATUS_REFRESH_PER_SECOND)
+
+
+# 连续性索引的默认位置（相对项目根目录）
+_DEFAULT_INDEX_PATH = Path("data/continuity/index.json")
+
+# check --parallel 的最大并发数（受 Gemini API 速率限制约束）
+_CHECK_MAX_WORKERS = 4
+
+# 检查结果分类关键词（忽略大小写，直接在原文上扫描，无需 lower() 复制）
+_CHECK_PASSED_RE = re.compile(r"通过|no issues", re.IGNORECASE)
+_CHECK_ERROR_RE = re.compile(r"错误|error|critical|严重", re.IGNORECASE)
+
+# 检查结果中的问题行："Line X: ..."、"- ..." 或 "• ..."（忽略行首空白）
+_ISSUE_LINE_RE = re.compile(r"^\s*((?:Line|[-•])[^\n]*)", re.MULTILINE)
+
+# check 的提示词模板（按 auto_fix 预先生成两个版本，调用时只需填入文件路径）
+_CHECK_PROMPT_TEMPLATE = """请检查文件 {{file}} 的一致性。
+
+分析以下方面：
+1. 角色一致性：性格、能力、行为是否前后一致
+2. 情节逻辑：情节发展是否合理
+3. 时间线：事件顺序是否合理
+4. 世界观：设定规则是否被遵守
+
+{instruction}
+
+请用以下格式返回：
+- 如果没有问题：返回 "通过"
+- 如果有问题：每行一个问题，格式为 "Line X: 问题描述"
+"""
+_CHECK_PROMPT_FIX = _CHECK_PROMPT_TEMPLATE.format(instruction="并提供具体的修复方案。")
+_CHECK_PROMPT_NOFIX = _CHECK_PROMPT_TEMPLATE.format(instruction="请详细指出发现的问题。")
+
+# 不超过该大小的文件直接附在提示词中，省去 Agent 调用读文件工具的一轮往返
+_CHECK_INLINE_MAX_BYTES = 32_000
+_CHECK_INLINE_BLOCK = "\n文件内容如下（已附上，无需再读取该文件）：\n<file>\n{content}\n</file>\n"
+
+# 超过该长度的回复按纯文本输出：Markdown 解析和排版的耗时随长度增长，长回复在慢终端上明显卡顿
+_MARKDOWN_MAX_CHARS = 5000
+
+# check 命令的标题面板（固定部分预先拼好，只需填入文件和选项）
+_CHECK_SINGLE_HEADER = "[bold cyan]📋 一致性检查[/bold cyan]\n文件: [yellow]{file}[/yellow]"
+_CHECK_BATCH_HEADER = (
+    "[bold cyan]🔍 批量检查 {count} 个文件[/bold cyan]\n"
+    "模式: [yellow]{mode}[/yellow]\n"
+    "自动修复: [yellow]{auto_fix}[/yellow]"
+)
+
+# 置信度显示样式：(最低分, 颜色, 图标)，按阈值从高到低匹配
+_CONFIDENCE_STYLES: tuple[tuple[float, str, str], ...] = (
+    (80, "green", "🟢"),
+    (60, "yellow", "🟡"),
+    (float("-inf"), "red", "🔴"),
+)
+
+# 可选的 Agent 类型（与 agent.AGENT_CONFIGS 的键保持一致，避免为帮助信息导入 .agent）
+_AGENT_TYPES: tuple[str, ...] = ("default", "outline-architect", "continuity-editor", "style-smith")
+_AGENT_HELP = f"Agent类型（可选值: {', '.join(_AGENT_TYPES)}）"
+
+# 交互模式启动面板（固定部分预先拼好，只需填入 Agent 名称）
+_CHAT_HEADER = (
+    "[bold cyan]🤖 Novel Agent[/bold cyan]\n"
+    "AI写作助手已启动 - [yellow]{agent_name}[/yellow]\n\n"
+    "[dim]输入 'exit' 或按 Ctrl+C 退出[/dim]"
+)
+
+# --print 模式支持的输出格式（顺序即帮助信息中的展示顺序）
+_VALID_OUTPUT_FORMATS: tuple[str, ...] = ("text", "json", "stream-json")
+
+# 固定的 JSON 错误输出（内容不变，无需每次序列化；中断路径只剩一次写出）
+_ERR_INTERRUPTED_JSON = '{"error":"Interrupted","confidence":0}'
+_ERR_NO_RESPONSE_JSON = '{\n  "error": "No response",\n  "confidence": 0\n}'
+
+# 废弃参数提示（纯常量，导入时解析一次 markup）
+_DEPRECATED_TOOLS_NOTICE = Text.from_markup(
+    "[yellow]⚠️  --tools、--allowed-tools 和 --disallowed-tools 参数已废弃[/yellow]\n"
+    "[yellow]   推荐使用更简单的权限系统：[/yellow]\n"
+    "[yellow]   • 默认模式（所有工具）：novel-agent chat[/yellow]\n"
+    "[yellow]   • 只读模式（仅分析）：novel-agent chat --read-only[/yellow]\n"
+)
+
+
+# 进程内共享的后台线程池（Agent 预热、文件监控启动等），首次使用时创建
+_EXECUTOR: Optional[ThreadPoolExecutor] = None
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    """获取共享的后台线程池"""
+    global _EXECUTOR
+    if _EXECUTOR is None:
+        _EXECUTOR = ThreadPoolExecutor(max_workers=2, thread_name_prefix="novel-agent")
+        atexit.register(_EXECUTOR.shutdown, wait=False)
+    return _EXECUTOR
+
+
+@contextmanager
+def _sigint_guard() -> Iterator[None]:
+    """Agent 调用期间的 Ctrl-C 处理
+
+    第一次 Ctrl-C 照常抛出 KeyboardInterrupt，由各命令的异常处理收尾；
+    若 KeyboardInterrupt 被重试逻辑等吞掉、请求迟迟不结束，第二次 Ctrl-C
+    抛出 SystemExit(130) 退出，不再被按异常处理的代码拦截。
+    不使用 os._exit：SystemExit 在主线程中逐层展开，会话存储（checkpointer）
+    的关闭、文件监控的停止和 atexit 处理都照常执行；代价是与第一次 Ctrl-C 一样，
+    只有主线程从扩展模块（gRPC/HTTP 客户端）的阻塞调用返回后才会生效。
+    非主线程中不做任何处理。
+    """
+    if threading.current_thread() is not threading.main_thread():
+        yield
+        return
+
+    interrupted = False
+
+    def handler(signum: int, frame: Any) -> None:
+        nonlocal interrupted
+        if interrupted:
+            raise SystemExit(130)
+        interrupted = True
+        raise KeyboardInterrupt
+
+    previous = signal.signal(signal.SIGINT, handler)
+    try:
+        yield
+    finally:
+        signal.signal(signal.SIGINT, previous)
+
+
+@functools.lru_cache(maxsize=4)
+def _gemini_model(model: str, api_key: str, temperature: float) -> Any:
+    """创建 Gemini 模型，同一进程内相同参数复用已初始化的客户端"""
+    from langchain_google_genai import ChatGoogleGenerativeAI
+
+    return ChatGoogleGenerativeAI(model=model, google_api_key=api_key, temperature=temperature)
+
+
+class _LazyAgent:
+    """延迟构建的 Agent 代理
+
+    首次访问 Agent 属性（invoke、stream、checkpointer 等）时才真正调用工厂函数；
+    调用 warm_up() 可在后台线程中提前构建，把初始化耗时藏在用户输入期间。
+    构建失败的异常会在主线程下一次访问时重新抛出。
+    """
+
+    def __init__(self, factory: Callable[[], Any]) -> None:
+        self._factory = factory
+        self._lock = threading.Lock()
+        self._agent: Any = None
+        self._error: Exception | None = None
+        self._warmup: Future[None] | None = None
+
+    def warm_up(self) -> None:
+        """在共享线程池中预先构建 Agent（幂等）"""
+        if self._warmup is None:
+            self._warmup = _get_executor().submit(self._build)
+
+    def _build(self) -> None:
+        with self._lock:
+            if self._agent is not None or self._error is not None:
+                return
+            try:
+                self._agent = self._factory()
+            except Exception as e:
+                self._error = e
+
+    def get(self) -> Any:
+        """获取 Agent 实例（必要时阻塞等待构建完成）"""
+        self._build()
+        if self._error is not None:
+            raise self._error
+        return self._agent
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.get(), name)
+
+
+def _dumps(obj: Any, *, indent: bool = False) -> str:
+    """序列化 CLI 的 JSON 输出
+
+    依次尝试 msgspec、orjson（均为 C 实现，默认不转义非 ASCII 字符），
+    都未安装时回退到标准库。可选依赖在首次输出 JSON 时才导入。
+
+    Args:
+        obj: 要序列化的对象
+        indent: 是否使用 2 空格缩进
+
+    Returns:
+        JSON 字符串
+    """
+    return _dumps_bytes(obj, indent=indent).decode()
+
+
+def _dumps_bytes(obj: Any, *, indent: bool = False) -> bytes:
+    """序列化为 UTF-8 字节（msgspec/orjson 原生输出 bytes，无需再编码）"""
+    return _json_encoder()(obj, indent)
+
+
+@functools.cache
+def _json_encoder() -> Callable[[Any, bool], bytes]:
+    """选择可用的 JSON 序列化实现（只在首次调用时导入并缓存）"""
+    try:
+        import msgspec
+    except ImportError:  # pragma: no cover - msgspec 为可选加速依赖
+        pass
+    else:
+
+        def encode_msgspec(obj: Any, indent: bool) -> bytes:
+            data = msgspec.json.encode(obj)
+            return msgspec.json.format(data, indent=2) if indent else data
+
+        return encode_msgspec
+
+    try:
+        import orjson
+    except ImportError:  # pragma: no cover - orjson 为可选加速依赖
+        pass
+    else:
+
+        def encode_orjson(obj: Any, indent: bool) -> bytes:
+            option = orjson.OPT_NON_STR_KEYS | (orjson.OPT_INDENT_2 if indent else 0)
+            return orjson.dumps(obj, option=option)
+
+        return encode_orjson
+
+    def encode_stdlib(obj: Any, indent: bool) -> bytes:
+        return json.dumps(obj, ensure_ascii=False, indent=2 if indent else None).encode()
+
+    return encode_stdlib
+
+
+def _write_json_line(obj: Any) -> None:
+    """写出一行 NDJSON（stream-json 格式）
+
+    直接写入 stdout 的二进制缓冲区，跳过 print 的参数处理和文本编码；
+    stdout 没有 buffer 属性时（如被替换为纯文本流）回退到 print。
+    """
+    buffer = getattr(sys.stdout, "buffer", None)
+    if buffer is None:
+        print(_dumps(obj), flush=True)
+        return
+    sys.stdout.flush()  # 先刷出文本层中已有内容，保证输出顺序
+    buffer.write(_dumps_bytes(obj) + b"\n")
+    buffer.flush()
+
+
 def format_error(error: Exception) -> str:
     """格式化错误消息为友好提示
 
@@ -51,17 +310,16 @@ def format_error(error: Exception) -> str:
     )
 
     error_msg = str(error)
+    error_lower = error_msg.lower()
 
     # API Key 错误
-    if "api" in error_msg.lower() and "key" in error_msg.lower():
+    if "api" in error_lower and "key" in error_lower:
         err = APIKeyError()
         return err.format_message()
 
     # 文件不存在错误
-    if isinstance(error, FileNotFoundError) or "no such file" in error_msg.lower():
+    if isinstance(error, FileNotFoundError) or "no such file" in error_lower:
         # 尝试从错误消息中提取文件路径
-        import re
-
         match = re.search(r"['\"](.*?)['\"]", error_msg)
         if match:
             file_path = match.group(1)
@@ -81,8 +339,7 @@ def format_error(error: Exception) -> str:
 
     # 网络错误
     if any(
-        keyword in error_msg.lower()
-        for keyword in ["network", "connection", "timeout", "unreachable"]
+        keyword in error_lower for keyword in ("network", "connection", "timeout", "unreachable")
     ):
         lines = [
             f"❌ 网络错误: {error_msg}\n",
@@ -108,7 +365,9 @@ def refresh_memory(
 ) -> None:
     """生成连续性索引（章节→角色→时间标记→引用）。"""
 
-    output_path = Path(output) if output else Path("data/continuity/index.json")
+    # 项目根目录只取一次；索引路径以它为基准，后续 stat/读写不再依赖进程当前目录
+    cwd = Path.cwd()
+    output_path = Path(output) if output else _DEFAULT_INDEX_PATH
     console.print(
         Panel.fit(
             "[bold cyan]🔁 刷新连续性索引[/bold cyan]\n" f"输出: [yellow]{output_path}[/yellow]",
@@ -117,8 +376,8 @@ def refresh_memory(
     )
 
     try:
-        with console.status("[yellow]正在解析章节与设定...[/yellow]"):
-            data = build_continuity_index(Path.cwd(), output_path=output_path)
+        # 索引构建只是本地解析，通常远低于一秒，不值得为此启动 spinner 线程
+        data = build_continuity_index(cwd, output_path=cwd / output_path)
         console.print(
             f"[green]✓[/green] 已生成 {len(data['chapters'])} 章、"
             f"{len(data['characters'])} 角色、{len(data['references'])} 引用的索引"
@@ -147,6 +406,11 @@ def build_graph(
         "--clear",
         help="清空旧图数据（危险操作！）",
     ),
+    force: bool = typer.Option(
+        False,
+        "--force",
+        help="忽略章节哈希清单，全量重新摄取",
+    ),
 ) -> None:
     """构建知识图谱（从章节内容提取实体和关系）。"""
 
@@ -168,20 +432,25 @@ def build_graph(
         builder = GraphBuilder(db_path)
         builder.clear_graph()
         console.print("[green]✓ 已清空[/green]")
+        # 图已清空，哈希清单失效，必须全量摄取
+        force = True
 
     try:
-        with console.status("[yellow]正在解析章节和构建图...[/yellow]"):
-            stats = build_graph_from_chapters(chapters_dir, db_path)
-
-        console.print("\n[green]✓ 图构建完成！[/green]")
-        console.print(f"  - 处理章节: {stats['chapters_processed']}")
-        console.print(f"  - 创建实体: {stats['entities_created']}")
-        console.print(f"  - 创建关系: {stats['relations_created']}")
+        with _status("[yellow]正在解析章节和构建图...[/yellow]"):
+            stats = build_graph_from_chapters(chapters_dir, db_path, force=force)
 
+        # 汇总为一次输出，避免逐行 print
+        lines = [
+            "\n[green]✓ 图构建完成！[/green]",
+            f"  - 处理章节: {stats['chapters_processed']}",
+            f"  - 跳过未变化: {stats['chapters_skipped']}",
+            f"  - 创建实体: {stats['entities_created']}",
+            f"  - 创建关系: {stats['relations_created']}",
+        ]
         if stats["errors"]:
-            console.print(f"\n[yellow]⚠️  遇到 {len(stats['errors'])} 个错误：[/yellow]")
-            for err in stats["errors"][:5]:
-                console.print(f"  - {err}")
+            lines.append(f"\n[yellow]⚠️  遇到 {len(stats['errors'])} 个错误：[/yellow]")
+            lines.extend(f"  - {err}" for err in stats["errors"][:5])
+        console.print("\n".join(lines))
 
     except Exception as exc:
         console.print(f"[red]✗ 构建失败: {exc}[/red]")
@@ -212,7 +481,7 @@ def chat(
         "default",
         "--agent",
         "-a",
-        help=f"Agent类型（可选值: {', '.join(AGENT_CONFIGS.keys())}）",
+        help=_AGENT_HELP,
     ),
     session: Optional[str] = typer.Option(
         None,
@@ -239,7 +508,7 @@ def chat(
     output_format: str = typer.Option(
         "text",
         "--output-format",
-        help="输出格式：text（默认）、json、stream-json",
+        help="输出格式：text（默认）、json、stream-json（逐行 NDJSON）",
     ),
     stream: bool = typer.Option(
         False,
@@ -280,6 +549,11 @@ def chat(
         "--input-offset",
         help="输入框向上偏移行数（默认：自动适应终端高度，通常 5-8 行）",
     ),
+    plain: bool = typer.Option(
+        False,
+        "--plain",
+        help="以纯文本输出回复，不做 Markdown 渲染（输出不是终端时自动启用）",
+    ),
 ) -> None:
     """启动对话模式
 
@@ -289,6 +563,9 @@ def chat(
         novel-agent chat --api-key YOUR_API_KEY --agent outline-architect
         novel-agent chat --print '检查第3章一致性'
         novel-agent chat --print --output-format json '检查一致性'
+
+    Ctrl-C 中断当前回复；若回复迟迟不结束，再按一次 Ctrl-C 以 130 退出。
+    退出前会关闭会话存储并停止文件监控，因此需等待阻塞中的网络请求返回。
     """
 
     # 初始化缓存
@@ -304,12 +581,7 @@ def chat(
 
     # 显示废弃警告
     if allowed_tools or disallowed_tools or tools_mode != "default":
-        console.print(
-            "[yellow]⚠️  --tools、--allowed-tools 和 --disallowed-tools 参数已废弃[/yellow]\n"
-            "[yellow]   推荐使用更简单的权限系统：[/yellow]\n"
-            "[yellow]   • 默认模式（所有工具）：novel-agent chat[/yellow]\n"
-            "[yellow]   • 只读模式（仅分析）：novel-agent chat --read-only[/yellow]\n"
-        )
+        console.print(_DEPRECATED_TOOLS_NOTICE)
 
     # 解析工具权限参数
     allowed_tools_list = None
@@ -355,11 +627,10 @@ def chat(
     # 处理非交互模式
     if print_mode:
         # 验证输出格式
-        valid_formats = ["text", "json", "stream-json"]
-        if output_format not in valid_formats:
+        if output_format not in _VALID_OUTPUT_FORMATS:
             console.print(
                 f"[red]错误：无效的输出格式 '{output_format}'[/red]\n"
-                f"有效选项: {', '.join(valid_formats)}"
+                f"有效选项: {', '.join(_VALID_OUTPUT_FORMATS)}"
             )
             raise typer.Exit(1)
 
@@ -402,16 +673,9 @@ def chat(
 
     # 交互模式：显示Agent类型
     agent_name = agent if agent != "default" else "通用写作助手"
-    console.print(
-        Panel.fit(
-            f"[bold cyan]🤖 Novel Agent[/bold cyan]\n"
-            f"AI写作助手已启动 - [yellow]{agent_name}[/yellow]\n\n"
-            "[dim]输入 'exit' 或按 Ctrl+C 退出[/dim]",
-            border_style="cyan",
-        )
-    )
+    console.print(Panel.fit(_CHAT_HEADER.format(agent_name=agent_name), border_style="cyan"))
 
-    session_id = session or str(uuid.uuid4())
+    session_id = session or secrets.token_hex(8)
     console.print(f"[cyan]Session ID[/cyan]: [bold]{session_id}[/bold]")
 
     # 获取项目根目录
@@ -424,102 +688,129 @@ def chat(
     tracker.reset()
     tracker.start()
 
-    # 启动文件监控（如果启用）
-    watcher_thread = None
-    if enable_watcher:
-        try:
-            from .file_watcher import start_background_watcher
-
-            index_path = project_root / "data" / "continuity" / "index.json"
-            watcher_thread = start_background_watcher(project_root, index_path)
-            console.print("[green]✓[/green] 文件监控已启动（后台模式）\n")
-        except Exception as e:
-            console.print(f"[yellow]⚠️  文件监控启动失败: {e}[/yellow]")
-
-    try:
-        with open_checkpointer() as checkpointer:
-            with console.status("[yellow]正在初始化Agent...[/yellow]"):
-                agent_instance = create_specialized_agent(
-                    agent,
-                    api_key=api_key,
-                    checkpointer=checkpointer,
-                    enable_context_retrieval=enable_context,
-                    project_root=str(project_root) if enable_context else None,
-                    allowed_tools=allowed_tools_list,
-                    disallowed_tools=disallowed_tools_list,
-                    tools_mode=tools_mode,
-                )
+    from .agent import create_specialized_agent
+    from .session_store import open_checkpointer
 
-            if enable_context:
-                console.print("[green]✓[/green] Agent初始化完成（自动上下文检索已启用）\n")
-            else:
-                console.print("[green]✓[/green] Agent初始化完成\n")
-
-            # 如果有文件 prompt，先执行
-            if file_prompt:
-                console.print("[cyan]执行文件 Prompt...[/cyan]\n")
-                with console.status("[yellow]正在思考...[/yellow]"):
-                    result = agent_instance.invoke(
-                        {"messages": [("user", file_prompt)]},
-                        config={"configurable": {"thread_id": session_id}},
+    # 文件监控在后台线程中启动，与 checkpointer 打开和 Agent 初始化重叠
+    with _watcher_context(enable_watcher, project_root):
+        try:
+            with open_checkpointer() as checkpointer:
+                # Agent 在后台线程中构建，首次真正使用时才会等待初始化完成
+                agent_instance = _LazyAgent(
+                    functools.partial(
+                        create_specialized_agent,
+                        agent,
+                        api_key=api_key,
+                        checkpointer=checkpointer,
+                        enable_context_retrieval=enable_context,
+                        project_root=str(project_root) if enable_context else None,
+                        allowed_tools=allowed_tools_list,
+                        disallowed_tools=disallowed_tools_list,
+                        tools_mode=tools_mode,
                     )
+                )
+                agent_instance.warm_up()
 
-                if "messages" in result and result["messages"]:
-                    last_message = result["messages"][-1]
-                    response = (
-                        last_message.content
-                        if hasattr(last_message, "content")
-                        else str(last_message)
-                    )
+                if enable_context:
+                    console.print("[green]✓[/green] Agent后台初始化中（自动上下文检索已启用）\n")
+                else:
+                    console.print("[green]✓[/green] Agent后台初始化中\n")
 
-                    # 显示置信度评分
-                    confidence = result.get("confidence", 0)
-                    confidence_color = (
-                        "green" if confidence >= 80 else "yellow" if confidence >= 60 else "red"
-                    )
-                    confidence_icon = (
-                        "🟢" if confidence >= 80 else "🟡" if confidence >= 60 else "🔴"
-                    )
+                # 如果有文件 prompt，先执行
+                if file_prompt:
+                    console.print("[cyan]执行文件 Prompt...[/cyan]\n")
+                    _stream_agent_reply(agent_instance, file_prompt, session_id, plain=plain)
+                    console.print()  # 空行
 
+                # 显示输入框偏移提示（首次）
+                if calculated_offset != 5:
                     console.print(
-                        f"\n[bold green]Agent[/bold green] "
-                        f"[{confidence_color}]{confidence_icon} "
-                        f"置信度: {confidence}/100[/{confidence_color}]"
+                        f"[dim]ℹ️  输入框偏移：{calculated_offset} 行"
+                        f"（可使用 --input-offset 自定义）[/dim]\n"
                     )
-                    console.print(Markdown(response))
-                console.print()  # 空行
-
-            # 显示输入框偏移提示（首次）
-            if calculated_offset != 5:
-                console.print(
-                    f"[dim]ℹ️  输入框偏移：{calculated_offset} 行"
-                    f"（可使用 --input-offset 自定义）[/dim]\n"
-                )
 
-            _chat_loop(agent_instance, session_id, input_offset=calculated_offset)
+                _chat_loop(agent_instance, session_id, input_offset=calculated_offset, plain=plain)
 
-    except ValueError as e:
-        console.print(format_error(e))
-        sys.exit(1)
-    except KeyboardInterrupt:
-        console.print("\n[yellow]👋 再见！[/yellow]")
-    except Exception as e:
-        console.print(format_error(e))
-        sys.exit(1)
+                # 等待后台构建结束：在关闭 checkpointer 前回收线程，并暴露初始化错误
+                agent_instance.get()
+
+        except ValueError as e:
+            console.print(format_error(e))
+            sys.exit(1)
+        except KeyboardInterrupt:
+            console.print("\n[yellow]👋 再见！[/yellow]")
+        except Exception as e:
+            console.print(format_error(e))
+            sys.exit(1)
+        finally:
+            # 停止性能跟踪并显示统计
+            tracker.stop()
+            console.print("\n" + tracker.get_stats().format_summary())
+
+
+@contextmanager
+def _watcher_context(
+    enable: bool, project_root: Path, silent: bool = False
+) -> Iterator[Optional[Future[threading.Thread]]]:
+    """在 with 块期间运行后台文件监控
+
+    进入时在共享线程池中启动监控，启动完成后才提示成功或失败；退出时：
+    尚未开始启动则直接取消；已启动则停止。silent 模式（print 模式）不输出任何提示，
+    也不等待仍在启动中的监控（守护线程随进程退出）。
+    """
+    watcher_future: Optional[Future[threading.Thread]] = None
+    if enable:
+        try:
+            from .file_watcher import stop_background_watcher
+        except ImportError:  # pragma: no cover - 文件监控依赖 watchdog
+            if not silent:
+                console.print("[yellow]⚠️  文件监控启动失败: watchdog 未安装[/yellow]")
+        else:
+            watcher_future = _start_watcher_in_background(project_root)
+            if not silent:
+                watcher_future.add_done_callback(_report_watcher_start)
+
+    try:
+        yield watcher_future
     finally:
-        # 停止性能跟踪并显示统计
-        tracker.stop()
-        console.print("\n" + tracker.get_stats().format_summary())
+        if watcher_future is not None and not watcher_future.cancel():
+            if silent and not watcher_future.done():
+                logger.debug("文件监控线程随进程退出")
+            else:
+                try:
+                    watcher_future.result(timeout=5)
+                except Exception:
+                    # 启动失败已由 _report_watcher_start 提示，这里只提示等待超时
+                    if not silent and not watcher_future.done():
+                        console.print("[yellow]⚠️  文件监控启动超时[/yellow]")
+                else:
+                    stop_background_watcher()
+                    if not silent:
+                        console.print("[dim]✓ 文件监控已停止[/dim]")
+
+
+def _report_watcher_start(future: Future[threading.Thread]) -> None:
+    """后台启动完成后提示文件监控是否启动成功"""
+    if future.cancelled():
+        return
+    error = future.exception()
+    if error is None:
+        console.print("[green]✓[/green] 文件监控已启动（后台模式）\n")
+    else:
+        console.print(f"[yellow]⚠️  文件监控启动失败: {error}[/yellow]")
 
-        # 停止文件监控
-        if enable_watcher and watcher_thread:
-            try:
-                from .file_watcher import stop_background_watcher
 
-                stop_background_watcher()
-                console.print("[dim]✓ 文件监控已停止[/dim]")
-            except Exception:
-                pass  # 忽略停止失败
+def _start_watcher_in_background(project_root: Path) -> Future[threading.Thread]:
+    """在共享线程池中启动文件监控，返回可获取监控线程的 Future
+
+    监控启动需要等待 observer 就绪，放到后台后可与 Agent 初始化并行。
+    监控只会在文件变更后重建连续性索引，启动过程不写入 Agent 初始化时读取的状态。
+    启动异常保存在 Future 中，由调用方决定是否处理。
+    """
+    from .file_watcher import start_background_watcher
+
+    index_path = project_root / _DEFAULT_INDEX_PATH
+    return _get_executor().submit(start_background_watcher, project_root, index_path)
 
 
 def _get_optimal_input_offset() -> int:
@@ -585,7 +876,7 @@ def _handle_slash_command(user_input: str, session_id: str, agent_instance: Any)
             # 执行压缩（获取 LLM 实例）
             llm = agent_instance.llm  # 假设 agent 有 llm 属性
 
-            with console.status("[yellow]生成摘要中...[/yellow]"):
+            with _status("[yellow]生成摘要中...[/yellow]"):
                 new_id, summary, original_tokens, compressed_tokens = asyncio.run(
                     compress_session(messages, llm, new_prompt=args if args else None)
                 )
@@ -708,17 +999,119 @@ def _handle_slash_command(user_input: str, session_id: str, agent_instance: Any)
         return None
 
 
-def _chat_loop(agent_instance: Any, session_id: str, input_offset: int = 5) -> None:
+def _reply_renderable(text: str) -> Any:
+    """回复的显示形式：Markdown，超长回复退化为纯文本"""
+    if len(text) > _MARKDOWN_MAX_CHARS:
+        return Text(text)
+
+    from rich.markdown import Markdown  # 导入 markdown-it/pygments 较慢，仅在需要时加载
+
+    return Markdown(text)
+
+
+def _stream_agent_reply(
+    agent_instance: Any, user_input: str, thread_id: str, plain: bool = False
+) -> bool:
+    """流式显示 Agent 回复及置信度评分，返回是否收到了回复
+
+    以 stream_mode="messages" 逐 token 接收，收到首个 token 即开始显示。
+    终端中由 Live 逐步刷新纯文本，结束后渲染一次 Markdown；plain 模式或输出不是终端时，
+    token 原样写出，不做 Markdown 解析和重绘。只显示 AI 消息文本，不显示工具结果；
+    置信度按最后一次工具调用之后的回复评估，与 invoke 的结果一致。
+    """
+    plain = plain or not console.is_terminal
+    from rich.live import Live
+
+    from .agent import _score_content
+
+    chunks = agent_instance.stream(
+        {"messages": [("user", user_input)]},
+        config={"configurable": {"thread_id": thread_id}},
+        stream_mode="messages",
+    )
+    text = ""
+    reply_start = 0  # 最后一段回复在 text 中的起始位置
+
+    def tokens() -> Iterator[str]:
+        nonlocal reply_start
+        for message, _metadata in chunks:
+            if getattr(message, "type", None) == "tool":
+                reply_start = len(text)
+                continue
+            content = getattr(message, "content", None)
+            if isinstance(content, str) and content:
+                yield content
+
+    pending = tokens()
+    with _sigint_guard():
+        with _status("[yellow]正在思考...[/yellow]"):
+            text = next(pending, "")
+        if not text:
+            return False
+
+        console.print("\n[bold green]Agent[/bold green]")
+        if plain:
+            console.out(text, end="", highlight=False)
+            for token in pending:
+                text += token
+                console.out(token, end="", highlight=False)
+            console.line()
+        else:
+            # 流式阶段只显示纯文本（构造 Markdown 会重新解析全文），结束后渲染一次 Markdown
+            with Live(
+                Text(text),
+                console=console,
+                refresh_per_second=_STATUS_REFRESH_PER_SECOND,
+                vertical_overflow="visible",
+            ) as live:
+                for token in pending:
+                    text += token
+                    live.update(Text(text))
+                live.update(_reply_renderable(text))
+
+    confidence = _score_content(text[reply_start:])
+    color, icon = next(
+        (color, icon) for threshold, color, icon in _CONFIDENCE_STYLES if confidence >= threshold
+    )
+    console.print(f"[{color}]{icon} 置信度: {confidence}/100[/{color}]")
+    if not plain and len(text) > _MARKDOWN_MAX_CHARS:
+        console.print("[dim]（回复较长，已跳过 Markdown 渲染）[/dim]")
+    return True
+
+
+def _chat_loop(
+    agent_instance: Any, session_id: str, input_offset: int = 5, plain: bool = False
+) -> None:
     """交互式对话循环
 
     Args:
         agent_instance: Agent 实例
         session_id: 会话 ID
         input_offset: 输入框向上偏移行数
+        plain: 是否以纯文本输出回复
     """
-    # 创建 PromptSession 用于更好的输入处理（支持中文、特殊键等）
-    # reserve_space_for_menu 参数让输入框向上偏移
-    prompt_session: PromptSession[str] = PromptSession(reserve_space_for_menu=input_offset)
+    # 仅在终端交互时创建 PromptSession（支持中文、特殊键等）；
+    # 管道输入时逐行读取 stdin，不加载 prompt_toolkit
+    prompt_session: Optional[Any] = None
+    if sys.stdin.isatty():
+        from prompt_toolkit import PromptSession
+        from prompt_toolkit.output import create_output
+
+        # 关闭光标位置查询（CPR），避免慢终端上每次重绘的往返等待。只改本会话的输出对象，
+        # 不设置 PROMPT_TOOLKIT_NO_CPR 环境变量（会被子进程继承）；用户设置了该变量时以其为准
+        output = create_output()
+        if "PROMPT_TOOLKIT_NO_CPR" not in os.environ and hasattr(output, "enable_cpr"):
+            output.enable_cpr = False
+
+        # reserve_space_for_menu 参数让输入框向上偏移；未配置补全，关闭输入时补全、
+        # 历史搜索和鼠标支持，按键时不做额外处理
+        prompt_session = PromptSession(
+            output=output,
+            reserve_space_for_menu=input_offset,
+            complete_while_typing=False,
+            enable_history_search=False,
+            mouse_support=False,
+        )
 
     # 当前会话 ID（可能会因为 /compress 而改变）
     current_session_id = session_id
@@ -731,7 +1124,13 @@ def _chat_loop(agent_instance: Any, session_id: str, input_offset: int = 5) -> N
             # - Backspace/Delete 键
             # - 方向键
             # - 其他特殊键
-            user_input = prompt_session.prompt("\n你: ")
+            if prompt_session is not None:
+                user_input = prompt_session.prompt("\n你: ")
+            else:
+                line = sys.stdin.readline()
+                if not line:
+                    break  # 输入结束
+                user_input = line.rstrip("\n")
 
             if user_input.lower() in ("exit", "quit", "bye"):
                 console.print("[yellow]👋 再见！[/yellow]")
@@ -750,32 +1149,7 @@ def _chat_loop(agent_instance: Any, session_id: str, input_offset: int = 5) -> N
                     current_session_id = command_result
                 continue
 
-            with console.status("[yellow]正在思考...[/yellow]"):
-                result = agent_instance.invoke(
-                    {"messages": [("user", user_input)]},
-                    config={"configurable": {"thread_id": current_session_id}},
-                )
-
-            if "messages" in result and result["messages"]:
-                last_message = result["messages"][-1]
-                response = (
-                    last_message.content if hasattr(last_message, "content") else str(last_message)
-                )
-
-                # 显示置信度评分
-                confidence = result.get("confidence", 0)
-                confidence_color = (
-                    "green" if confidence >= 80 else "yellow" if confidence >= 60 else "red"
-                )
-                confidence_icon = "🟢" if confidence >= 80 else "🟡" if confidence >= 60 else "🔴"
-
-                console.print(
-                    f"\n[bold green]Agent[/bold green] "
-                    f"[{confidence_color}]{confidence_icon} "
-                    f"置信度: {confidence}/100[/{confidence_color}]"
-                )
-                console.print(Markdown(response))
-            else:
+            if not _stream_agent_reply(agent_instance, user_input, current_session_id, plain=plain):
                 console.print("[red]✗ Agent未返回响应[/red]")
 
         except KeyboardInterrupt:
@@ -793,6 +1167,7 @@ def check(
     auto_fix: bool = typer.Option(False, "--auto-fix", help="自动修复发现的问题"),
     parallel: bool = typer.Option(False, "--parallel", help="并行处理多个文件"),
     output_format: str = typer.Option("text", "--output-format", help="输出格式: text/json"),
+    no_cache: bool = typer.Option(False, "--no-cache", help="禁用检查结果缓存（默认启用）"),
 ) -> None:
     """一致性检查
 
@@ -805,8 +1180,6 @@ def check(
         novel-agent check chapters/*.md --parallel --output-format json
     """
     import glob as glob_module
-    import json as json_module
-    from concurrent.futures import ThreadPoolExecutor, as_completed
 
     # 解析文件列表
     files = []
@@ -831,22 +1204,35 @@ def check(
     if is_batch and output_format == "text":
         console.print(
             Panel.fit(
-                f"[bold cyan]🔍 批量检查 {len(files)} 个文件[/bold cyan]\n"
-                f"模式: [yellow]{'并行' if parallel else '顺序'}[/yellow]\n"
-                f"自动修复: [yellow]{'是' if auto_fix else '否'}[/yellow]",
+                _CHECK_BATCH_HEADER.format(
+                    count=len(files),
+                    mode="并行" if parallel else "顺序",
+                    auto_fix="是" if auto_fix else "否",
+                ),
                 border_style="cyan",
             )
         )
 
+    # 检查结果缓存（文件内容及项目状态未变化时跳过 LLM 调用）及磁盘 LLM 缓存
+    cache_manager = None
+    project_state = ""
+    if not no_cache:
+        from .cache import enable_cache
+
+        cache_manager = enable_cache()
+        project_state = _project_state(Path.cwd())
+
     # 单文件模式（保持向后兼容）
     if not is_batch:
-        _check_single_file(files[0], api_key, auto_fix, output_format)
+        _check_single_file(files[0], api_key, auto_fix, output_format, cache_manager, project_state)
         return
 
     # 批量模式
+    from .agent import create_novel_agent
+
     try:
         # 创建 Agent
-        with console.status("[yellow]正在初始化 Agent...[/yellow]"):
+        with _status("[yellow]正在初始化 Agent...[/yellow]"):
             agent = create_novel_agent(api_key=api_key)
 
         # 统计信息
@@ -863,97 +1249,22 @@ def check(
         # 是否显示进度条（JSON 模式下不显示）
         show_progress = output_format == "text"
 
-        if parallel:
-            # 并行处理
-            with ThreadPoolExecutor(max_workers=min(len(files), 4)) as executor:
-                future_to_file = {
-                    executor.submit(_check_file_task, f, agent, auto_fix): f for f in files
-                }
-
-                if show_progress:
-                    with Progress() as progress:
-                        task = progress.add_task("[cyan]检查中...", total=len(files))
-
-                        for future in as_completed(future_to_file):
-                            file = future_to_file[future]
-                            try:
-                                result = future.result()
-                                results.append(result)
-                                if result["status"] == "error":
-                                    files_with_errors += 1
-                                    total_errors += len(result.get("issues", []))
-                                elif result["status"] == "warning":
-                                    files_with_warnings += 1
-                                    total_warnings += len(result.get("issues", []))
-                                else:
-                                    files_passed += 1
-                            except Exception as e:
-                                results.append(
-                                    {"file": str(file), "status": "error", "message": str(e)}
-                                )
-                                files_with_errors += 1
-                            progress.update(task, advance=1)
+        with Progress(disable=not show_progress) as progress:
+            task = progress.add_task("[cyan]检查中...", total=len(files))
+
+            for result in _check_multiple_files(
+                files, agent, auto_fix, cache_manager, parallel, project_state
+            ):
+                results.append(result)
+                if result["status"] == "error":
+                    files_with_errors += 1
+                    total_errors += len(result.get("issues", []))
+                elif result["status"] == "warning":
+                    files_with_warnings += 1
+                    total_warnings += len(result.get("issues", []))
                 else:
-                    # 不显示进度条
-                    for future in as_completed(future_to_file):
-                        file = future_to_file[future]
-                        try:
-                            result = future.result()
-                            results.append(result)
-                            if result["status"] == "error":
-                                files_with_errors += 1
-                                total_errors += len(result.get("issues", []))
-                            elif result["status"] == "warning":
-                                files_with_warnings += 1
-                                total_warnings += len(result.get("issues", []))
-                            else:
-                                files_passed += 1
-                        except Exception as e:
-                            results.append(
-                                {"file": str(file), "status": "error", "message": str(e)}
-                            )
-                            files_with_errors += 1
-        else:
-            # 顺序处理
-            if show_progress:
-                with Progress() as progress:
-                    task = progress.add_task("[cyan]检查中...", total=len(files))
-
-                    for file in files:
-                        try:
-                            result = _check_file_task(file, agent, auto_fix)
-                            results.append(result)
-                            if result["status"] == "error":
-                                files_with_errors += 1
-                                total_errors += len(result.get("issues", []))
-                            elif result["status"] == "warning":
-                                files_with_warnings += 1
-                                total_warnings += len(result.get("issues", []))
-                            else:
-                                files_passed += 1
-                        except Exception as e:
-                            results.append(
-                                {"file": str(file), "status": "error", "message": str(e)}
-                            )
-                            files_with_errors += 1
-                        progress.update(task, advance=1)
-            else:
-                # 不显示进度条
-                for file in files:
-                    try:
-                        result = _check_file_task(file, agent, auto_fix)
-                        results.append(result)
-                        if result["status"] == "error":
-                            files_with_errors += 1
-                            total_errors += len(result.get("issues", []))
-                        elif result["status"] == "warning":
-                            files_with_warnings += 1
-                            total_warnings += len(result.get("issues", []))
-                        else:
-                            files_passed += 1
-                    except Exception as e:
-                        results.append({"file": str(file), "status": "error", "message": str(e)})
-                        files_with_errors += 1
+                    files_passed += 1
+                progress.update(task, advance=1)
 
         # 输出结果
         if output_format == "json":
@@ -966,7 +1277,7 @@ def check(
                 "total_errors": total_errors,
                 "results": results,
             }
-            print(json_module.dumps(output, ensure_ascii=False, indent=2))
+            print(_dumps(output, indent=True))
         else:
             # 文本格式汇总报告
             console.print(
@@ -999,17 +1310,29 @@ def check(
 def sessions(
     list_: bool = typer.Option(False, "--list", help="列出所有会话ID"),
     delete: Optional[str] = typer.Option(None, "--delete", help="删除指定会话"),
+    limit: int = typer.Option(50, "--limit", help="最多列出的会话数（0 表示全部）"),
 ) -> None:
     """管理持久化会话。"""
+    from .session_store import delete_session, iter_sessions
 
     if list_:
-        ids = list_session_ids()
-        if not ids:
+        # 逐条读取并直接写出，不在内存中汇总全部会话，也不逐行解析 Rich 标记；
+        # 多取一条用于判断是否还有未列出的会话
+        ids = iter_sessions(limit=limit + 1 if limit > 0 else None)
+        first = next(ids, None)
+        if first is None:
             console.print("[yellow]暂无会话记录。[/yellow]")
         else:
             console.print("[bold cyan]现有会话[/bold cyan]:")
-            for sid in ids:
-                console.print(f"  - {sid}")
+            write = sys.stdout.write
+            write(f"  - {first}\n")
+            for count, sid in enumerate(ids, start=1):
+                if count == limit:
+                    sys.stdout.flush()
+                    console.print(f"[dim]仅显示最近 {limit} 个会话，使用 --limit 0 查看全部[/dim]")
+                    break
+                write(f"  - {sid}\n")
+            sys.stdout.flush()
     elif delete:
         delete_session(delete)
         console.print(f"[green]✓[/green] 已删除会话 {delete}")
@@ -1028,30 +1351,16 @@ def memory_ingest(
 ) -> None:
     """将连续性索引写入 NervusDB（通过 CLI）。"""
 
-    index_path = Path(index) if index else Path("data/continuity/index.json")
+    cwd = Path.cwd()
+    index_path = cwd / (index or _DEFAULT_INDEX_PATH)
     try:
-        if refresh or not index_path.exists():
-            data = build_continuity_index(Path.cwd(), output_path=index_path)
-        else:
-            # If not refreshing and index exists, we need to load it.
-            # Assuming there's a function to load it, or build_continuity_index
-            # can also load if it exists and refresh is False.
-            # Given the original error, _load_continuity_index was the problem.
-            # For now, let's assume build_continuity_index handles both
-            # creation and loading implicitly
-            # or that the 'data' is always generated by
-            # 'build_continuity_index' and returned.
-            # Re-reading the refresh_memory function,
-            # build_continuity_index always returns the data.
-            # So, if refresh is False and index_path exists, it means we don't need to do anything
-            # However, the previous code explicitly called _load_continuity_index.
-            data = build_continuity_index(Path.cwd(), output_path=index_path)
+        data = load_or_build_continuity_index(cwd, output_path=index_path, refresh=refresh)
     except Exception as exc:
         console.print(f"[red]✗ 索引加载失败: {exc}")
         raise typer.Exit(code=1) from exc
 
     try:
-        with console.status("[yellow]正在写入 NervusDB...[/yellow]"):
+        with _status("[yellow]正在写入 NervusDB...[/yellow]"):
             stats = memory_ingest_module.ingest_from_index(data, db, dry_run=dry_run)
     except Exception as exc:
         console.print(f"[red]✗ 写入失败: {exc}")
@@ -1080,7 +1389,7 @@ def run(
         raise typer.Exit(code=1)
 
     if prompt_file:
-        prompt_text = Path(prompt_file).read_text(encoding="utf-8")
+        prompt_text = Path(prompt_file).read_bytes().decode("utf-8")
     else:
         prompt_text = prompt or ""
 
@@ -1088,38 +1397,42 @@ def run(
         console.print("[red]请通过 --prompt 或 --prompt-file 指定需求描述。[/red]")
         raise typer.Exit(code=1)
 
-    index_path = Path(index) if index else Path("data/continuity/index.json")
-    if refresh or not index_path.exists():
-        index_data = build_continuity_index(Path.cwd(), output_path=index_path)
-    else:
-        # Same logic as above: build_continuity_index should return the data
-        # regardless of refresh status, handling existing files.
-        index_data = build_continuity_index(Path.cwd(), output_path=index_path)
-
+    # 参数校验全部放在构建索引、导入 LangChain 之前，输入有误时立即退出
     gemini_key = api_key or os.getenv("GOOGLE_API_KEY")
     if not gemini_key:
         console.print("[red]未找到 Gemini API Key，请使用 --api-key 或设置 GOOGLE_API_KEY。[/red]")
         raise typer.Exit(code=1)
 
-    model = ChatGoogleGenerativeAI(
-        model="gemini-2.0-flash-exp",
-        google_api_key=gemini_key,
-        temperature=0.6,
+    # 连续性索引（文件解析）在后台构建，与主线程中导入 LangChain、创建模型重叠
+    cwd = Path.cwd()
+    index_path = cwd / (index or _DEFAULT_INDEX_PATH)
+    index_future = _get_executor().submit(
+        load_or_build_continuity_index, cwd, output_path=index_path, refresh=refresh
     )
 
+    from .workflows import build_chapter_workflow
+
+    model = _gemini_model("gemini-2.0-flash-exp", gemini_key, 0.6)
+
     workflow_graph = build_chapter_workflow(
         model,
-        continuity_index=index_data,
+        continuity_index=index_future.result(),
         index_path=index_path,
         nervus_db=nervus_db,
     )
 
     result = workflow_graph.invoke({"prompt": prompt_text})
 
-    console.print("[bold cyan]Workflow 输出[/bold cyan]")
-    console.print("[green]Outline:[/green]\n" + (result.get("outline") or "(空)"))
-    console.print("[green]Draft:[/green]\n" + (result.get("draft") or "(空)"))
-    console.print("[yellow]Issues:[/yellow]\n" + (result.get("issues") or "(空)"))
+    console.print(
+        "\n".join(
+            [
+                "[bold cyan]Workflow 输出[/bold cyan]",
+                "[green]Outline:[/green]\n" + (result.get("outline") or "(空)"),
+                "[green]Draft:[/green]\n" + (result.get("draft") or "(空)"),
+                "[yellow]Issues:[/yellow]\n" + (result.get("issues") or "(空)"),
+            ]
+        )
+    )
 
 
 @app.command()
@@ -1154,11 +1467,9 @@ def graph_query(
     )
 
     try:
-        # 设置环境变量
-        os.environ["NOVEL_GRAPH_DB"] = db_path
-
-        with console.status("[yellow]正在查询图数据库...[/yellow]"):
-            result = smart_context_search_tool(query, search_type, max_hops, limit)
+        # 显式传入数据库路径，不再改写进程级环境变量
+        with _status("[yellow]正在查询图数据库...[/yellow]"):
+            result = smart_context_search_tool(query, search_type, max_hops, limit, db_path=db_path)
 
         console.print("\n" + result)
 
@@ -1202,10 +1513,8 @@ def network(
     )
 
     try:
-        os.environ["NOVEL_GRAPH_DB"] = db_path
-
-        with console.status("[yellow]正在分析关系网络...[/yellow]"):
-            result = build_character_network_tool(characters)
+        with _status("[yellow]正在分析关系网络...[/yellow]"):
+            result = build_character_network_tool(characters, db_path=db_path)
 
         console.print("\n" + result)
 
@@ -1227,9 +1536,9 @@ def _handle_streaming_output(
     output_format: str,
 ) -> None:
     """处理流式输出"""
-    import json as json_module
-
-    collected_chunks: list[str] = []
+    # 已输出的累计文本。Agent 每次返回的是完整的累计内容，
+    # 因此只需保存最新一份引用，无需反复拼接 chunk 列表
+    collected_text = ""
     all_messages: list[Any] = []
 
     try:
@@ -1245,58 +1554,68 @@ def _handle_streaming_output(
                     all_messages = messages
 
                     # 如果是新内容
-                    if content and (not collected_chunks or content != "".join(collected_chunks)):
+                    if content and content != collected_text:
                         # 计算新增的部分
-                        existing_text = "".join(collected_chunks)
-                        if content.startswith(existing_text):
-                            new_text = content[len(existing_text) :]
-                            collected_chunks.append(new_text)
+                        if content.startswith(collected_text):
+                            new_text = content[len(collected_text) :]
+                            collected_text = content
 
                             # 根据格式输出
                             if output_format == "stream-json":
                                 # 流式 JSON：每个 chunk 一行
-                                chunk_data = {"chunk": new_text, "done": False}
-                                print(json_module.dumps(chunk_data, ensure_ascii=False))
-                                sys.stdout.flush()
+                                _write_json_line({"chunk": new_text, "done": False})
                             else:
                                 # text 格式：直接输出
                                 print(new_text, end="", flush=True)
 
         # 流式输出结束
-        if output_format == "stream-json":
-            # 计算置信度
-            from .agent import _estimate_confidence
+        if output_format == "text":
+            # text 格式：换行，无需计算置信度
+            print()
+            return
+
+        from .agent import _estimate_confidence
 
-            confidence = _estimate_confidence(all_messages) if all_messages else 0
+        # 计算置信度（未收到任何消息时直接记 0，跳过评分）
+        confidence = _estimate_confidence(all_messages) if all_messages else 0
 
+        if output_format == "stream-json":
             # 最后一个 chunk，包含置信度
             final_data = {
                 "chunk": "",
                 "done": True,
                 "confidence": confidence,
-                "response": "".join(collected_chunks),
+                "response": collected_text,
             }
-            print(json_module.dumps(final_data, ensure_ascii=False))
-        elif output_format == "json":
+            _write_json_line(final_data)
+        else:
             # JSON 格式：输出完整结果
-            from .agent import _estimate_confidence
-
-            confidence = _estimate_confidence(all_messages) if all_messages else 0
             output_data = {
-                "response": "".join(collected_chunks),
+                "response": collected_text,
                 "confidence": confidence,
             }
-            print("\n" + json_module.dumps(output_data, ensure_ascii=False, indent=2))
-        else:
-            # text 格式：换行
-            print()
+            print("\n" + _dumps(output_data, indent=True))
 
     except KeyboardInterrupt:
         if output_format in ["json", "stream-json"]:
-            print(json_module.dumps({"error": "Interrupted", "confidence": 0}))
+            print(_ERR_INTERRUPTED_JSON)
         raise typer.Exit(130)
 
 
+def _message_text(msg: Any) -> Any:
+    """取消息内容（单次属性查找），没有 content 属性时回退为 str(msg)"""
+    content = getattr(msg, "content", None)
+    return str(msg) if content is None else content
+
+
+def _message_to_dict(msg: Any) -> dict[str, Any]:
+    """将 LangChain 消息转换为 JSON 输出用的 {role, content}（每个属性只取一次）"""
+    return {
+        "role": "user" if getattr(msg, "type", None) == "human" else "assistant",
+        "content": _message_text(msg),
+    }
+
+
 def _run_print_mode(
     user_input: str,
     agent: str,
@@ -1311,152 +1630,113 @@ def _run_print_mode(
     tools_mode: str = "default",
 ) -> None:
     """执行非交互模式的单次查询"""
-    import json as json_module
-    from pathlib import Path
-
     project_root = Path.cwd()
 
-    # 启动文件监控（如果启用）- 但不显示消息
-    watcher_thread = None
-    if enable_watcher:
-        try:
-            from .file_watcher import start_background_watcher
-
-            index_path = project_root / "data" / "continuity" / "index.json"
-            watcher_thread = start_background_watcher(project_root, index_path)
-        except Exception:
-            pass  # 静默失败
-
-    try:
-        with open_checkpointer() as checkpointer:
-            # 创建 Agent（不显示进度）
-            agent_instance = create_specialized_agent(
-                agent,
-                api_key=api_key,
-                checkpointer=checkpointer,
-                enable_context_retrieval=enable_context,
-                project_root=str(project_root) if enable_context else None,
-                allowed_tools=allowed_tools,
-                disallowed_tools=disallowed_tools,
-                tools_mode=tools_mode,
-            )
-
-            # 执行单次查询
-            import uuid
+    from .agent import _estimate_confidence, create_specialized_agent
+    from .session_store import open_checkpointer
 
-            thread_id = str(uuid.uuid4())
-            config = {"configurable": {"thread_id": thread_id}}
-
-            # 流式输出
-            if stream:
-                _handle_streaming_output(agent_instance, user_input, config, output_format)
-                return
-
-            # 调用 Agent（非流式）
-            result = agent_instance.invoke({"messages": [("user", user_input)]}, config)
+    # 文件监控（如果启用）不显示消息，后台启动与 Agent 创建和调用重叠
+    with _watcher_context(enable_watcher, project_root, silent=True):
+        try:
+            with open_checkpointer() as checkpointer:
+                # 创建 Agent（不显示进度）
+                agent_instance = create_specialized_agent(
+                    agent,
+                    api_key=api_key,
+                    checkpointer=checkpointer,
+                    enable_context_retrieval=enable_context,
+                    project_root=str(project_root) if enable_context else None,
+                    allowed_tools=allowed_tools,
+                    disallowed_tools=disallowed_tools,
+                    tools_mode=tools_mode,
+                )
 
-            # 提取响应
-            messages = result.get("messages", [])
-            if not messages:
-                if output_format == "json":
-                    print(json_module.dumps({"error": "No response", "confidence": 0}, indent=2))
-                else:
-                    print("错误：未收到响应")
-                raise typer.Exit(1)
+                # 执行单次查询（线程 ID 只需在 checkpointer 中唯一）
+                thread_id = secrets.token_hex(8)
+                config = {"configurable": {"thread_id": thread_id}}
+
+                # 流式输出（stream-json 总是逐行输出 NDJSON，下游可边收边处理）
+                if stream or output_format == "stream-json":
+                    with _sigint_guard():
+                        _handle_streaming_output(agent_instance, user_input, config, output_format)
+                    return
+
+                # 调用 Agent（非流式）
+                with _sigint_guard():
+                    result = agent_instance.invoke({"messages": [("user", user_input)]}, config)
+
+                # 提取响应
+                messages = result.get("messages", [])
+                if not messages:
+                    if output_format == "json":
+                        print(_ERR_NO_RESPONSE_JSON)
+                    else:
+                        print("错误：未收到响应")
+                    raise typer.Exit(1)
 
-            last_message = messages[-1]
-            response = (
-                last_message.content if hasattr(last_message, "content") else str(last_message)
-            )
+                response = _message_text(messages[-1])
 
-            # 计算置信度
-            from .agent import _estimate_confidence
+                # text 格式只需要最后一条消息，无需评估置信度或序列化消息列表
+                if output_format == "text":
+                    print(response)
+                    return
 
-            confidence = _estimate_confidence(messages)
+                # 计算置信度
+                confidence = _estimate_confidence(messages)
 
-            # 格式化输出
-            if output_format == "json":
-                output_data = {
-                    "response": response,
-                    "confidence": confidence,
-                    "messages": [
-                        {
-                            "role": (
-                                "user"
-                                if hasattr(msg, "type") and msg.type == "human"
-                                else "assistant"
-                            ),
-                            "content": (msg.content if hasattr(msg, "content") else str(msg)),
-                        }
-                        for msg in messages
-                    ],
-                }
-                print(json_module.dumps(output_data, ensure_ascii=False, indent=2))
-            elif output_format == "stream-json":
-                # stream-json 暂时等同于 json（流式输出在 #56 实现）
+                # json 格式
                 output_data = {
                     "response": response,
                     "confidence": confidence,
+                    "messages": [_message_to_dict(msg) for msg in messages],
                 }
-                print(json_module.dumps(output_data, ensure_ascii=False))
-            else:
-                # text 格式
-                print(response)
-
-    except KeyboardInterrupt:
-        if output_format == "json":
-            print(json_module.dumps({"error": "Interrupted", "confidence": 0}))
-        raise typer.Exit(130)
-    except Exception as e:
-        if output_format == "json":
-            print(
-                json_module.dumps({"error": str(e), "confidence": 0}, ensure_ascii=False, indent=2)
-            )
-        else:
-            console.print(f"[red]错误：{e}[/red]")
-        raise typer.Exit(1)
-    finally:
-        # 显示缓存统计（仅在非 JSON 格式下）
-        if cache_manager and output_format == "text":
-            stats = cache_manager.get_stats()
-            if stats["total_queries"] > 0:
-                console.print(
-                    f"\n[dim]缓存命中率: {stats['hit_rate']:.1f}% "
-                    f"({stats['hits']}/{stats['total_queries']})[/dim]"
-                )
+                print(_dumps(output_data, indent=True))
 
-        # 停止文件监控
-        if watcher_thread and watcher_thread.is_alive():
-            try:
-                watcher_thread.join(timeout=0.5)
-            except Exception:
-                pass
+        except KeyboardInterrupt:
+            if output_format == "json":
+                print(_ERR_INTERRUPTED_JSON)
+            raise typer.Exit(130)
+        except Exception as e:
+            if output_format == "json":
+                print(_dumps({"error": str(e), "confidence": 0}, indent=True))
+            else:
+                console.print(f"[red]错误：{e}[/red]")
+            raise typer.Exit(1)
+        finally:
+            # 显示缓存统计（仅在非 JSON 格式下）
+            if cache_manager and output_format == "text":
+                stats = cache_manager.get_stats()
+                if stats["total_queries"] > 0:
+                    console.print(
+                        f"\n[dim]缓存命中率: {stats['hit_rate']:.1f}% "
+                        f"({stats['hits']}/{stats['total_queries']})[/dim]"
+                    )
 
 
 def _check_single_file(
-    file: Path, api_key: Optional[str], auto_fix: bool, output_format: str
+    file: Path,
+    api_key: Optional[str],
+    auto_fix: bool,
+    output_format: str,
+    cache_manager: Optional[Any] = None,
+    project_state: str = "",
 ) -> None:
     """单文件检查模式（保持向后兼容）"""
-    console.print(
-        Panel.fit(
-            f"[bold cyan]📋 一致性检查[/bold cyan]\n" f"文件: [yellow]{file}[/yellow]",
-            border_style="cyan",
-        )
-    )
+    from .agent import create_novel_agent
+
+    console.print(Panel.fit(_CHECK_SINGLE_HEADER.format(file=file), border_style="cyan"))
 
     try:
         # 创建 Agent
-        with console.status("[yellow]正在初始化 Agent...[/yellow]"):
+        with _status("[yellow]正在初始化 Agent...[/yellow]"):
             agent = create_novel_agent(api_key=api_key)
 
         # 检查文件
-        result = _check_file_task(file, agent, auto_fix)
+        result = _check_file_task(file, agent, auto_fix, cache_manager, project_state)
 
         # 输出结果
         if output_format == "json":
-            import json as json_module
-
-            print(json_module.dumps(result, ensure_ascii=False, indent=2))
+            print(_dumps(result, indent=True))
         else:
             if result["status"] == "passed":
                 console.print("\n[bold green]✅ 检查通过[/bold green]")
@@ -1477,9 +1757,90 @@ def _check_single_file(
         raise typer.Exit(1)
 
 
-def _check_file_task(file: Path, agent: Any, auto_fix: bool) -> dict[str, Any]:
+def _check_multiple_files(
+    files: list[Path],
+    agent: Any,
+    auto_fix: bool,
+    cache_manager: Optional[Any] = None,
+    parallel: bool = False,
+    project_state: str = "",
+) -> Iterator[dict[str, Any]]:
+    """检查多个文件，逐个产出检查结果
+
+    并行模式下共享同一个 Agent，在线程池中同时发起请求（LLM 调用以网络等待为主），
+    结果按完成顺序产出；顺序模式按文件顺序产出。单个文件的异常会转换为 error 结果。
+    """
+    if not parallel:
+        for file in files:
+            try:
+                yield _check_file_task(file, agent, auto_fix, cache_manager, project_state)
+            except Exception as e:
+                yield {"file": str(file), "status": "error", "message": str(e)}
+        return
+
+    with ThreadPoolExecutor(max_workers=min(len(files), _CHECK_MAX_WORKERS)) as executor:
+        future_to_file = {
+            executor.submit(_check_file_task, f, agent, auto_fix, cache_manager, project_state): f
+            for f in files
+        }
+        for future in as_completed(future_to_file):
+            try:
+                yield future.result()
+            except Exception as e:
+                yield {"file": str(future_to_file[future]), "status": "error", "message": str(e)}
+
+
+def _project_state(root: Path) -> str:
+    """检查结论所依赖的项目状态：连续性索引及 chapters/、spec/ 下目录和文档的最新修改时间
+
+    一致性结论还取决于被检查文件以外的设定和章节，这些内容变化后缓存的结论不再可信
+    """
+    latest = 0
+    paths = [str(root / _DEFAULT_INDEX_PATH)]
+    for name in ("chapters", "spec"):
+        for dirpath, _dirnames, filenames in os.walk(root / name):
+            paths.append(dirpath)
+            paths.extend(os.path.join(dirpath, f) for f in filenames if f.endswith(".md"))
+    for path in paths:
+        try:
+            latest = max(latest, os.stat(path).st_mtime_ns)
+        except OSError:
+            continue
+    return str(latest)
+
+
+def _check_cache_key(data: bytes, prompt: str, project_state: str = "") -> str:
+    """根据文件内容、检查提示词、项目状态和模型生成检查结果缓存键"""
+    digest = hashlib.blake2b(
+        data + prompt.encode("utf-8") + project_state.encode("utf-8")
+    ).hexdigest()
+    model_name = os.getenv("GOOGLE_MODEL", "gemini-2.0-flash-exp")
+    return f"check:{model_name}:{digest}"
+
+
+def _build_check_prompt(file: Path, data: bytes, auto_fix: bool) -> str:
+    """构造检查提示词，小文件直接附上内容"""
+    prompt = (_CHECK_PROMPT_FIX if auto_fix else _CHECK_PROMPT_NOFIX).format(file=file)
+    if len(data) <= _CHECK_INLINE_MAX_BYTES:
+        try:
+            return prompt + _CHECK_INLINE_BLOCK.format(content=data.decode("utf-8"))
+        except UnicodeDecodeError:
+            pass  # 非 UTF-8 文件交给 Agent 自行读取
+    return prompt
+
+
+def _check_file_task(
+    file: Path,
+    agent: Any,
+    auto_fix: bool,
+    cache_manager: Optional[Any] = None,
+    project_state: str = "",
+) -> dict[str, Any]:
     """检查单个文件的任务函数（用于并行处理）
 
+    提供 cache_manager 时，相同文件内容 + 提示词 + 项目状态（见 _project_state）的检查结果
+    会被缓存，项目未变化时再次检查不再调用 Agent（--auto-fix 会修改文件，不缓存）。
+
     返回格式：
     {
         "file": str,
@@ -1488,55 +1849,47 @@ def _check_file_task(file: Path, agent: Any, auto_fix: bool) -> dict[str, Any]:
         "fixed": bool,  # 是否已修复（auto_fix 时）
     }
     """
-    # 构造检查提示
-    prompt = f"""请检查文件 {file} 的一致性。
-
-分析以下方面：
-1. 角色一致性：性格、能力、行为是否前后一致
-2. 情节逻辑：情节发展是否合理
-3. 时间线：事件顺序是否合理
-4. 世界观：设定规则是否被遵守
+    try:
+        # 构造检查提示（文件只读取一次，同时用于内联内容和缓存键）
+        data = file.read_bytes()
+        prompt = _build_check_prompt(file, data, auto_fix)
 
-{"并提供具体的修复方案。" if auto_fix else "请详细指出发现的问题。"}
+        cache_key = None
+        if cache_manager is not None and not auto_fix:
+            cache_key = _check_cache_key(data, prompt, project_state)
+            cached = cache_manager.get_response(cache_key)
+            if cached is not None:
+                return dict(cached)
 
-请用以下格式返回：
-- 如果没有问题：返回 "通过"
-- 如果有问题：每行一个问题，格式为 "Line X: 问题描述"
-"""
-
-    try:
         # 调用 Agent
         result = agent.invoke(
             {"messages": [("user", prompt)]},
-            config={"configurable": {"thread_id": f"check-{file.name}"}},
+            # 每次检查使用独立线程 ID，避免并行检查同名文件时会话互相干扰
+            config={"configurable": {"thread_id": f"check-{file.name}-{secrets.token_hex(3)}"}},
         )
 
         # 提取响应
         if "messages" not in result or not result["messages"]:
             return {"file": str(file), "status": "error", "issues": ["Agent 未返回响应"]}
 
-        last_message = result["messages"][-1]
-        response = last_message.content if hasattr(last_message, "content") else str(last_message)
+        response = _message_text(result["messages"][-1])
 
         # 解析响应
-        if "通过" in response or "no issues" in response.lower():
-            return {"file": str(file), "status": "passed", "issues": []}
-
-        # 提取问题列表
-        issues = []
-        for line in response.split("\n"):
-            line = line.strip()
-            if line and (line.startswith("Line") or line.startswith("-") or line.startswith("•")):
-                issues.append(line.lstrip("-•").strip())
-
-        # 判断严重性
-        has_error = any(
-            keyword in response.lower() for keyword in ["错误", "error", "critical", "严重"]
-        )
+        if _CHECK_PASSED_RE.search(response):
+            check_result: dict[str, Any] = {"file": str(file), "status": "passed", "issues": []}
+        else:
+            # 提取问题列表（单次正则扫描，不构造整份行列表）
+            issues = [m.group(1).lstrip("-•").strip() for m in _ISSUE_LINE_RE.finditer(response)]
 
-        status = "error" if has_error else "warning" if issues else "passed"
+            # 判断严重性
+            has_error = _CHECK_ERROR_RE.search(response) is not None
 
-        return {"file": str(file), "status": status, "issues": issues, "fixed": False}
+            status = "error" if has_error else "warning" if issues else "passed"
+            check_result = {"file": str(file), "status": status, "issues": issues, "fixed": False}
+
+        if cache_manager is not None and cache_key is not None:
+            cache_manager.cache_response(cache_key, check_result)
+        return check_result
 
     except Exception as e:
         return {"file": str(file), "status": "error", "issues": [f"检查失败: {str(e)}"]}
@@ -1579,10 +1932,14 @@ def memory(
             console.print(f"[yellow]分类 '{category}' 中没有记忆[/yellow]")
             return
 
-        console.print(f"[bold cyan]📚 记忆列表（{category}）：[/bold cyan]\n")
+        # 汇总为一张表格一次性渲染，避免逐条 print
+        table = Table(title=f"📚 记忆列表（{category}）", title_style="bold cyan")
+        table.add_column("键", style="yellow")
+        table.add_column("值")
+        table.add_column("更新时间", style="dim")
         for mem in memories:
-            console.print(f"  [yellow]{mem['key']}[/yellow]: {mem['value']}")
-            console.print(f"    [dim]更新时间: {mem['updated_at']}[/dim]")
+            table.add_row(mem["key"], str(mem["value"]), mem["updated_at"])
+        console.print(table)
 
     elif action == "clear":
         if not category:
@@ -1602,9 +1959,13 @@ def memory(
             console.print(f"[yellow]未找到匹配的记忆：{query}[/yellow]")
             return
 
-        console.print(f"[bold cyan]🔍 搜索结果（{len(results)} 条）：[/bold cyan]\n")
+        table = Table(title=f"🔍 搜索结果（{len(results)} 条）", title_style="bold cyan")
+        table.add_column("分类", style="cyan")
+        table.add_column("键", style="yellow")
+        table.add_column("值")
         for mem in results:
-            console.print(f"  [{mem['category']}] [yellow]{mem['key']}[/yellow]: {mem['value']}")
+            table.add_row(mem["category"], mem["key"], str(mem["value"]))
+        console.print(table)
 
     elif action == "get":
         if not category or not key:
@@ -1762,8 +2123,6 @@ def outline(
 
         # 输出或保存
         if output:
-            from pathlib import Path
-
             output_path = Path(output)
             output_path.parent.mkdir(parents=True, exist_ok=True)
             output_path.write_text(result, encoding="utf-8")
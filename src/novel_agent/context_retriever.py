@@ -7,18 +7,76 @@
 优势：精确、快速、零成本、可解释
 """
 
+import heapq
+import itertools
 import json
+import os
 import re
 import subprocess
-from dataclasses import dataclass
+import threading
+from collections import OrderedDict
+from collections.abc import Iterable
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field, replace
 from pathlib import Path
 from typing import Any, Optional
 
+from .continuity import read_continuity_index
 from .graph_query import GraphQuerier
 from .logging_config import get_logger
 
+try:
+    import ahocorasick
+except ImportError:  # pragma: no cover - pyahocorasick 为可选加速依赖
+    ahocorasick = None  # type: ignore[assignment, unused-ignore]
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson 为可选加速依赖
+    orjson = None  # type: ignore[assignment]
+
 logger = get_logger(__name__)
 
+# Markdown 文件不超过此数量时直接在进程内搜索，省去启动 ripgrep 子进程的开销
+_IN_PROCESS_SEARCH_MAX_FILES = 200
+
+# retrieve_context 结果缓存的最大条目数（LRU）
+_RESULT_CACHE_SIZE = 32
+
+# 启用预热（NOVEL_ENABLE_WARMUP）时预先读入的最近章节数
+_WARMUP_CHAPTER_COUNT = 50
+
+# 单次查询最多提取的实体数（每个实体对应一次图查询）
+_MAX_ENTITIES = 16
+
+# 图查询的最大并发数
+_GRAPH_QUERY_MAX_WORKERS = 8
+
+# ripgrep 搜索超时（秒）
+_RG_TIMEOUT_SECONDS = 5
+
+# ripgrep --json 输出中 match 事件的行前缀（type 字段总是最先输出）
+_RG_MATCH_PREFIX = '{"type":"match"'
+
+# 查询中的章节号，如 "第3章"、"第 5 章"、"3章"
+_CHAPTER_RE = re.compile(r"第?\s*(\d+)\s*章")
+
+
+def _unique_names(items: list[dict[str, Any]]) -> tuple[str, ...]:
+    """提取非空名称，按索引顺序去重"""
+    return tuple(dict.fromkeys(name for item in items if (name := item.get("name", ""))))
+
+
+def _path_bucket(path: str) -> float:
+    """文件类型优先级：章节 > 设定 > 大纲"""
+    if "chapters/" in path:
+        return 1.0
+    if "spec/knowledge/" in path:
+        return 0.8
+    if "spec/outline.md" in path:
+        return 0.5
+    return 0.0
+
 
 @dataclass
 class Document:
@@ -30,6 +88,13 @@ class Document:
     confidence: float  # 置信度 (0-1)
     context: Optional[str] = None  # 上下文片段
     metadata: Optional[dict[str, Any]] = None  # 元数据
+    prio_bucket: float = field(init=False, repr=False)  # 文件类型优先级（由路径推导）
+    path_lower: str = field(init=False, repr=False)  # 小写路径，用于文件名匹配
+
+    def __post_init__(self) -> None:
+        # 排序时每次查询都要用到，构造时算一次即可
+        self.prio_bucket = _path_bucket(self.path)
+        self.path_lower = self.path.lower()
 
     def __hash__(self) -> int:
         return hash(self.path)
@@ -55,6 +120,7 @@ class ContextRetriever:
         project_root: str | Path,
         graph_db_path: Optional[str] = None,
         index_path: Optional[str] = None,
+        warmup_count: Optional[int] = None,
     ):
         """初始化检索器
 
@@ -62,6 +128,8 @@ class ContextRetriever:
             project_root: 项目根目录
             graph_db_path: 图数据库路径（可选）
             index_path: 连续性索引路径（可选）
+            warmup_count: 预先读入内存的最近章节数；None 时仅在设置了
+                NOVEL_ENABLE_WARMUP 环境变量时预热 50 章
         """
         self.project_root = Path(project_root)
 
@@ -79,9 +147,28 @@ class ContextRetriever:
         self.index_path = index_path
         self.index: Optional[dict[str, Any]] = None
 
+        # 实体匹配器（随索引重建）：按索引顺序去重的角色名、地点名，
+        # 以及可选的 Aho–Corasick 自动机（名称 -> 在 角色名+地点名 中的下标列表）
+        self._char_names: tuple[str, ...] = ()
+        self._loc_names: tuple[str, ...] = ()
+        self._entity_automaton: Any = None
+
+        # 检索结果缓存：(查询, 参数) -> 文档列表；索引、文档或图数据库变化时整体失效
+        self._result_cache: OrderedDict[tuple[Any, ...], list[Document]] = OrderedDict()
+        self._result_cache_mtime: Optional[float] = None
+
+        # 文档内容缓存：相对路径 -> (mtime, 内容)
+        self._content_cache: dict[str, tuple[float, str]] = {}
+
         # 加载索引
         self._load_index()
 
+        # 预热章节内容，首次查询无需再同步读盘
+        if warmup_count is None and os.environ.get("NOVEL_ENABLE_WARMUP"):
+            warmup_count = _WARMUP_CHAPTER_COUNT
+        if warmup_count:
+            self._warmup_content_cache(warmup_count)
+
         # 检查图数据库
         if Path(graph_db_path).exists():
             try:
@@ -97,18 +184,42 @@ class ContextRetriever:
         if not Path(self.index_path).exists():
             logger.warning(f"索引文件不存在: {self.index_path}")
             self.index = {"characters": [], "locations": [], "chapters": []}
+            self._build_entity_matcher()
             return
 
         try:
-            with open(self.index_path, encoding="utf-8") as f:
-                self.index = json.load(f)
+            self.index = read_continuity_index(Path(self.index_path))
             logger.info(f"✓ 索引已加载: {len(self.index.get('characters', []))} 角色")
         except Exception as e:
             logger.error(f"索引加载失败: {e}")
             self.index = {"characters": [], "locations": [], "chapters": []}
 
+        self._build_entity_matcher()
+
+    def _build_entity_matcher(self) -> None:
+        """根据索引预先构建实体名称匹配器，避免每次查询都遍历索引中的字典"""
+        index = self.index or {}
+        self._char_names = _unique_names(index.get("characters", []))
+        self._loc_names = _unique_names(index.get("locations", []))
+        self._entity_automaton = None
+
+        names = self._char_names + self._loc_names
+        if ahocorasick is None or not names:
+            return
+
+        # 同名实体（如既是角色又是地点）共用一个关键词
+        positions: dict[str, list[int]] = {}
+        for idx, name in enumerate(names):
+            positions.setdefault(name, []).append(idx)
+
+        automaton = ahocorasick.Automaton()
+        for name, idxs in positions.items():
+            automaton.add_word(name, idxs)
+        automaton.make_automaton()
+        self._entity_automaton = automaton
+
     def retrieve_context(
-        self, query: str, max_tokens: int = 10000, max_docs: int = 5
+        self, query: str, max_tokens: int = 10000, max_docs: int = 5, literal: bool = True
     ) -> list[Document]:
         """智能检索相关上下文
 
@@ -116,10 +227,26 @@ class ContextRetriever:
             query: 用户查询
             max_tokens: 最大 token 数（粗略估计：1 token ≈ 1.5 字符）
             max_docs: 最多返回文档数
+            literal: 文本搜索是否按字面量匹配；用户查询多为角色名等纯文本，
+                字面量匹配可走 ripgrep 的 memchr/Aho–Corasick 快速路径。
+                需要正则时传 False
 
         Returns:
             按相关性排序的文档列表
         """
+        # 项目内容未变时直接返回上次的结果（副本，避免调用方修改缓存）
+        source_mtime = self._source_mtime()
+        if source_mtime != self._result_cache_mtime:
+            self._result_cache.clear()
+            self._result_cache_mtime = source_mtime
+
+        cache_key = (query, max_tokens, max_docs, literal)
+        cached = self._result_cache.get(cache_key)
+        if cached is not None:
+            self._result_cache.move_to_end(cache_key)
+            logger.info(f"✓ 命中检索缓存，返回 {len(cached)} 个文档")
+            return [replace(doc) for doc in cached]
+
         logger.info(f"开始检索上下文，查询: {query}")
 
         # 1. 提取实体
@@ -131,27 +258,63 @@ class ContextRetriever:
         logger.debug(f"图查询结果: {len(docs_by_graph)} 个文档")
 
         # 3. grep 搜索
-        docs_by_grep = self._grep_search(query)
+        # 后续排序只取前 max_docs 个，多留一些余量给图查询结果合并后的排序
+        docs_by_grep = self._grep_search(query, literal=literal, max_files=max_docs * 3)
         logger.debug(f"grep 搜索结果: {len(docs_by_grep)} 个文档")
 
         # 4. 合并去重
         all_docs = self._merge_documents(docs_by_graph, docs_by_grep)
         logger.debug(f"合并后: {len(all_docs)} 个文档")
 
-        # 5. 优先级排序
-        ranked_docs = self._rank_documents(all_docs, query)
+        # 5. 优先级排序（后面只取前 max_docs 个，无需排序其余文档）
+        ranked_docs = self._rank_documents(all_docs, query, limit=max_docs)
 
         # 6. 限制数量和 token
         limited_docs = self._limit_documents(ranked_docs, max_docs, max_tokens)
 
+        self._result_cache[cache_key] = [replace(doc) for doc in limited_docs]
+        if len(self._result_cache) > _RESULT_CACHE_SIZE:
+            self._result_cache.popitem(last=False)
+
         logger.info(f"✓ 检索完成，返回 {len(limited_docs)} 个文档")
         return limited_docs
 
-    def _extract_entities(self, query: str) -> list[tuple[str, str]]:
+    def _source_mtime(self) -> float:
+        """检索所依赖内容的最新修改时间（索引、图数据库、chapters/ 与 spec/ 下的目录和文档）
+
+        文档需逐个 stat：就地覆盖写入不会改变所在目录的 mtime；目录的 mtime 则覆盖删除、改名。
+        用 os.scandir 遍历，判断类型不需要额外的系统调用
+        """
+        latest = 0.0
+        for path in (self.index_path, self.graph_db_path):
+            try:
+                latest = max(latest, os.stat(path).st_mtime)
+            except OSError:
+                continue
+
+        stack = [str(self.project_root / name) for name in ("chapters", "spec")]
+        while stack:
+            directory = stack.pop()
+            try:
+                latest = max(latest, os.stat(directory).st_mtime)
+                with os.scandir(directory) as entries:
+                    for entry in entries:
+                        if entry.is_dir():
+                            stack.append(entry.path)
+                        elif entry.name.endswith(".md"):
+                            latest = max(latest, entry.stat().st_mtime)
+            except OSError:
+                continue
+        return latest
+
+    def _extract_entities(
+        self, query: str, max_entities: int = _MAX_ENTITIES
+    ) -> list[tuple[str, str]]:
         """从查询中提取实体（角色、地点等）
 
         Args:
             query: 用户查询
+            max_entities: 最多提取的实体数，达到后停止扫描
 
         Returns:
             实体列表 [(类型, 名称), ...]
@@ -159,78 +322,114 @@ class ContextRetriever:
         if self.index is None:
             return []
 
-        entities = []
-
-        # 提取角色
-        for char in self.index.get("characters", []):
-            name = char.get("name", "")
-            if name and name in query:
-                entities.append(("character", name))
-
-        # 提取地点
-        for loc in self.index.get("locations", []):
-            name = loc.get("name", "")
-            if name and name in query:
-                entities.append(("location", name))
+        # 提取角色和地点：有自动机时一次线性扫描找出全部命中，按索引顺序输出
+        char_count = len(self._char_names)
+        if self._entity_automaton is not None:
+            hits = {idx for _, idxs in self._entity_automaton.iter(query) for idx in idxs}
+            entities = [
+                (
+                    ("character", self._char_names[idx])
+                    if idx < char_count
+                    else ("location", self._loc_names[idx - char_count])
+                )
+                for idx in sorted(hits)[:max_entities]
+            ]
+        else:
+            # 惰性匹配，凑满 max_entities 个后不再检查剩余名称
+            matches = itertools.chain(
+                (("character", name) for name in self._char_names if name in query),
+                (("location", name) for name in self._loc_names if name in query),
+            )
+            entities = list(itertools.islice(matches, max_entities))
 
         # 提取章节号
-        chapter_pattern = r"第?\s*(\d+)\s*章"
-        matches = re.findall(chapter_pattern, query)
-        for match in matches:
-            entities.append(("chapter", f"ch{int(match):03d}"))
+        for match in _CHAPTER_RE.finditer(query):
+            if len(entities) >= max_entities:
+                break
+            entities.append(("chapter", f"ch{int(match.group(1)):03d}"))
 
         return entities
 
     def _query_by_graph(self, entities: list[tuple[str, str]]) -> list[Document]:
         """通过图查询相关文档
 
+        各实体的查询互不依赖（每次都是一次 NervusDB CLI 调用），多个实体时并发执行，
+        结果仍按实体顺序返回。
+
         Args:
             entities: 实体列表
 
         Returns:
             文档列表
         """
-        if not self.graph_querier or not entities:
+        querier = self.graph_querier
+        if not querier or not entities:
             return []
 
+        if len(entities) == 1:
+            return self._query_entity_graph(querier, *entities[0])
+
+        max_workers = min(_GRAPH_QUERY_MAX_WORKERS, len(entities))
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            results = executor.map(
+                lambda entity: self._query_entity_graph(querier, *entity), entities
+            )
+            return [doc for docs in results for doc in docs]
+
+    def _query_entity_graph(
+        self, querier: GraphQuerier, entity_type: str, entity_name: str
+    ) -> list[Document]:
+        """查询单个实体在图中关联的章节
+
+        Args:
+            querier: 图查询器
+            entity_type: 实体类型
+            entity_name: 实体名称
+
+        Returns:
+            文档列表（查询失败时为空）
+        """
         docs = []
 
-        for entity_type, entity_name in entities:
-            try:
-                # 从图中搜索实体
-                # 将 entity_type 转换为 Literal 类型
-                search_type: Any = entity_type
-                result = self.graph_querier.smart_context_search(
-                    query=entity_name, search_type=search_type, max_hops=1, limit=10
-                )
+        try:
+            # 从图中搜索实体
+            # 将 entity_type 转换为 Literal 类型
+            search_type: Any = entity_type
+            result = querier.smart_context_search(
+                query=entity_name, search_type=search_type, max_hops=1, limit=10
+            )
 
-                # 提取文档路径
-                for item in result.get("results", []):
-                    # 从元数据中提取章节信息
-                    if "metadata" in item:
-                        chapter_num = item["metadata"].get("chapter")
-                        if chapter_num:
-                            doc_path = f"chapters/ch{chapter_num:03d}.md"
-                            docs.append(
-                                Document(
-                                    path=doc_path,
-                                    content="",  # 稍后加载
-                                    source="graph",
-                                    confidence=item.get("confidence", 0.9),
-                                    metadata={"entity": entity_name, "type": entity_type},
-                                )
+            # 提取文档路径
+            for item in result.get("results", []):
+                # 从元数据中提取章节信息
+                if "metadata" in item:
+                    chapter_num = item["metadata"].get("chapter")
+                    if chapter_num:
+                        doc_path = f"chapters/ch{chapter_num:03d}.md"
+                        docs.append(
+                            Document(
+                                path=doc_path,
+                                content="",  # 稍后加载
+                                source="graph",
+                                confidence=item.get("confidence", 0.9),
+                                metadata={"entity": entity_name, "type": entity_type},
                             )
+                        )
 
-            except Exception as e:
-                logger.warning(f"图查询失败 ({entity_name}): {e}")
+        except Exception as e:
+            logger.warning(f"图查询失败 ({entity_name}): {e}")
 
         return docs
 
-    def _grep_search(self, query: str) -> list[Document]:
-        """使用 ripgrep 搜索文本
+    def _grep_search(
+        self, query: str, literal: bool = True, max_files: Optional[int] = None
+    ) -> list[Document]:
+        """搜索文本：小项目在进程内搜索，大项目使用 ripgrep
 
         Args:
             query: 搜索关键词
+            literal: 按字面量匹配（False 时按正则匹配）
+            max_files: 最多返回的文件数，达到后提前结束搜索
 
         Returns:
             文档列表
@@ -251,68 +450,189 @@ class ContextRetriever:
                 logger.warning("没有可搜索的路径")
                 return []
 
-            # 使用 rg 搜索（JSON 格式输出）
-            result = subprocess.run(
-                [
-                    "rg",
-                    "--json",
-                    "--max-count=3",  # 每个文件最多3个匹配
-                    "--ignore-case",  # 忽略大小写
-                    query,
-                ]
-                + search_paths,
-                capture_output=True,
-                text=True,
-                timeout=5,
-            )
+            # 小项目：进程内搜索即可完成，无需 fork/exec 和 JSON 解析
+            files = self._collect_small_corpus(search_paths)
+            if files is not None:
+                return self._search_in_process(query, files, literal, max_files)
 
-            # 解析 JSON 输出
-            seen_files = set()
-            for line in result.stdout.splitlines():
+            # 使用 rg 搜索（JSON 格式输出）
+            cmd = ["rg", "--json"]
+            if literal:
+                cmd.append("-F")  # 字面量匹配，跳过正则引擎
+            cmd += [
+                "--type=md",  # 只搜索 Markdown 文件
+                "--max-count=3",  # 每个文件最多3个匹配
+                "--ignore-case",  # 忽略大小写
+                "--max-columns=200",  # 超长行不输出内容
+                "--no-messages",  # 不输出文件读取错误
+                query,
+            ]
+            timed_out = threading.Event()
+            with subprocess.Popen(
+                cmd + search_paths,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL,
+                encoding="utf-8",
+            ) as proc:
+
+                def kill_on_timeout() -> None:
+                    timed_out.set()
+                    proc.kill()
+
+                # 超时后强制结束 ripgrep；管道随之读到 EOF，解析循环自然退出
+                timer = threading.Timer(_RG_TIMEOUT_SECONDS, kill_on_timeout)
+                timer.start()
                 try:
-                    match = json.loads(line)
-                    if match.get("type") == "match":
-                        data = match.get("data", {})
-                        path_data = data.get("path", {})
-                        file_path = path_data.get("text", "")
-
-                        # 去重
-                        if file_path in seen_files:
-                            continue
-                        seen_files.add(file_path)
-
-                        # 提取匹配的行文本作为上下文
-                        lines_data = data.get("lines", {})
-                        context = lines_data.get("text", "").strip()
-
-                        # 转换为相对路径
-                        try:
-                            rel_path = str(Path(file_path).relative_to(self.project_root))
-                        except ValueError:
-                            rel_path = file_path
-
-                        docs.append(
-                            Document(
-                                path=rel_path,
-                                content="",  # 稍后加载
-                                source="grep",
-                                confidence=0.8,
-                                context=context,
-                            )
-                        )
+                    # 边搜索边解析，收集到足够的文件后不再等待 ripgrep 扫完
+                    docs = self._parse_rg_events(proc.stdout or [], max_files)
+                    proc.terminate()
+                finally:
+                    timer.cancel()
 
-                except json.JSONDecodeError:
-                    continue
+            if timed_out.is_set():
+                logger.warning("ripgrep 搜索超时")
 
         except FileNotFoundError:
             logger.warning("ripgrep 未安装，跳过文本搜索")
-        except subprocess.TimeoutExpired:
-            logger.warning("ripgrep 搜索超时")
         except Exception as e:
             logger.warning(f"grep 搜索失败: {e}")
 
         return docs
 
+    def _parse_rg_events(
+        self, lines: Iterable[str], max_files: Optional[int] = None
+    ) -> list[Document]:
+        """解析 ripgrep --json 输出
+
+        Args:
+            lines: 输出行（可以是仍在写入的管道）
+            max_files: 收集到这么多个文件后立即停止读取
+
+        Returns:
+            文档列表，每个文件取第一处匹配行作为上下文
+        """
+        docs: list[Document] = []
+        seen_files = set()
+
+        # 只有 match 事件有用，begin/end/summary 按前缀直接跳过
+        for line in lines:
+            if not line.startswith(_RG_MATCH_PREFIX):
+                continue
+            try:
+                event = orjson.loads(line) if orjson is not None else json.loads(line)
+            except json.JSONDecodeError:
+                continue
+
+            data = event.get("data", {})
+            file_path = data.get("path", {}).get("text", "")
+
+            # 去重
+            if file_path in seen_files:
+                continue
+            seen_files.add(file_path)
+
+            # 提取匹配的行文本作为上下文
+            context = data.get("lines", {}).get("text", "").strip()
+
+            # 转换为相对路径
+            try:
+                rel_path = str(Path(file_path).relative_to(self.project_root))
+            except ValueError:
+                rel_path = file_path
+
+            docs.append(
+                Document(
+                    path=rel_path,
+                    content="",  # 稍后加载
+                    source="grep",
+                    confidence=0.8,
+                    context=context,
+                )
+            )
+            if max_files is not None and len(docs) >= max_files:
+                break
+
+        return docs
+
+    def _collect_small_corpus(self, search_paths: list[str]) -> Optional[list[Path]]:
+        """收集待搜索的 Markdown 文件
+
+        Args:
+            search_paths: 搜索目录
+
+        Returns:
+            文件列表；超过进程内搜索上限时返回 None（交给 ripgrep）
+        """
+        files: list[Path] = []
+        for search_path in search_paths:
+            for file_path in Path(search_path).rglob("*.md"):
+                files.append(file_path)
+                if len(files) > _IN_PROCESS_SEARCH_MAX_FILES:
+                    return None
+        return sorted(files)
+
+    def _search_in_process(
+        self,
+        query: str,
+        files: list[Path],
+        literal: bool = True,
+        max_files: Optional[int] = None,
+    ) -> list[Document]:
+        """在进程内搜索文件（忽略大小写）
+
+        Args:
+            query: 搜索关键词
+            files: 待搜索文件
+            literal: 按字面量匹配（False 时按正则匹配）
+            max_files: 命中这么多个文件后停止搜索
+
+        Returns:
+            文档列表，每个文件取第一处匹配行作为上下文
+        """
+        if literal:
+            needle = query.lower()
+
+            def matches(text: str) -> bool:
+                return needle in text.lower()
+
+        else:
+            pattern = re.compile(query, re.IGNORECASE | re.MULTILINE)
+
+            def matches(text: str) -> bool:
+                return pattern.search(text) is not None
+
+        docs = []
+
+        for file_path in files:
+            try:
+                text = file_path.read_text(encoding="utf-8")
+            except (OSError, UnicodeDecodeError):
+                continue
+
+            # 先整文件判断，命中后再逐行定位上下文
+            if not matches(text):
+                continue
+            context = next((line.strip() for line in text.splitlines() if matches(line)), "")
+
+            try:
+                rel_path = str(file_path.relative_to(self.project_root))
+            except ValueError:
+                rel_path = str(file_path)
+
+            docs.append(
+                Document(
+                    path=rel_path,
+                    content="",  # 稍后加载
+                    source="grep",
+                    confidence=0.8,
+                    context=context,
+                )
+            )
+            if max_files is not None and len(docs) >= max_files:
+                break
+
+        return docs
+
     def _merge_documents(
         self, docs_by_graph: list[Document], docs_by_grep: list[Document]
     ) -> list[Document]:
@@ -338,38 +658,39 @@ class ContextRetriever:
 
         return list(docs_map.values())
 
-    def _rank_documents(self, docs: list[Document], query: str) -> list[Document]:
+    def _rank_documents(
+        self, docs: list[Document], query: str, limit: Optional[int] = None
+    ) -> list[Document]:
         """优先级排序
 
         Args:
             docs: 文档列表
             query: 查询关键词
+            limit: 只需要前 limit 个文档时用堆做部分排序（None 表示全量排序）
 
         Returns:
             排序后的文档列表
         """
 
-        def priority_score(doc: Document) -> float:
-            score = doc.confidence
+        query_lower = query.lower()
 
-            # 文件类型优先级
-            if "chapters/" in doc.path:
-                score += 1.0  # 章节优先
-            elif "spec/knowledge/" in doc.path:
-                score += 0.8  # 设定次之
-            elif "spec/outline.md" in doc.path:
-                score += 0.5  # 大纲最后
+        def priority_score(doc: Document) -> float:
+            # 文件类型优先级（章节 > 设定 > 大纲）
+            score = doc.confidence + doc.prio_bucket
 
             # 来源优先级
             if doc.source == "graph":
                 score += 0.2  # 图查询更精确
 
             # 文件名匹配
-            if query.lower() in doc.path.lower():
+            if query_lower in doc.path_lower:
                 score += 0.3
 
             return score
 
+        if limit is not None and limit < len(docs):
+            # nlargest 与 sorted(..., reverse=True)[:limit] 结果一致（同分保持原顺序）
+            return heapq.nlargest(limit, docs, key=priority_score)
         return sorted(docs, key=priority_score, reverse=True)
 
     def _limit_documents(
@@ -389,17 +710,19 @@ class ContextRetriever:
         total_tokens: float = 0.0
 
         for doc in docs[:max_docs]:
-            # 加载文档内容
+            remaining_tokens = max_tokens - total_tokens
+            remaining_chars = int(remaining_tokens * 1.5)
+
+            # 加载文档内容：比剩余预算多读一个字符就足以判断是否需要截断，
+            # 长章节不必整篇读入
             if not doc.content:
-                doc.content = self._load_document_content(doc.path)
+                doc.content = self._load_document_content(doc.path, max_chars=remaining_chars + 1)
 
             # 估算 token 数（粗略：1 token ≈ 1.5 字符）
             doc_tokens = len(doc.content) / 1.5
 
             if total_tokens + doc_tokens > max_tokens:
                 # 截断文档
-                remaining_tokens = max_tokens - total_tokens
-                remaining_chars = int(remaining_tokens * 1.5)
                 doc.content = doc.content[:remaining_chars] + "\n\n... (已截断)"
                 limited_docs.append(doc)
                 break
@@ -409,28 +732,63 @@ class ContextRetriever:
 
         return limited_docs
 
-    def _load_document_content(self, path: str) -> str:
-        """加载文档内容
+    def _warmup_content_cache(self, count: int) -> None:
+        """按修改时间倒序读入最近的章节
+
+        Args:
+            count: 读入的章节数
+        """
+        chapters_dir = self.project_root / "chapters"
+        if not chapters_dir.is_dir():
+            return
+
+        chapters = []
+        for file_path in chapters_dir.glob("*.md"):
+            try:
+                chapters.append((file_path.stat().st_mtime, file_path))
+            except OSError:
+                continue
+        chapters.sort(reverse=True)
+
+        for _, file_path in chapters[:count]:
+            self._load_document_content(str(file_path.relative_to(self.project_root)))
+        logger.debug(f"已预热 {min(count, len(chapters))} 个章节")
+
+    def _load_document_content(self, path: str, max_chars: Optional[int] = None) -> str:
+        """加载文档内容（优先使用内存缓存，文件修改后自动失效）
 
         Args:
             path: 文件相对路径
+            max_chars: 最多读取的字符数（None 表示整篇读取）
 
         Returns:
             文档内容
         """
         full_path = self.project_root / path
 
-        if not full_path.exists():
+        try:
+            mtime = full_path.stat().st_mtime
+        except OSError:
             logger.warning(f"文档不存在: {path}")
             return ""
 
+        cached = self._content_cache.get(path)
+        if cached is not None and cached[0] == mtime:
+            return cached[1] if max_chars is None else cached[1][:max_chars]
+
         try:
+            # 文本模式按字符读取，只解码所需的前缀
             with open(full_path, encoding="utf-8") as f:
-                return f.read()
+                content = f.read(-1 if max_chars is None else max_chars)
         except Exception as e:
             logger.error(f"加载文档失败 ({path}): {e}")
             return ""
 
+        # 只缓存完整内容
+        if max_chars is None or len(content) < max_chars:
+            self._content_cache[path] = (mtime, content)
+        return content
+
     def format_context(self, docs: list[Document]) -> str:
         """格式化上下文为文本
 
@@ -4,9 +4,18 @@
 """
 
 import difflib
+import os
+import random
+import time
+from collections.abc import Iterator
 from pathlib import Path
 from typing import Any
 
+try:
+    from rapidfuzz import fuzz, process
+except ImportError:  # pragma: no cover - rapidfuzz 为可选加速依赖
+    fuzz = process = None  # type: ignore[assignment, unused-ignore]
+
 
 class FriendlyError(Exception):
     """友好的错误基类"""
@@ -106,6 +115,30 @@ class TimeoutError_(FriendlyError):  # noqa: N801, N818
         super().__init__(message, suggestions)
 
 
+def _walk_files(directory: str, prefix: str) -> Iterator[tuple[str, str]]:
+    """递归列出目录下的文件
+
+    os.scandir 的目录项自带文件类型，无需为每个条目创建 Path 并额外 stat。
+    不进入符号链接目录，跳过无权限的目录。
+
+    Args:
+        directory: 要遍历的目录
+        prefix: 返回路径的前缀
+
+    Yields:
+        (文件名, 路径)
+    """
+    try:
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    yield from _walk_files(entry.path, prefix + entry.name + os.sep)
+                elif entry.is_file():
+                    yield entry.name, prefix + entry.name
+    except PermissionError:
+        return
+
+
 def find_similar_files(target: str, search_dir: str = ".", limit: int = 3) -> list[str]:
     """查找相似文件
 
@@ -124,22 +157,22 @@ def find_similar_files(target: str, search_dir: str = ".", limit: int = 3) -> li
     if not search_path.exists():
         return []
 
-    # 收集所有文件
-    all_files: list[str] = []
-    try:
-        for file_path in search_path.rglob("*"):
-            if file_path.is_file():
-                all_files.append(str(file_path))
-    except PermissionError:
-        pass
-
-    if not all_files:
+    # 收集所有文件（路径格式与 Path.rglob 一致：当前目录下不带 "./" 前缀）
+    prefix = "" if search_path == Path(".") else os.path.join(str(search_path), "")
+    files = list(_walk_files(str(search_path), prefix))
+    if not files:
         return []
 
-    # 计算相似度
+    # 计算相似度：优先使用 rapidfuzz（C 实现），与 difflib 同为 2*M/T 比例
+    if process is not None:
+        names = [file_name for file_name, _ in files]
+        matches = process.extract(
+            target_name, names, scorer=fuzz.ratio, limit=limit, score_cutoff=50
+        )
+        return [files[idx][1] for _, score, idx in matches if score > 50]
+
     similarities: list[tuple[str, float]] = []
-    for file_str in all_files:
-        file_name = Path(file_str).name
+    for file_name, file_str in files:
         ratio = difflib.SequenceMatcher(None, target_name, file_name).ratio()
         similarities.append((file_str, ratio))
 
@@ -185,35 +218,49 @@ def suggest_command(error_type: str, context: dict[str, Any]) -> list[str]:
     return suggestions
 
 
-def retry_with_backoff(func: Any, max_retries: int = 3, initial_delay: float = 1.0) -> Any:
-    """带退避的重试机制
+def retry_with_backoff(
+    func: Any,
+    max_retries: int = 3,
+    initial_delay: float = 1.0,
+    max_delay: float = 30.0,
+    retryable: tuple[type[BaseException], ...] = (ConnectionError, TimeoutError),
+    deadline: float | None = None,
+) -> Any:
+    """带退避的重试机制（指数退避 + 全抖动）
+
+    只重试 retryable 中的异常，其他异常（如 ValueError）直接抛出，不做无谓的重试。
+    每次等待时间在 [0, 当前延迟] 内随机选取，避免多个调用方同时失败后同时重试。
 
     Args:
         func: 要执行的函数
-        max_retries: 最大重试次数
+        max_retries: 最大尝试次数
         initial_delay: 初始延迟（秒）
+        max_delay: 单次延迟上限（秒）
+        retryable: 需要重试的异常类型
+        deadline: 整体时间预算（秒），None 表示不限制
 
     Returns:
         函数执行结果
 
     Raises:
-        NetworkError: 重试失败后抛出
+        NetworkError: 重试次数或时间预算用尽后抛出
     """
-    import time
-
-    delay = initial_delay
+    delay = min(initial_delay, max_delay)
+    expires_at = None if deadline is None else time.monotonic() + deadline
 
     for attempt in range(max_retries):
         try:
             return func()
-        except Exception as e:
-            if attempt == max_retries - 1:
-                # 最后一次重试失败
-                raise NetworkError(f"操作失败: {str(e)}", retry_count=attempt + 1)
+        except retryable as e:
+            sleep_for = random.uniform(0, delay)
+            out_of_time = expires_at is not None and time.monotonic() + sleep_for > expires_at
+            if attempt == max_retries - 1 or out_of_time:
+                # 最后一次重试失败，或等待后已超出时间预算
+                raise NetworkError(f"操作失败: {str(e)}", retry_count=attempt + 1) from e
 
             # 等待后重试
-            time.sleep(delay)
-            delay *= 2  # 指数退避
+            time.sleep(sleep_for)
+            delay = min(delay * 2, max_delay)  # 指数退避
 
 
 __all__ = [
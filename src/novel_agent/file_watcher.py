@@ -4,8 +4,11 @@
 自动触发索引更新，保持上下文始终最新。
 """
 
+import os
+import queue
 import threading
 import time
+from collections.abc import Iterable
 from pathlib import Path
 from typing import Any, Callable, Optional
 
@@ -15,8 +18,32 @@ from watchdog.observers import Observer
 from .continuity import build_continuity_index
 from .logging_config import get_logger
 
+try:
+    import watchfiles
+except ImportError:  # pragma: no cover - watchfiles 为可选加速依赖
+    watchfiles = None  # type: ignore[assignment, unused-ignore]
+
 logger = get_logger(__name__)
 
+# 以这些前缀开头的文件视为隐藏/临时文件，不触发索引更新
+_IGNORED_PREFIXES = (".", "~")
+
+# watchfiles 变更类型 -> watchdog 风格事件类型
+_CHANGE_TYPES = {"added": "created", "modified": "modified", "deleted": "deleted"}
+
+
+def _is_watched_file(file_path: str) -> bool:
+    """只处理 .md 文件，忽略临时文件和隐藏文件"""
+    # 用 os.path.basename 取文件名，避免每个事件都构造 Path 对象
+    return file_path.endswith(".md") and not os.path.basename(file_path).startswith(
+        _IGNORED_PREFIXES
+    )
+
+
+def _watch_filter(change: Any, path: str) -> bool:
+    """watchfiles 过滤器"""
+    return _is_watched_file(path)
+
 
 class NovelFileHandler(FileSystemEventHandler):
     """处理小说项目文件变更事件"""
@@ -42,10 +69,10 @@ class NovelFileHandler(FileSystemEventHandler):
         self.on_update = on_update
         self.debounce_seconds = debounce_seconds
 
-        # 防抖机制：避免短时间内多次更新
-        self._update_timer: Optional[threading.Timer] = None
-        self._pending_files: set[str] = set()
-        self._lock = threading.Lock()
+        # 防抖机制：事件回调只入队，由单个常驻工作线程合并后统一更新
+        self._events: queue.Queue[Optional[tuple[str, str]]] = queue.Queue()
+        self._pending_files: dict[str, str] = {}  # 路径 -> 最近一次事件类型（仅工作线程访问）
+        self._worker: Optional[threading.Thread] = None
 
     def on_modified(self, event: FileSystemEvent) -> None:
         """文件修改事件"""
@@ -67,45 +94,87 @@ class NovelFileHandler(FileSystemEventHandler):
 
     def _handle_file_change(self, file_path: str, event_type: str) -> None:
         """处理文件变更"""
-        # 只处理 .md 文件
-        if not file_path.endswith(".md"):
+        if not _is_watched_file(file_path):
             return
 
-        # 忽略临时文件和隐藏文件
-        file_name = Path(file_path).name
-        if file_name.startswith(".") or file_name.startswith("~"):
+        logger.info(f"检测到文件 {event_type}: {file_path}")
+
+        self.start()
+        self._events.put((file_path, event_type))
+
+    def start(self) -> None:
+        """启动防抖工作线程（已在运行时忽略）"""
+        if self._worker is not None and self._worker.is_alive():
             return
+        self._worker = threading.Thread(
+            target=self._run, name="NovelFileHandler-debounce", daemon=True
+        )
+        self._worker.start()
 
-        logger.info(f"检测到文件 {event_type}: {file_path}")
+    def stop(self) -> None:
+        """停止工作线程，退出前刷新尚未处理的变更"""
+        worker = self._worker
+        if worker is None:
+            return
+        self._events.put(None)
+        worker.join(timeout=5)
+        self._worker = None
+
+    def _run(self) -> None:
+        """工作线程：累积事件，静默 debounce_seconds 后统一更新一次"""
+        while True:
+            try:
+                # 没有待处理变更时无限期等待，避免空转唤醒
+                timeout = self.debounce_seconds if self._pending_files else None
+                item = self._events.get(timeout=timeout)
+            except queue.Empty:
+                self._update_index()
+                continue
 
-        with self._lock:
-            self._pending_files.add(file_path)
+            if item is None:
+                self._update_index()
+                return
+            self._merge_event(*item)
 
-            # 取消之前的定时器
-            if self._update_timer is not None:
-                self._update_timer.cancel()
+    def _handle_change_set(self, changes: Iterable[tuple[Any, str]]) -> None:
+        """处理 watchfiles 产出的一批已防抖变更，直接更新索引
 
-            # 启动新的防抖定时器
-            self._update_timer = threading.Timer(self.debounce_seconds, self._update_index)
-            self._update_timer.daemon = True
-            self._update_timer.start()
+        仅在 watchfiles 后端的监控线程中调用，此时不会启动防抖工作线程。
+        """
+        for change, file_path in changes:
+            if _is_watched_file(file_path):
+                self._merge_event(file_path, _CHANGE_TYPES.get(change.name, "modified"))
+        self._update_index()
+
+    def _merge_event(self, file_path: str, event_type: str) -> None:
+        """合并同一文件的连续事件（如 Windows 保存时的 删除+创建+修改）"""
+        previous = self._pending_files.get(file_path)
+        if previous == "created" and event_type == "deleted":
+            # 窗口内创建又删除的文件对索引没有影响
+            del self._pending_files[file_path]
+        elif previous == "created":
+            return
+        elif previous == "deleted" and event_type == "created":
+            self._pending_files[file_path] = "modified"
+        else:
+            self._pending_files[file_path] = event_type
 
     def _update_index(self) -> None:
-        """更新索引（防抖后执行）"""
-        with self._lock:
-            if not self._pending_files:
-                return
+        """更新索引（防抖后由工作线程执行）"""
+        if not self._pending_files:
+            return
 
-            files = list(self._pending_files)
-            self._pending_files.clear()
+        files = list(self._pending_files)
+        self._pending_files.clear()
 
         logger.info(f"开始更新索引，涉及 {len(files)} 个文件")
 
         try:
-            # 重新构建完整索引
-            # TODO: 优化为增量更新
+            # 增量更新：只重新解析变更的章节（清单缺失或角色名变化时自动全量重建）
             start_time = time.time()
-            build_continuity_index(self.project_root, output_path=self.index_path)
+            build_continuity_index(
+                self.project_root, output_path=self.index_path, changed_files=files
+            )
             elapsed = time.time() - start_time
 
             logger.info(f"✓ 索引更新完成，耗时 {elapsed:.2f}s")
@@ -143,6 +212,9 @@ class FileWatcher:
         self.on_update = on_update
 
         self.observer: Optional[Any] = None  # Observer 类型标注问题
+        # watchfiles 后端（可选）：监控线程与停止信号
+        self._watch_thread: Optional[threading.Thread] = None
+        self._stop_event = threading.Event()
         self.handler = NovelFileHandler(
             project_root=self.project_root,
             index_path=self.index_path,
@@ -176,10 +248,16 @@ class FileWatcher:
         Returns:
             监控线程对象
         """
-        if self.observer is not None and self.observer.is_alive():
+        if self.is_running():
             logger.warning("文件监控已在运行")
             return threading.current_thread()
 
+        if watchfiles is not None:
+            return self._start_watchfiles_daemon()
+
+        self._stop_event.clear()
+        started = threading.Event()
+
         def run() -> None:
             try:
                 self.observer = Observer()
@@ -196,23 +274,64 @@ class FileWatcher:
 
                 self.observer.start()  # type: ignore[no-untyped-call]
                 logger.info("✓ 文件监控已启动（后台模式）")
+                started.set()
 
-                # 保持线程运行
-                while self.observer and self.observer.is_alive():
-                    time.sleep(1)
+                # 阻塞等待 stop() 发出的停止信号，空闲时不唤醒
+                self._stop_event.wait()
             except Exception as e:
                 logger.error(f"文件监控线程异常: {e}", exc_info=True)
+            finally:
+                started.set()
 
         thread = threading.Thread(target=run, name="FileWatcher", daemon=True)
         thread.start()
 
-        # 等待 observer 启动
-        time.sleep(0.1)
+        # 等待 observer 启动（或启动失败）
+        started.wait(timeout=5)
 
         return thread
 
+    def _start_watchfiles_daemon(self) -> threading.Thread:
+        """使用 watchfiles（系统原生监控后端）启动后台监控"""
+        dir_paths = []
+        for dir_name in self.watch_dirs:
+            dir_path = self.project_root / dir_name
+            if not dir_path.exists():
+                logger.warning(f"监控目录不存在，跳过: {dir_path}")
+                continue
+            dir_paths.append(dir_path)
+            logger.info(f"开始监控目录: {dir_path}")
+
+        self._stop_event.clear()
+
+        def run() -> None:
+            try:
+                # watchfiles 自带防抖与事件合并，每批变更直接交给处理器
+                for changes in watchfiles.watch(
+                    *dir_paths,
+                    watch_filter=_watch_filter,
+                    debounce=int(self.handler.debounce_seconds * 1000),
+                    stop_event=self._stop_event,
+                    raise_interrupt=False,
+                ):
+                    self.handler._handle_change_set(changes)
+            except Exception as e:
+                logger.error(f"文件监控线程异常: {e}", exc_info=True)
+
+        self._watch_thread = threading.Thread(target=run, name="FileWatcher", daemon=True)
+        self._watch_thread.start()
+        logger.info("✓ 文件监控已启动（后台模式，watchfiles）")
+
+        return self._watch_thread
+
     def stop(self) -> None:
         """停止文件监控"""
+        self._stop_event.set()
+        if self._watch_thread is not None:
+            self._watch_thread.join(timeout=5)
+            self._watch_thread = None
+            logger.info("✓ 文件监控已停止")
+
         if self.observer is None:
             return
 
@@ -221,10 +340,13 @@ class FileWatcher:
             self.observer.join(timeout=5)
 
         self.observer = None
+        self.handler.stop()
         logger.info("✓ 文件监控已停止")
 
     def is_running(self) -> bool:
         """检查监控是否运行中"""
+        if self._watch_thread is not None and self._watch_thread.is_alive():
+            return True
         return self.observer is not None and self.observer.is_alive()
 
 
@@ -9,13 +9,45 @@
 
 from __future__ import annotations
 
+import hashlib
+import json
+import os
 import re
+from collections import defaultdict
+from collections.abc import Iterator
 from dataclasses import dataclass
 from pathlib import Path
 from typing import Any
 
 from .nervus_cli import NervusCLIConfig, cypher_query
 
+try:
+    import xxhash
+except ImportError:  # pragma: no cover - xxhash 为可选加速依赖
+    xxhash = None  # type: ignore[assignment]
+
+# 章节哈希清单文件后缀（与数据库文件并列存放）
+_MANIFEST_SUFFIX = ".hashes.json"
+# 清单中表示"写入未完成"的摘要，与任何真实摘要都不相等
+_DIRTY_DIGEST = ""
+
+# 每累计多少章合并写入一次图数据库
+_WRITE_BATCH_CHAPTERS = 50
+# 单次查询参数 JSON 的字节上限（远低于 Linux 单个命令行参数 128 KiB 的限制）
+_MAX_PARAMS_BYTES = 64 * 1024
+
+# 时间标记模式
+_TIME_RE = re.compile(r"`(\d{4}-\d{2}-\d{2}(?:T\d{2}:\d{2}:\d{2}(?:Z|[+-]\d{2}:\d{2})?)?)`")
+# 引用标记模式
+_REF_RE = re.compile(r"`@ref\[([^\]]+)\]`")
+# 角色提及模式（简单版本，实际可用 NER）
+_CHAR_RE = re.compile(r"([A-Za-z\u4e00-\u9fa5]{2,4})(?:说|道|想|做|去|来|看|听)")
+_CHAPTER_NUM_RE = re.compile(r"ch(\d+)")
+# 拼入 Cypher 文本的标签和关系类型必须匹配此模式（防注入）
+_IDENTIFIER_RE = re.compile(r"[A-Za-z_][A-Za-z0-9_]*")
+# 角色提取时过滤的常见词
+_STOPWORDS = frozenset({"他", "她", "我", "你", "我们", "他们", "那", "这"})
+
 
 @dataclass
 class Entity:
@@ -40,16 +72,10 @@ class ChapterParser:
     """章节解析器 - 提取实体和关系"""
 
     def __init__(self) -> None:
-        # 时间标记模式
-        self.time_pattern = re.compile(
-            r"`(\d{4}-\d{2}-\d{2}(?:T\d{2}:\d{2}:\d{2}(?:Z|[+-]\d{2}:\d{2})?)?)`"
-        )
-        # 引用标记模式
-        self.ref_pattern = re.compile(r"`@ref\[([^\]]+)\]`")
-        # 角色提及模式（简单版本，实际可用 NER）
-        self.character_pattern = re.compile(
-            r"([A-Za-z\u4e00-\u9fa5]{2,4})(?:说|道|想|做|去|来|看|听)"
-        )
+        # 正则在模块级预编译，实例属性保留以兼容旧代码
+        self.time_pattern = _TIME_RE
+        self.ref_pattern = _REF_RE
+        self.character_pattern = _CHAR_RE
 
     def parse_chapter(self, chapter_path: str) -> tuple[list[Entity], list[Relation]]:
         """解析单个章节，返回实体和关系"""
@@ -74,33 +100,32 @@ class ChapterParser:
         entities.append(chapter_entity)
 
         # 提取时间标记
-        time_marks = self.time_pattern.findall(content)
-        if time_marks:
-            for i, time_str in enumerate(time_marks):
-                event_entity = Entity(
-                    name=f"event_ch{chapter_num:03d}_{i}",
-                    type="event",
-                    properties={
-                        "timestamp": time_str,
-                        "chapter": chapter_num,
-                        "description": f"时间点 {time_str}",
-                    },
-                )
-                entities.append(event_entity)
-
-                # 章节包含事件
-                relations.append(
-                    Relation(
-                        source=chapter_entity.name,
-                        predicate="contains_event",
-                        target=event_entity.name,
-                        properties={"chapter": chapter_num},
-                    )
+        for i, match in enumerate(_TIME_RE.finditer(content)):
+            time_str = match.group(1)
+            event_entity = Entity(
+                name=f"event_ch{chapter_num:03d}_{i}",
+                type="event",
+                properties={
+                    "timestamp": time_str,
+                    "chapter": chapter_num,
+                    "description": f"时间点 {time_str}",
+                },
+            )
+            entities.append(event_entity)
+
+            # 章节包含事件
+            relations.append(
+                Relation(
+                    source=chapter_entity.name,
+                    predicate="contains_event",
+                    target=event_entity.name,
+                    properties={"chapter": chapter_num},
                 )
+            )
 
         # 提取引用标记（伏笔）
-        refs = self.ref_pattern.findall(content)
-        for ref_id in refs:
+        for match in _REF_RE.finditer(content):
+            ref_id = match.group(1)
             foreshadow_entity = Entity(
                 name=f"foreshadow_{ref_id}",
                 type="foreshadow",
@@ -140,25 +165,26 @@ class ChapterParser:
 
     def _extract_chapter_number(self, path: str) -> int:
         """从文件路径提取章节号"""
-        match = re.search(r"ch(\d+)", path)
+        match = _CHAPTER_NUM_RE.search(path)
         if match:
             return int(match.group(1))
         return 0
 
     def _extract_title(self, content: str) -> str:
         """提取章节标题（第一行）"""
-        lines = content.strip().split("\n")
-        if lines:
-            title = lines[0].strip("#").strip()
-            return title[:100]  # 限制长度
-        return ""
+        # 只切出第一行，避免对整章内容 split
+        first_line = content.lstrip().partition("\n")[0]
+        title = first_line.strip("#").strip()
+        return title[:100]  # 限制长度
 
     def _extract_characters(self, content: str) -> set[str]:
         """提取角色名（简单模式匹配）"""
-        matches = self.character_pattern.findall(content)
         # 过滤常见词
-        stopwords = {"他", "她", "我", "你", "我们", "他们", "那", "这"}
-        return {name for name in matches if name not in stopwords and len(name) >= 2}
+        return {
+            name
+            for name in (m.group(1) for m in _CHAR_RE.finditer(content))
+            if name not in _STOPWORDS and len(name) >= 2
+        }
 
 
 class GraphBuilder:
@@ -168,125 +194,339 @@ class GraphBuilder:
         self.db_path = db_path
         self.config = config or NervusCLIConfig()
         self.parser = ChapterParser()
+        # 按（查询种类, 标签/关系类型）缓存批量 Cypher 文本，同类写入复用同一字符串
+        self._query_cache: dict[tuple[str, str], str] = {}
 
     def ingest_chapter(self, chapter_path: str) -> dict[str, Any]:
         """摄取单个章节到图数据库"""
         entities, relations = self.parser.parse_chapter(chapter_path)
+        return self._write_elements(entities, relations)
 
+    def _write_elements(self, entities: list[Entity], relations: list[Relation]) -> dict[str, Any]:
+        """批量写入实体和关系，返回统计信息"""
         stats: dict[str, Any] = {
             "entities_created": 0,
             "relations_created": 0,
             "errors": [],
         }
 
-        # 创建实体（节点）
+        # 按类型 / 谓词分组，每组一次 UNWIND 批量写入，减少 CLI 往返
+        nodes_by_type: defaultdict[str, list[Entity]] = defaultdict(list)
         for entity in entities:
+            nodes_by_type[entity.type].append(entity)
+        edges_by_predicate: defaultdict[str, list[Relation]] = defaultdict(list)
+        for relation in relations:
+            edges_by_predicate[relation.predicate].append(relation)
+
+        # 创建实体（节点）
+        for type_, node_group in nodes_by_type.items():
             try:
-                self._create_node(entity)
-                stats["entities_created"] += 1
+                self._create_nodes_bulk(type_, node_group)
+                stats["entities_created"] += len(node_group)
             except Exception as e:
-                stats["errors"].append(f"创建节点失败 {entity.name}: {e}")
+                stats["errors"].append(f"批量创建节点失败 {type_}（{len(node_group)} 个）: {e}")
 
         # 创建关系（边）
-        for relation in relations:
+        for predicate, edge_group in edges_by_predicate.items():
             try:
-                self._create_edge(relation)
-                stats["relations_created"] += 1
+                self._create_edges_bulk(predicate, edge_group)
+                stats["relations_created"] += len(edge_group)
             except Exception as e:
-                stats["errors"].append(f"创建关系失败 {relation.source}->{relation.target}: {e}")
+                stats["errors"].append(f"批量创建关系失败 {predicate}（{len(edge_group)} 个）: {e}")
 
         return stats
 
-    def ingest_directory(self, chapters_dir: str) -> dict[str, Any]:
-        """批量摄取目录下所有章节"""
+    def ingest_directory(
+        self,
+        chapters_dir: str,
+        *,
+        manifest_path: str | Path | None = None,
+        force: bool = False,
+    ) -> dict[str, Any]:
+        """批量摄取目录下所有章节
+
+        提供 manifest_path 时按内容哈希增量摄取：未变化的章节直接跳过，
+        修改或删除的章节先清理旧子图；force=True 时不跳过未变化章节，全部清理后重新摄取。
+        解析在当前进程内顺序进行（每章不到 1 ms，远小于经 nervus CLI 写入的耗时），
+        解析结果按批次合并写入。
+        """
         chapters = sorted(Path(chapters_dir).glob("ch*.md"))
         total_stats: dict[str, Any] = {
             "chapters_processed": 0,
+            "chapters_skipped": 0,
+            "chapters_removed": 0,
             "entities_created": 0,
             "relations_created": 0,
             "errors": [],
         }
 
+        # force 时同样读取清单：只跳过"摘要未变化"的捷径，修改/删除的章节仍需清理旧子图。
+        # 清单以章节文件名为键，与 chapters_dir 的写法（相对/绝对路径）无关
+        old_hashes: dict[str, str] = {}
+        if manifest_path is not None:
+            old_hashes = _load_manifest(manifest_path)
+        new_hashes: dict[str, str] = {}
+
+        chapter_number = self.parser._extract_chapter_number
+        pending: list[tuple[Path, str, str]] = []
+        # 需要先清理旧子图的章节号 -> 对应的清单键（修改、未完成或已删除的章节）
+        stale: dict[int, list[str]] = {}
+        # 未变化而跳过的章节号：其子图仍然有效，任何情况下都不清理
+        kept: set[int] = set()
         for chapter_path in chapters:
-            print(f"正在处理: {chapter_path.name}")
-            stats = self.ingest_chapter(str(chapter_path))
-
-            total_stats["chapters_processed"] += 1
-            total_stats["entities_created"] += stats["entities_created"]
-            total_stats["relations_created"] += stats["relations_created"]
-            total_stats["errors"].extend(stats["errors"])
+            key = chapter_path.name
+            digest = _file_digest(chapter_path) if manifest_path is not None else ""
+            old_digest = old_hashes.pop(key, None)
+            if old_digest == digest and not force:
+                new_hashes[key] = digest
+                kept.add(chapter_number(key))
+                total_stats["chapters_skipped"] += 1
+                continue
+
+            if old_digest is not None:
+                stale.setdefault(chapter_number(key), []).append(key)
+            pending.append((chapter_path, key, digest))
+
+        # 清单中剩余的条目对应已删除（或改名）的章节
+        removed = old_hashes
+        for key in removed:
+            stale.setdefault(chapter_number(key), []).append(key)
+
+        if manifest_path is not None and pending:
+            # 预写清单：先把待写入章节标记为未完成，写图中途失败或进程退出时，
+            # 下次运行会先清理这些章节的残留子图再重新摄取（章节删除时同样会被清理）
+            journal = {**new_hashes, **removed}
+            journal.update((key, _DIRTY_DIGEST) for _, key, _ in pending)
+            _write_manifest(manifest_path, journal)
+
+        # 先清理旧子图再写入：按章节号删除，写入后再删会误删同章节号的新数据
+        failed: set[int] = set()
+        for chapter_num, keys in stale.items():
+            if chapter_num in kept:
+                continue
+            try:
+                self._delete_chapter(chapter_num)
+            except Exception as e:
+                failed.add(chapter_num)
+                total_stats["errors"].append(f"清理章节失败 {', '.join(keys)}: {e}")
+
+        for key, digest in removed.items():
+            if chapter_number(key) in failed:
+                # 旧子图仍在，保留清单条目，下次运行再清理
+                new_hashes[key] = digest
+            else:
+                total_stats["chapters_removed"] += 1
+
+        # 每 _WRITE_BATCH_CHAPTERS 章合并写入一次
+        batch: list[tuple[str, str]] = []
+        batch_entities: list[Entity] = []
+        batch_relations: list[Relation] = []
+        for chapter_path, key, digest in pending:
+            print(f"正在处理: {key}")
+            entities, relations = self.parser.parse_chapter(str(chapter_path))
+            # 旧子图未清理干净：保持未完成标记，下次运行再清理
+            batch.append((key, _DIRTY_DIGEST if chapter_number(key) in failed else digest))
+            batch_entities.extend(entities)
+            batch_relations.extend(relations)
+            if len(batch) >= _WRITE_BATCH_CHAPTERS:
+                self._flush_batch(batch, batch_entities, batch_relations, total_stats, new_hashes)
+                batch, batch_entities, batch_relations = [], [], []
+        if batch:
+            self._flush_batch(batch, batch_entities, batch_relations, total_stats, new_hashes)
+
+        if manifest_path is not None:
+            _write_manifest(manifest_path, new_hashes)
 
         return total_stats
 
-    def _create_node(self, entity: Entity) -> None:
-        """创建节点（使用 Cypher）"""
-        # 构建属性字符串
-        props_str = ", ".join(
-            f"{k}: ${k}" for k in entity.properties if entity.properties[k] is not None
-        )
-
-        query = f"""
-        MERGE (n:{entity.type} {{name: $name}})
-        SET n += {{{props_str}}}
-        RETURN n
-        """
-
-        params = {"name": entity.name, **entity.properties}
-
+    def _flush_batch(
+        self,
+        batch: list[tuple[str, str]],
+        entities: list[Entity],
+        relations: list[Relation],
+        total_stats: dict[str, Any],
+        new_hashes: dict[str, str],
+    ) -> None:
+        """写入一批章节的解析结果并累加统计"""
+        stats = self._write_elements(entities, relations)
+
+        total_stats["chapters_processed"] += len(batch)
+        total_stats["entities_created"] += stats["entities_created"]
+        total_stats["relations_created"] += stats["relations_created"]
+        total_stats["errors"].extend(stats["errors"])
+        # 有错误时记为未完成，下次运行会清理残留并重试这批章节
+        if stats["errors"]:
+            new_hashes.update((key, _DIRTY_DIGEST) for key, _ in batch)
+        else:
+            new_hashes.update(batch)
+
+    def _delete_chapter(self, chapter_num: int) -> None:
+        """删除章节节点及其事件节点（角色、伏笔可能被其他章节共享，予以保留）"""
         cypher_query(
             db_path=self.db_path,
-            query=query,
-            params=params,
+            query="MATCH (e:event {chapter: $chapter}) DETACH DELETE e",
+            params={"chapter": chapter_num},
             readonly=False,
             config=self.config,
         )
-
-    def _create_edge(self, relation: Relation) -> None:
-        """创建关系（边）"""
-        props_str = ", ".join(
-            f"{k}: ${k}" for k in relation.properties if relation.properties[k] is not None
-        )
-
-        query = f"""
-        MATCH (a {{name: $source}}), (b {{name: $target}})
-        MERGE (a)-[r:{relation.predicate}]->(b)
-        SET r += {{{props_str}}}
-        RETURN r
-        """
-
-        params = {
-            "source": relation.source,
-            "target": relation.target,
-            **relation.properties,
-        }
-
         cypher_query(
             db_path=self.db_path,
-            query=query,
-            params=params,
+            query="MATCH (c:chapter {name: $name}) DETACH DELETE c",
+            params={"name": f"ch{chapter_num:03d}"},
             readonly=False,
             config=self.config,
         )
 
+    def _cached_query(self, kind: str, label: str) -> str:
+        """返回缓存的批量 Cypher 文本；标签 / 关系类型需为合法标识符"""
+        cache_key = (kind, label)
+        query = self._query_cache.get(cache_key)
+        if query is not None:
+            return query
+
+        if not _IDENTIFIER_RE.fullmatch(label):
+            raise ValueError(f"非法的 Cypher 标识符: {label!r}")
+
+        if kind == "nodes_bulk":
+            query = f"""
+        UNWIND $rows AS row
+        MERGE (n:{label} {{name: row.name}})
+        SET n += row.props
+        """
+        else:
+            query = f"""
+        UNWIND $rows AS row
+        MATCH (a {{name: row.source}}), (b {{name: row.target}})
+        MERGE (a)-[r:{label}]->(b)
+        SET r += row.props
+        """
+
+        self._query_cache[cache_key] = query
+        return query
+
+    def _create_nodes_bulk(self, type_: str, entities: list[Entity]) -> None:
+        """批量创建同类型节点（UNWIND 单次查询）"""
+        rows = [
+            {
+                "name": entity.name,
+                "props": {k: v for k, v in entity.properties.items() if v is not None},
+            }
+            for entity in entities
+        ]
+
+        self._run_bulk(self._cached_query("nodes_bulk", type_), rows)
+
+    def _create_edges_bulk(self, predicate: str, relations: list[Relation]) -> None:
+        """批量创建同谓词关系（UNWIND 单次查询）"""
+        rows = [
+            {
+                "source": relation.source,
+                "target": relation.target,
+                "props": {k: v for k, v in relation.properties.items() if v is not None},
+            }
+            for relation in relations
+        ]
+
+        self._run_bulk(self._cached_query("edges_bulk", predicate), rows)
+
+    def _run_bulk(self, query: str, rows: list[dict[str, Any]]) -> None:
+        """按序列化大小分块执行 UNWIND 查询
+
+        参数以单个命令行参数传给 nervus CLI，Linux 限制单个参数不超过 128 KiB，
+        因此每块控制在 _MAX_PARAMS_BYTES 以内。
+        """
+        for chunk in _chunk_rows(rows, _MAX_PARAMS_BYTES):
+            cypher_query(
+                db_path=self.db_path,
+                query=query,
+                params={"rows": chunk},
+                readonly=False,
+                config=self.config,
+            )
+
     def clear_graph(self) -> None:
         """清空图数据库（危险操作！）"""
         query = "MATCH (n) DETACH DELETE n"
         cypher_query(db_path=self.db_path, query=query, readonly=False, config=self.config)
 
 
-def build_graph_from_chapters(chapters_dir: str, db_path: str) -> dict[str, Any]:
-    """一键构建图数据库（主入口）"""
+def _chunk_rows(rows: list[dict[str, Any]], max_bytes: int) -> Iterator[list[dict[str, Any]]]:
+    """将行切分为序列化后不超过 max_bytes 的块（单行超限时独占一块）"""
+    chunk: list[dict[str, Any]] = []
+    size = 2  # 列表的方括号
+    for row in rows:
+        row_size = len(json.dumps(row, ensure_ascii=False).encode("utf-8")) + 2  # 分隔符 ", "
+        if chunk and size + row_size > max_bytes:
+            yield chunk
+            chunk, size = [], 2
+        chunk.append(row)
+        size += row_size
+    if chunk:
+        yield chunk
+
+
+def graph_manifest_path(db_path: str) -> Path:
+    """返回与图数据库并列存放的章节哈希清单路径"""
+    return Path(f"{db_path}{_MANIFEST_SUFFIX}")
+
+
+def _file_digest(path: Path) -> str:
+    """章节内容摘要，仅用于变更检测（优先 xxh3，缺失时回退 sha256）"""
+    data = path.read_bytes()
+    if xxhash is not None:
+        return xxhash.xxh3_64_hexdigest(data)
+    return hashlib.sha256(data).hexdigest()
+
+
+def _load_manifest(path: str | Path) -> dict[str, str]:
+    """读取哈希清单，文件缺失或损坏时返回空字典（触发全量摄取）"""
+    try:
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if not isinstance(data, dict):
+        return {}
+    hashes: dict[str, str] = {}
+    for k, v in data.items():
+        # 兼容旧版以完整路径为键的清单；同名条目摘要不一致时记为未完成
+        name = Path(str(k)).name
+        digest = str(v)
+        hashes[name] = digest if hashes.get(name, digest) == digest else _DIRTY_DIGEST
+    return hashes
+
+
+def _write_manifest(path: str | Path, hashes: dict[str, str]) -> None:
+    """原子写入哈希清单"""
+    target = Path(path)
+    target.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = target.with_name(target.name + ".tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(hashes, f, ensure_ascii=False, indent=2, sort_keys=True)
+    os.replace(tmp_path, target)
+
+
+def build_graph_from_chapters(
+    chapters_dir: str, db_path: str, *, force: bool = False
+) -> dict[str, Any]:
+    """一键构建图数据库（主入口）
+
+    默认按章节哈希清单增量更新，force=True 时全量重新摄取。
+    """
     builder = GraphBuilder(db_path)
 
     # 清空旧数据（可选）
     # builder.clear_graph()
 
     # 批量摄取
-    stats = builder.ingest_directory(chapters_dir)
+    stats = builder.ingest_directory(
+        chapters_dir, manifest_path=graph_manifest_path(db_path), force=force
+    )
 
     print("\n" + "=" * 50)
     print("📊 图构建完成！")
     print(f"处理章节: {stats['chapters_processed']}")
+    print(f"跳过未变化章节: {stats['chapters_skipped']}")
     print(f"创建实体: {stats['entities_created']}")
     print(f"创建关系: {stats['relations_created']}")
     if stats["errors"]:
@@ -304,4 +544,5 @@ __all__ = [
     "ChapterParser",
     "GraphBuilder",
     "build_graph_from_chapters",
+    "graph_manifest_path",
 ]
@@ -23,6 +23,7 @@ class LongTermMemory:
         """
         self.db_path = Path(db_path)
         self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._fts_enabled = False
         self._init_db()
 
     def _init_db(self) -> None:
@@ -56,6 +57,51 @@ class LongTermMemory:
                 CREATE INDEX IF NOT EXISTS idx_session ON conversation_summaries(session_id);
                 """
             )
+            self._fts_enabled = self._init_fts(conn)
+
+    def _init_fts(self, conn: sqlite3.Connection) -> bool:
+        """初始化 key/value 的全文索引（FTS5 trigram）
+
+        trigram 分词按 3 字符切分，可对中文做子串匹配，语义与 LIKE '%q%' 一致，
+        但无需逐行扫描。通过触发器与 memories 表保持同步。
+
+        Returns:
+            是否启用全文索引（SQLite 不支持 FTS5/trigram 时返回 False，回退 LIKE）
+        """
+        try:
+            exists = conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'memories_fts'"
+            ).fetchone()
+            conn.executescript(
+                """
+                CREATE VIRTUAL TABLE IF NOT EXISTS memories_fts USING fts5(
+                    key, value, content='memories', content_rowid='id', tokenize='trigram'
+                );
+
+                CREATE TRIGGER IF NOT EXISTS memories_fts_ai AFTER INSERT ON memories BEGIN
+                    INSERT INTO memories_fts(rowid, key, value)
+                    VALUES (new.id, new.key, new.value);
+                END;
+
+                CREATE TRIGGER IF NOT EXISTS memories_fts_ad AFTER DELETE ON memories BEGIN
+                    INSERT INTO memories_fts(memories_fts, rowid, key, value)
+                    VALUES ('delete', old.id, old.key, old.value);
+                END;
+
+                CREATE TRIGGER IF NOT EXISTS memories_fts_au AFTER UPDATE ON memories BEGIN
+                    INSERT INTO memories_fts(memories_fts, rowid, key, value)
+                    VALUES ('delete', old.id, old.key, old.value);
+                    INSERT INTO memories_fts(rowid, key, value)
+                    VALUES (new.id, new.key, new.value);
+                END;
+                """
+            )
+            if not exists:
+                # 旧数据库：为已有记忆补建索引
+                conn.execute("INSERT INTO memories_fts(memories_fts) VALUES ('rebuild')")
+            return True
+        except sqlite3.OperationalError:
+            return False
 
     def save(
         self, category: str, key: str, value: Any, metadata: dict[str, Any] | None = None
@@ -221,29 +267,32 @@ class LongTermMemory:
         Returns:
             匹配的记忆列表
         """
+        # trigram 索引只能匹配 >= 3 个字符的查询，更短的查询回退到 LIKE 扫描
+        if self._fts_enabled and len(query) >= 3:
+            match_clause = "id IN (SELECT rowid FROM memories_fts WHERE memories_fts MATCH ?)"
+            # 作为短语查询（双引号转义），避免 FTS5 语法字符被解释
+            match_params: tuple[Any, ...] = ('"' + query.replace('"', '""') + '"',)
+        else:
+            match_clause = "(key LIKE ? OR value LIKE ?)"
+            match_params = (f"%{query}%", f"%{query}%")
+
+        where = match_clause
+        params = match_params
+        if category:
+            where = f"category = ? AND {match_clause}"
+            params = (category, *match_params)
+
         with sqlite3.connect(self.db_path) as conn:
-            if category:
-                cursor = conn.execute(
-                    """
-                    SELECT category, key, value, metadata, created_at, updated_at
-                    FROM memories
-                    WHERE category = ? AND (key LIKE ? OR value LIKE ?)
-                    ORDER BY updated_at DESC
-                    LIMIT ?
-                    """,
-                    (category, f"%{query}%", f"%{query}%", limit),
-                )
-            else:
-                cursor = conn.execute(
-                    """
-                    SELECT category, key, value, metadata, created_at, updated_at
-                    FROM memories
-                    WHERE key LIKE ? OR value LIKE ?
-                    ORDER BY updated_at DESC
-                    LIMIT ?
-                    """,
-                    (f"%{query}%", f"%{query}%", limit),
-                )
+            cursor = conn.execute(
+                f"""
+                SELECT category, key, value, metadata, created_at, updated_at
+                FROM memories
+                WHERE {where}
+                ORDER BY updated_at DESC
+                LIMIT ?
+                """,
+                (*params, limit),
+            )
 
             results = []
             for row in cursor.fetchall():
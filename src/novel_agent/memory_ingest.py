@@ -7,14 +7,26 @@ from typing import Any
 from . import nervus_cli
 
 
+def count_index_items(index: dict[str, Any]) -> dict[str, int]:
+    """Tally what ``ingest_from_index`` would write, without building any queries."""
+    chapters = index.get("chapters", [])
+    return {
+        "characters": len(index.get("characters", [])),
+        "chapters": len(chapters),
+        "events": sum(len(chapter.get("time_markers", [])) for chapter in chapters),
+        "references": sum(len(chapter.get("references", [])) for chapter in chapters),
+    }
+
+
 def ingest_from_index(
     index: dict[str, Any], db_path: str, *, dry_run: bool = False
 ) -> dict[str, int]:
+    if dry_run:
+        return count_index_items(index)
+
     stats = {"characters": 0, "chapters": 0, "events": 0, "references": 0}
 
     def run(query: str, params: dict[str, Any]) -> None:
-        if dry_run:
-            return
         nervus_cli.cypher_query(
             db_path,
             query,
@@ -84,4 +96,4 @@ def ingest_from_index(
     return stats
 
 
-__all__ = ["ingest_from_index"]
+__all__ = ["count_index_items", "ingest_from_index"]
@@ -3,7 +3,7 @@
 通过 LLM 总结会话历史，创建新会话并注入摘要，节省 context 和 token
 """
 
-import uuid
+import secrets
 from typing import Any
 
 from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, SystemMessage
@@ -11,7 +11,7 @@ from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, System
 
 def generate_session_id() -> str:
     """生成新的会话 ID"""
-    return f"session-{uuid.uuid4().hex[:12]}"
+    return f"session-{secrets.token_hex(6)}"
 
 
 def count_message_tokens(messages: list[BaseMessage]) -> int:
@@ -25,14 +25,22 @@ def open_checkpointer(db_path: Path | None = None) -> Iterator[SqliteSaver]:
 
 
 def list_sessions(db_path: Path | None = None) -> list[str]:
+    return list(iter_sessions(db_path))
+
+
+def iter_sessions(db_path: Path | None = None, limit: int | None = None) -> Iterator[str]:
+    """Yield session ids (most recent first) straight from the cursor.
+
+    ``limit`` is applied in SQL, so SQLite stops after that many threads.
+    """
     path = Path(db_path or DEFAULT_SESSION_DB)
     if not path.exists():
-        return []
+        return
     try:
         conn = sqlite3.connect(path)
     except sqlite3.Error:
-        return []
-    with conn:
+        return
+    try:
         conn.executescript(
             """
             CREATE TABLE IF NOT EXISTS checkpoints (
@@ -47,10 +55,16 @@ def list_sessions(db_path: Path | None = None) -> list[str]:
             );
             """
         )
-        rows = conn.execute(
+        cursor = conn.execute(
             "SELECT thread_id FROM checkpoints GROUP BY thread_id ORDER BY MAX(rowid) DESC"
-        ).fetchall()
-    return [row[0] for row in rows if row and row[0]]
+            " LIMIT ?",
+            (-1 if limit is None else limit,),
+        )
+        for row in cursor:
+            if row and row[0]:
+                yield row[0]
+    finally:
+        conn.close()
 
 
 def delete_session(thread_id: str, db_path: Path | None = None) -> None:
@@ -92,5 +106,6 @@ __all__ = [
     "DEFAULT_SESSION_DB",
     "open_checkpointer",
     "list_sessions",
+    "iter_sessions",
     "delete_session",
 ]
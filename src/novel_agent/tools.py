@@ -8,7 +8,6 @@
 5. verify_strict_references - 引用完整性验证
 """
 
-import json
 import os
 import re
 import subprocess
@@ -20,6 +19,7 @@ import frontmatter  # type: ignore
 from langchain_core.tools import tool as lc_tool
 
 from . import nervus_cli
+from .continuity import read_continuity_index
 from .logging_config import get_logger
 from .tools_creative import dialogue_enhancer, plot_twist_generator, scene_transition
 
@@ -187,8 +187,7 @@ def _load_continuity_index(path: Path | None = None) -> dict[str, Any]:
         raise FileNotFoundError(
             f"连续性索引 {target} 不存在。请先运行 `poetry run novel-agent refresh-memory`。"
         )
-    result: dict[str, Any] = json.loads(target.read_text(encoding="utf-8"))
-    return result
+    return read_continuity_index(target)
 
 
 def _get_nervus_db_path(explicit: str | None = None) -> str | None:
@@ -789,6 +788,7 @@ def smart_context_search_tool(
     search_type: str = "all",
     max_hops: int = 2,
     limit: int = 10,
+    db_path: str | None = None,
 ) -> str:
     """智能上下文搜索（基于图数据库）
 
@@ -799,6 +799,7 @@ def smart_context_search_tool(
         search_type: 'character' | 'location' | 'event' | 'foreshadow' | 'all'
         max_hops: 最大关系跳数（1-3，默认 2）
         limit: 最多返回结果数（默认 10）
+        db_path: 图数据库路径（留空则读取 NOVEL_GRAPH_DB 环境变量）
 
     Returns:
         格式化的搜索结果，包含：
@@ -827,10 +828,10 @@ def smart_context_search_tool(
     logger.info(f"图查询: {query}, 类型={search_type}, 跳数={max_hops}")
 
     try:
-        db_path = os.getenv("NOVEL_GRAPH_DB", "data/novel-graph.nervusdb")
+        resolved_db = db_path or os.environ.get("NOVEL_GRAPH_DB") or "data/novel-graph.nervusdb"
         result = smart_context_search(
             query=query,
-            db_path=db_path,
+            db_path=resolved_db,
             search_type=search_type,  # type: ignore
             max_hops=max_hops,
             limit=limit,
@@ -859,7 +860,10 @@ def smart_context_search_tool(
         return f"❌ 图查询失败: {e}\n提示：请先运行 'novel-agent build-graph' 构建图数据库"
 
 
-def build_character_network_tool(character_names: str | None = None) -> str:
+def build_character_network_tool(
+    character_names: str | None = None,
+    db_path: str | None = None,
+) -> str:
     """构建角色关系网络图
 
     分析角色之间的关系，构建社交网络图。
@@ -867,6 +871,7 @@ def build_character_network_tool(character_names: str | None = None) -> str:
     Args:
         character_names: 角色名列表（逗号分隔，如"张三,李四,王五"）
                         留空则分析所有角色
+        db_path: 图数据库路径（留空则读取 NOVEL_GRAPH_DB 环境变量）
 
     Returns:
         格式化的网络信息：
@@ -893,14 +898,14 @@ def build_character_network_tool(character_names: str | None = None) -> str:
     logger.info(f"构建角色网络: {character_names or '所有角色'}")
 
     try:
-        db_path = os.getenv("NOVEL_GRAPH_DB", "data/novel-graph.nervusdb")
+        resolved_db = db_path or os.environ.get("NOVEL_GRAPH_DB") or "data/novel-graph.nervusdb"
         names_list = (
             [n.strip() for n in character_names.split(",") if n.strip()]
             if character_names
             else None
         )
 
-        result = build_character_network(db_path=db_path, character_names=names_list)
+        result = build_character_network(db_path=resolved_db, character_names=names_list)
 
         # 格式化输出
         output = ["角色网络分析结果：", ""]
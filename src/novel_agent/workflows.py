@@ -9,7 +9,7 @@ from typing import Any, TypedDict
 from langchain_core.messages import AIMessage
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.runnables import Runnable
-from langgraph.graph import END, StateGraph
+from langgraph.graph import END, START, StateGraph
 
 from . import nervus_cli
 from .continuity import build_continuity_index
@@ -163,9 +163,12 @@ def build_chapter_workflow(
 
     builder.add_node("verify", verify_node)
 
-    builder.set_entry_point("gather")
+    # verify 只检查已有章节的连续性索引，不依赖草稿：与 gather → draft 的 LLM 调用
+    # 并行执行（同一步中的节点由 LangGraph 并发运行），两条分支写入的状态键互不重叠
+    builder.add_edge(START, "gather")
     builder.add_edge("gather", "draft")
-    builder.add_edge("draft", "verify")
+    builder.add_edge("draft", END)
+    builder.add_edge(START, "verify")
     builder.add_edge("verify", END)
 
     return builder.compile()
@@ -0,0 +1,21 @@
+"""测试公共配置"""
+
+from collections.abc import Iterator
+from pathlib import Path
+
+import pytest
+
+
+@pytest.fixture
+def isolated_cwd(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Iterator[None]:
+    """在临时目录中运行测试
+
+    check、chat 默认在当前目录写入 .cache/（响应缓存）和 .novel-agent/（会话存储），
+    不隔离时测试会污染仓库目录，并通过全局缓存管理器在测试之间复用检查结果。
+    调用这些命令的测试模块通过 pytestmark 使用
+    """
+    from novel_agent import cache
+
+    monkeypatch.chdir(tmp_path)
+    yield
+    cache.disable_cache()
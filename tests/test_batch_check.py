@@ -5,17 +5,21 @@ from pathlib import Path
 from typing import Any
 from unittest.mock import MagicMock, patch
 
+import pytest
 from typer.testing import CliRunner
 
 from novel_agent.cli import app
 
 runner = CliRunner()
 
+# check / chat 会在当前目录写入 .cache/ 和 .novel-agent/
+pytestmark = pytest.mark.usefixtures("isolated_cwd")
+
 
 class TestBatchCheck:
     """测试批量检查功能"""
 
-    @patch("novel_agent.cli.create_novel_agent")
+    @patch("novel_agent.agent.create_novel_agent")
     def test_batch_check_multiple_files(self, mock_create_agent: MagicMock) -> None:
         """测试批量检查多个文件
 
@@ -58,7 +62,7 @@ class TestBatchCheck:
             assert "通过: 2" in result.stdout
             assert "警告: 1" in result.stdout or "错误:" in result.stdout
 
-    @patch("novel_agent.cli.create_novel_agent")
+    @patch("novel_agent.agent.create_novel_agent")
     def test_batch_check_json_output(self, mock_create_agent: MagicMock) -> None:
         """测试批量检查的 JSON 输出格式
 
@@ -102,7 +106,7 @@ class TestBatchCheck:
             assert "results" in output
             assert output["total_files"] == 2
 
-    @patch("novel_agent.cli.create_novel_agent")
+    @patch("novel_agent.agent.create_novel_agent")
     def test_batch_check_parallel(self, mock_create_agent: MagicMock) -> None:
         """测试并行批量检查
 
@@ -137,7 +141,7 @@ class TestBatchCheck:
             # 验证 agent 被调用了 5 次
             assert mock_agent.invoke.call_count == 5
 
-    @patch("novel_agent.cli.create_novel_agent")
+    @patch("novel_agent.agent.create_novel_agent")
     def test_batch_check_auto_fix(self, mock_create_agent: MagicMock) -> None:
         """测试自动修复参数
 
@@ -169,7 +173,7 @@ class TestBatchCheck:
             prompt = call_args[0][0]["messages"][0][1]
             assert "修复" in prompt
 
-    @patch("novel_agent.cli.create_novel_agent")
+    @patch("novel_agent.agent.create_novel_agent")
     def test_batch_check_no_files_found(self, mock_create_agent: MagicMock) -> None:
         """测试找不到匹配文件的情况
 
@@ -190,7 +194,7 @@ class TestBatchCheck:
             # 验证错误信息
             assert "没有找到匹配的文件" in result.stdout
 
-    @patch("novel_agent.cli.create_novel_agent")
+    @patch("novel_agent.agent.create_novel_agent")
     def test_single_file_backward_compatibility(self, mock_create_agent: MagicMock) -> None:
         """测试单文件模式的向后兼容性
 
@@ -221,7 +225,7 @@ class TestBatchCheck:
             assert "汇总报告" not in result.stdout
             assert "一致性检查" in result.stdout
 
-    @patch("novel_agent.cli.create_novel_agent")
+    @patch("novel_agent.agent.create_novel_agent")
     def test_batch_check_with_errors(self, mock_create_agent: MagicMock) -> None:
         """测试批量检查时发现错误的情况
 
@@ -0,0 +1,39 @@
+"""缓存模块测试"""
+
+from pathlib import Path
+
+from langchain_core.messages import AIMessage
+from langchain_core.outputs import ChatGeneration
+
+from novel_agent.cache import CacheManager, DiskLLMCache
+
+
+class TestDiskLLMCache:
+    """测试磁盘 LLM 缓存"""
+
+    def test_lookup_survives_new_instance(self, tmp_path: Path) -> None:
+        """写入的生成结果可被新的缓存实例（模拟下一次命令）读取"""
+        generations = [ChatGeneration(message=AIMessage(content="通过"))]
+        DiskLLMCache(tmp_path).update("检查第1章", "gemini", generations)
+
+        cache = DiskLLMCache(tmp_path)
+        assert cache.lookup("检查第1章", "gemini") == generations
+        assert cache.lookup("检查第1章", "other-model") is None
+
+        cache.clear()
+        assert cache.lookup("检查第1章", "gemini") is None
+
+
+class TestCacheManager:
+    """测试缓存管理器"""
+
+    def test_clear_includes_llm_cache(self, tmp_path: Path) -> None:
+        """清空所有缓存时也清空上次命令写入的 LLM 磁盘缓存"""
+        generations = [ChatGeneration(message=AIMessage(content="通过"))]
+        previous = DiskLLMCache(tmp_path / "llm")
+        previous.update("检查第1章", "gemini", generations)
+        previous.close()
+
+        CacheManager(str(tmp_path)).clear()
+
+        assert DiskLLMCache(tmp_path / "llm").lookup("检查第1章", "gemini") is None
@@ -1,14 +1,23 @@
 """Tests for novel_agent.cli"""
 
+import json
+import os
+import subprocess
+import sys
 from pathlib import Path
 from unittest.mock import Mock, patch
 
+import pytest
+from rich.text import Text
 from typer.testing import CliRunner
 
-from novel_agent.cli import app
+from novel_agent.cli import _AGENT_TYPES, _dumps, _LazyAgent, app
 
 runner = CliRunner()
 
+# check / chat 会在当前目录写入 .cache/ 和 .novel-agent/
+pytestmark = pytest.mark.usefixtures("isolated_cwd")
+
 
 class TestChatCommand:
     """测试 chat 命令"""
@@ -16,7 +25,7 @@ class TestChatCommand:
     def test_chat_missing_api_key(self) -> None:
         """测试缺少API key时的错误处理"""
         with patch.dict("os.environ", {}, clear=True):
-            with patch("novel_agent.cli.create_specialized_agent") as mock_create:
+            with patch("novel_agent.agent.create_specialized_agent") as mock_create:
                 mock_create.side_effect = ValueError("未找到 Gemini API Key")
 
                 result = runner.invoke(app, ["chat"], input="exit\n")
@@ -27,7 +36,7 @@ class TestChatCommand:
 
     def test_chat_with_api_key(self) -> None:
         """测试使用API key启动chat"""
-        with patch("novel_agent.cli.create_specialized_agent") as mock_create:
+        with patch("novel_agent.agent.create_specialized_agent") as mock_create:
             mock_agent = Mock()
             mock_agent.invoke.return_value = {"messages": [Mock(content="你好！我是Agent。")]}
             mock_create.return_value = mock_agent
@@ -41,7 +50,7 @@ class TestChatCommand:
 
     def test_chat_with_custom_agent(self) -> None:
         """测试使用自定义Agent类型"""
-        with patch("novel_agent.cli.create_specialized_agent") as mock_create:
+        with patch("novel_agent.agent.create_specialized_agent") as mock_create:
             mock_agent = Mock()
             mock_agent.invoke.return_value = {"messages": [Mock(content="大纲已生成")]}
             mock_create.return_value = mock_agent
@@ -59,7 +68,7 @@ class TestChatCommand:
 
     def test_chat_exit_command(self) -> None:
         """测试exit命令"""
-        with patch("novel_agent.cli.create_specialized_agent") as mock_create:
+        with patch("novel_agent.agent.create_specialized_agent") as mock_create:
             mock_agent = Mock()
             mock_create.return_value = mock_agent
 
@@ -68,6 +77,277 @@ class TestChatCommand:
             # 应该优雅退出
             assert "再见" in result.stdout or result.exit_code in (0, 1)
 
+    def test_chat_piped_input_reads_stdin(self) -> None:
+        """测试管道输入时逐行读取 stdin，读到末尾即退出"""
+        with (
+            patch("novel_agent.agent.create_specialized_agent") as mock_create,
+            patch("prompt_toolkit.PromptSession") as mock_session,
+        ):
+            mock_agent = Mock()
+            mock_agent.stream.side_effect = lambda *args, **kwargs: iter(
+                [(Mock(type="AIMessageChunk", content="收到"), {})]
+            )
+            mock_create.return_value = mock_agent
+
+            result = runner.invoke(app, ["chat", "--api-key", "test-key"], input="第一句\n第二句\n")
+
+            assert result.exit_code == 0
+            assert mock_agent.stream.call_count == 2
+            first_input = mock_agent.stream.call_args_list[0].args[0]
+            assert first_input["messages"] == [("user", "第一句")]
+            mock_session.assert_not_called()
+
+    def test_chat_loop_prompt_session_is_lightweight(self) -> None:
+        """终端输入时创建的 PromptSession 不做输入时补全和 CPR 查询"""
+        from novel_agent.cli import _chat_loop
+
+        output = Mock(enable_cpr=True)
+        with (
+            patch("sys.stdin.isatty", return_value=True),
+            patch("prompt_toolkit.PromptSession") as mock_session,
+            patch("prompt_toolkit.output.create_output", return_value=output),
+            patch.dict("os.environ", {}, clear=False),
+        ):
+            os.environ.pop("PROMPT_TOOLKIT_NO_CPR", None)
+            mock_session.return_value.prompt.return_value = "exit"
+
+            _chat_loop(Mock(), "session-1")
+
+            kwargs = mock_session.call_args.kwargs
+            assert kwargs["complete_while_typing"] is False
+            assert kwargs["output"] is output
+            assert output.enable_cpr is False
+            # 不通过环境变量关闭 CPR，避免泄漏给子进程
+            assert "PROMPT_TOOLKIT_NO_CPR" not in os.environ
+
+
+class TestLazyAgent:
+    """测试延迟构建的 Agent 代理"""
+
+    def test_factory_deferred_until_attribute_access(self) -> None:
+        """首次访问属性前不调用工厂函数"""
+        factory = Mock(return_value=Mock(checkpointer="cp"))
+        lazy = _LazyAgent(factory)
+
+        factory.assert_not_called()
+        assert lazy.checkpointer == "cp"
+        assert lazy.checkpointer == "cp"
+        factory.assert_called_once()
+
+    def test_warm_up_error_reraised_on_get(self) -> None:
+        """后台构建失败时在 get() 中重新抛出"""
+        lazy = _LazyAgent(Mock(side_effect=ValueError("未找到 Gemini API Key")))
+        lazy.warm_up()
+
+        with pytest.raises(ValueError, match="API Key"):
+            lazy.get()
+
+
+def test_watcher_context_reports_failed_start_once() -> None:
+    """监控启动失败时只提示失败，不提示已启动"""
+    from concurrent.futures import Future
+
+    from novel_agent.cli import _watcher_context
+
+    future: Future[object] = Future()
+    with (
+        patch("novel_agent.cli._start_watcher_in_background", return_value=future),
+        patch("novel_agent.cli.console") as mock_console,
+    ):
+        with _watcher_context(True, Path(".")):
+            mock_console.print.assert_not_called()
+            future.set_exception(RuntimeError("inotify 不可用"))
+
+    messages = [str(c.args[0]) for c in mock_console.print.call_args_list]
+    assert not any("已启动" in m for m in messages)
+    assert sum("启动失败" in m for m in messages) == 1
+
+
+def test_watcher_context_reports_successful_start() -> None:
+    """监控启动完成后才提示已启动，退出时停止"""
+    from concurrent.futures import Future
+
+    from novel_agent.cli import _watcher_context
+
+    future: Future[object] = Future()
+    with (
+        patch("novel_agent.cli._start_watcher_in_background", return_value=future),
+        patch("novel_agent.cli.console") as mock_console,
+        patch("novel_agent.file_watcher.stop_background_watcher") as mock_stop,
+    ):
+        with _watcher_context(True, Path(".")):
+            mock_console.print.assert_not_called()
+            future.set_result(Mock())
+
+    messages = [str(c.args[0]) for c in mock_console.print.call_args_list]
+    assert any("已启动" in m for m in messages)
+    mock_stop.assert_called_once()
+
+
+def test_sigint_guard_restores_handler() -> None:
+    """Agent 调用期间安装 Ctrl-C 处理器，退出后恢复原处理器"""
+    import signal
+
+    from novel_agent.cli import _sigint_guard
+
+    previous = signal.getsignal(signal.SIGINT)
+    with pytest.raises(KeyboardInterrupt):
+        with _sigint_guard():
+            assert signal.getsignal(signal.SIGINT) is not previous
+            signal.raise_signal(signal.SIGINT)
+
+    assert signal.getsignal(signal.SIGINT) is previous
+
+
+def test_sigint_guard_second_interrupt_unwinds() -> None:
+    """第二次 Ctrl-C 抛出 SystemExit(130)，外层的清理代码照常执行"""
+    import signal
+
+    from novel_agent.cli import _sigint_guard
+
+    cleaned_up = []
+    with pytest.raises(SystemExit) as exc_info:
+        try:
+            with _sigint_guard():
+                try:
+                    signal.raise_signal(signal.SIGINT)
+                except KeyboardInterrupt:
+                    pass  # 模拟被吞掉的第一次中断
+                signal.raise_signal(signal.SIGINT)
+        finally:
+            cleaned_up.append(True)
+
+    assert exc_info.value.code == 130
+    assert cleaned_up == [True]
+
+
+def test_status_is_noop_when_not_terminal() -> None:
+    """输出不是终端时不启动加载动画"""
+    from contextlib import nullcontext
+
+    from novel_agent.cli import _status, console
+
+    with patch.object(type(console), "is_terminal", new=False):
+        assert isinstance(_status("正在思考..."), nullcontext)
+
+
+def test_status_uses_low_refresh_rate() -> None:
+    """终端中的加载动画以较低频率刷新"""
+    from novel_agent.cli import _STATUS_REFRESH_PER_SECOND, _status, console
+
+    with (
+        patch.object(type(console), "is_terminal", new=True),
+        patch.object(console, "status") as mock_status,
+    ):
+        _status("正在思考...")
+
+    mock_status.assert_called_once_with(
+        "正在思考...", refresh_per_second=_STATUS_REFRESH_PER_SECOND
+    )
+
+
+def test_long_reply_skips_markdown() -> None:
+    """超长回复按纯文本显示，不做 Markdown 渲染"""
+    from rich.markdown import Markdown
+
+    from novel_agent.cli import _MARKDOWN_MAX_CHARS, _reply_renderable
+
+    assert isinstance(_reply_renderable("# 标题"), Markdown)
+    assert isinstance(_reply_renderable("正文" * _MARKDOWN_MAX_CHARS), Text)
+
+
+def test_stream_agent_reply_shows_tokens() -> None:
+    """逐 token 显示 AI 回复，工具结果不显示，置信度按最后一段回复评估"""
+    from novel_agent.cli import _stream_agent_reply, console
+
+    mock_agent = Mock()
+    mock_agent.stream.return_value = iter(
+        [
+            (Mock(type="AIMessageChunk", content="让我先查一下。"), {}),
+            (Mock(type="tool", content="工具输出"), {}),
+            (Mock(type="AIMessageChunk", content="李明"), {}),
+            (Mock(type="AIMessageChunk", content="是主角。"), {}),
+        ]
+    )
+
+    with console.capture() as capture:
+        assert _stream_agent_reply(mock_agent, "主角是谁？", "thread-1") is True
+
+    output = capture.get()
+    assert "李明是主角。" in output
+    assert "工具输出" not in output
+    assert "置信度" in output
+    assert mock_agent.stream.call_args.kwargs["stream_mode"] == "messages"
+
+    mock_agent.stream.return_value = iter([])
+    with console.capture():
+        assert _stream_agent_reply(mock_agent, "你好", "thread-1") is False
+
+
+def test_stream_agent_reply_plain_skips_live() -> None:
+    """--plain 时即使在终端中也直接写出 token，不使用 Live/Markdown"""
+    from contextlib import nullcontext
+
+    from novel_agent.cli import _stream_agent_reply, console
+
+    def make_agent() -> Mock:
+        agent = Mock()
+        agent.stream.return_value = iter([(Mock(type="AIMessageChunk", content="**你好**"), {})])
+        return agent
+
+    with (
+        patch.object(type(console), "is_terminal", new=True),
+        patch("novel_agent.cli._status", return_value=nullcontext()),
+        patch("rich.live.Live") as mock_live,
+        console.capture() as capture,
+    ):
+        assert _stream_agent_reply(make_agent(), "hi", "thread-1", plain=True) is True
+        mock_live.assert_not_called()
+
+        _stream_agent_reply(make_agent(), "hi", "thread-1")
+        mock_live.assert_called_once()
+
+    assert "**你好**" in capture.get()
+
+
+def test_stream_agent_reply_renders_markdown_once() -> None:
+    """终端流式显示时逐 token 只刷新纯文本，Markdown 仅在结束时构造一次"""
+    from contextlib import nullcontext
+
+    from novel_agent.cli import _reply_renderable, _stream_agent_reply, console
+
+    agent = Mock()
+    agent.stream.return_value = iter(
+        [(Mock(type="AIMessageChunk", content=token), {}) for token in ("**李明**", "是", "主角")]
+    )
+
+    with (
+        patch.object(type(console), "is_terminal", new=True),
+        patch("novel_agent.cli._status", return_value=nullcontext()),
+        patch("novel_agent.cli._reply_renderable", wraps=_reply_renderable) as renderable,
+        console.capture(),
+    ):
+        assert _stream_agent_reply(agent, "主角是谁？", "thread-1") is True
+
+    renderable.assert_called_once_with("**李明**是主角")
+
+
+def test_dumps_keeps_non_ascii() -> None:
+    """JSON 输出保留中文且支持缩进"""
+    data = {"response": "通过", "confidence": 80}
+
+    assert json.loads(_dumps(data)) == data
+    assert "通过" in _dumps(data)
+    assert _dumps(data, indent=True).startswith('{\n  "response"')
+
+
+def test_error_json_constants_are_valid() -> None:
+    """预生成的错误 JSON 与序列化结果一致"""
+    from novel_agent.cli import _ERR_INTERRUPTED_JSON, _ERR_NO_RESPONSE_JSON
+
+    assert json.loads(_ERR_INTERRUPTED_JSON) == {"error": "Interrupted", "confidence": 0}
+    assert json.loads(_ERR_NO_RESPONSE_JSON) == {"error": "No response", "confidence": 0}
+
 
 class TestCheckCommand:
     """测试 check 命令"""
@@ -85,7 +365,7 @@ class TestCheckCommand:
         test_file = tmp_path / "test.md"
         test_file.write_text("# Test Chapter")
 
-        with patch("novel_agent.cli.create_novel_agent") as mock_create:
+        with patch("novel_agent.agent.create_novel_agent") as mock_create:
             mock_agent = Mock()
             mock_agent.invoke.return_value = {"messages": [Mock(content="✅ 未发现一致性问题")]}
             mock_create.return_value = mock_agent
@@ -101,7 +381,7 @@ class TestCheckCommand:
         test_file = tmp_path / "test.md"
         test_file.write_text("# Test")
 
-        with patch("novel_agent.cli.create_novel_agent") as mock_create:
+        with patch("novel_agent.agent.create_novel_agent") as mock_create:
             mock_agent = Mock()
             mock_agent.invoke.return_value = {"messages": [Mock(content="OK")]}
             mock_create.return_value = mock_agent
@@ -110,3 +390,209 @@ class TestCheckCommand:
 
             assert result.exit_code == 0
             mock_create.assert_called_once_with(api_key="test-key")
+
+    def test_check_file_task_uses_response_cache(self, tmp_path: Path) -> None:
+        """文件未修改时复用缓存结果，不再调用 Agent"""
+        from novel_agent.cache import CacheManager
+        from novel_agent.cli import _check_file_task
+
+        test_file = tmp_path / "ch001.md"
+        test_file.write_text("# 第一章")
+        cache_manager = CacheManager(str(tmp_path / ".cache"))
+        mock_agent = Mock()
+        mock_agent.invoke.return_value = {"messages": [Mock(content="Line 3: 时间线冲突")]}
+
+        first = _check_file_task(test_file, mock_agent, False, cache_manager)
+        second = _check_file_task(test_file, mock_agent, False, cache_manager)
+
+        assert first == second
+        assert first["status"] == "warning"
+        mock_agent.invoke.assert_called_once()
+
+        # 文件修改后缓存失效
+        test_file.write_text("# 第一章（修订）")
+        _check_file_task(test_file, mock_agent, False, cache_manager)
+        assert mock_agent.invoke.call_count == 2
+
+    def test_check_cache_invalidated_by_project_changes(self, tmp_path: Path) -> None:
+        """被检查文件未变，但设定或其他章节修改后不复用缓存结论"""
+        from novel_agent.cache import CacheManager
+        from novel_agent.cli import _check_file_task, _project_state
+
+        chapters_dir = tmp_path / "chapters"
+        chapters_dir.mkdir()
+        test_file = chapters_dir / "ch001.md"
+        test_file.write_text("# 第一章")
+        profile = tmp_path / "spec" / "knowledge" / "character-profiles.md"
+        profile.parent.mkdir(parents=True)
+        profile.write_text("## 李明\n内向")
+        cache_manager = CacheManager(str(tmp_path / ".cache"))
+        mock_agent = Mock()
+        mock_agent.invoke.return_value = {"messages": [Mock(content="✅ 未发现一致性问题")]}
+
+        state = _project_state(tmp_path)
+        _check_file_task(test_file, mock_agent, False, cache_manager, state)
+        _check_file_task(test_file, mock_agent, False, cache_manager, _project_state(tmp_path))
+        assert mock_agent.invoke.call_count == 1
+
+        # 就地修改设定文件
+        profile.write_text("## 李明\n外向")
+        os.utime(profile, (profile.stat().st_atime, profile.stat().st_mtime + 10))
+        assert _project_state(tmp_path) != state
+        _check_file_task(test_file, mock_agent, False, cache_manager, _project_state(tmp_path))
+        assert mock_agent.invoke.call_count == 2
+
+    def test_check_prompt_inlines_small_files(self, tmp_path: Path) -> None:
+        """小文件内容直接附在提示词中，大文件仍由 Agent 自行读取"""
+        from novel_agent.cli import _CHECK_INLINE_MAX_BYTES, _build_check_prompt
+
+        small = "# 第一章\n李明走进教室。".encode()
+        prompt = _build_check_prompt(tmp_path / "ch001.md", small, auto_fix=False)
+        assert "李明走进教室。" in prompt
+        assert "ch001.md" in prompt
+
+        large = b"a" * (_CHECK_INLINE_MAX_BYTES + 1)
+        prompt = _build_check_prompt(tmp_path / "ch002.md", large, auto_fix=False)
+        assert "<file>" not in prompt
+
+
+class TestMemoryCommand:
+    """测试 memory 命令"""
+
+    def test_memory_list_renders_table(self, tmp_path: Path) -> None:
+        """list 输出为一张包含键、值和更新时间的表格"""
+        from novel_agent.long_term_memory import LongTermMemory
+
+        store = LongTermMemory(str(tmp_path / "memory.db"))
+        store.save("project_info", "protagonist", "李明")
+        store.save("project_info", "setting", "现代都市")
+
+        with patch("novel_agent.long_term_memory.get_memory", return_value=store):
+            result = runner.invoke(app, ["memory", "list", "--category", "project_info"])
+
+        assert result.exit_code == 0
+        assert "更新时间" in result.stdout
+        assert "protagonist" in result.stdout
+        assert "现代都市" in result.stdout
+
+
+class TestSessionsCommand:
+    """测试 sessions 命令"""
+
+    def test_sessions_list_respects_limit(self) -> None:
+        """超过 --limit 时只列出最近的会话并提示"""
+        with patch(
+            "novel_agent.session_store.iter_sessions", return_value=iter(["s3", "s2", "s1"])
+        ) as mock_iter:
+            result = runner.invoke(app, ["sessions", "--list", "--limit", "2"])
+
+        assert result.exit_code == 0
+        mock_iter.assert_called_once_with(limit=3)
+        assert "s3" in result.stdout and "s2" in result.stdout
+        assert "s1" not in result.stdout
+        assert "--limit 0" in result.stdout
+
+
+class TestGraphQueryCommand:
+    """测试 graph-query 命令"""
+
+    def test_db_path_passed_without_env(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        """数据库路径显式传给工具，不写入 NOVEL_GRAPH_DB"""
+        monkeypatch.delenv("NOVEL_GRAPH_DB", raising=False)
+
+        with patch("novel_agent.tools.smart_context_search_tool", return_value="ok") as mock_tool:
+            result = runner.invoke(app, ["graph-query", "张三", "--db-path", "custom.db"])
+
+        assert result.exit_code == 0
+        assert mock_tool.call_args.kwargs["db_path"] == "custom.db"
+        assert "NOVEL_GRAPH_DB" not in os.environ
+
+
+class TestRunCommand:
+    """测试 run 命令"""
+
+    def test_run_passes_background_index(self, tmp_path: Path) -> None:
+        """后台构建的连续性索引传给 workflow"""
+        index_data = {"chapters": []}
+        workflow_graph = Mock()
+        workflow_graph.invoke.return_value = {"outline": "大纲", "draft": "草稿", "issues": ""}
+
+        with (
+            patch(
+                "novel_agent.cli.load_or_build_continuity_index", return_value=index_data
+            ) as mock_index,
+            patch("novel_agent.cli._gemini_model"),
+            patch(
+                "novel_agent.workflows.build_chapter_workflow", return_value=workflow_graph
+            ) as mock_build,
+        ):
+            result = runner.invoke(
+                app,
+                [
+                    "run",
+                    "chapter",
+                    "--prompt",
+                    "写第一章",
+                    "--api-key",
+                    "test-key",
+                    "--index",
+                    str(tmp_path / "index.json"),
+                ],
+            )
+
+        assert result.exit_code == 0
+        mock_index.assert_called_once()
+        assert mock_build.call_args.kwargs["continuity_index"] is index_data
+        assert "草稿" in result.stdout
+
+    def test_run_missing_api_key_skips_index(self) -> None:
+        """缺少 API Key 时在构建索引前退出"""
+        with (
+            patch.dict("os.environ", {}, clear=True),
+            patch("novel_agent.cli.load_or_build_continuity_index") as mock_index,
+        ):
+            result = runner.invoke(app, ["run", "chapter", "--prompt", "写第一章"])
+
+        assert result.exit_code == 1
+        assert "API Key" in result.stdout
+        mock_index.assert_not_called()
+
+    def test_gemini_model_reused_for_same_settings(self) -> None:
+        """相同模型参数只创建一次 Gemini 客户端"""
+        from novel_agent.cli import _gemini_model
+
+        _gemini_model.cache_clear()
+        try:
+            with patch("langchain_google_genai.ChatGoogleGenerativeAI") as mock_chat:
+                first = _gemini_model("gemini-2.0-flash-exp", "test-key", 0.6)
+                second = _gemini_model("gemini-2.0-flash-exp", "test-key", 0.6)
+                other = _gemini_model("gemini-2.0-flash-exp", "other-key", 0.6)
+
+            assert first is second
+            assert mock_chat.call_count == 2
+            assert other is not None
+        finally:
+            _gemini_model.cache_clear()
+
+
+class TestLazyImports:
+    """测试 CLI 模块的延迟导入"""
+
+    def test_import_cli_skips_langchain(self) -> None:
+        """导入 CLI 模块时不加载 LangChain / Gemini、watchdog 和 rich.markdown"""
+        code = (
+            "import sys, novel_agent.cli; "
+            "print(any(m in sys.modules for m in "
+            "('langchain_google_genai', 'novel_agent.agent', 'novel_agent.workflows', "
+            "'watchdog', 'rich.markdown')))"
+        )
+        result = subprocess.run(
+            [sys.executable, "-c", code], capture_output=True, text=True, check=True
+        )
+        assert result.stdout.strip() == "False"
+
+    def test_agent_types_match_configs(self) -> None:
+        """帮助信息中的 Agent 类型与 AGENT_CONFIGS 一致"""
+        from novel_agent.agent import AGENT_CONFIGS
+
+        assert set(_AGENT_TYPES) == set(AGENT_CONFIGS)
@@ -121,3 +121,16 @@ class TestConfidenceScoring:
 """
         score = _estimate_confidence([message])
         assert 45 <= score <= 65  # 中等质量：有结构、有建议、有文件引用
+
+    def test_same_content_scored_once(self) -> None:
+        """测试相同内容的评分结果被缓存复用"""
+        from novel_agent.agent import _score_content
+
+        _score_content.cache_clear()
+        first = MagicMock()
+        first.content = "建议参考 spec/knowledge/character-profiles.md 调整。"
+        second = MagicMock()
+        second.content = "建议参考 spec/knowledge/character-profiles.md 调整。"
+
+        assert _estimate_confidence([first]) == _estimate_confidence([second])
+        assert _score_content.cache_info().hits == 1
@@ -128,6 +128,50 @@ class TestContextIntegration:
         # 验证返回结果包含置信度
         assert "confidence" in result
 
+    @mock.patch("novel_agent.agent.create_react_agent")
+    @mock.patch("novel_agent.agent.ContextRetriever")
+    @mock.patch("novel_agent.agent.ChatGoogleGenerativeAI")
+    def test_stream_with_context_injection(
+        self,
+        mock_llm: mock.Mock,
+        mock_retriever_class: mock.Mock,
+        mock_create_agent: mock.Mock,
+        tmp_path: Path,
+    ) -> None:
+        """测试 stream 时同样自动注入上下文"""
+        mock_llm_instance = mock.Mock()
+        mock_llm_instance.bind.return_value = mock_llm_instance
+        mock_llm.return_value = mock_llm_instance
+
+        from novel_agent.context_retriever import Document
+
+        mock_retriever_instance = mock.Mock()
+        mock_retriever_instance.retrieve_context.return_value = [
+            Document(path="chapters/ch001.md", content="第一章内容", source="graph", confidence=0.9)
+        ]
+        mock_retriever_instance.format_context.return_value = "## 自动加载的相关文档\n第一章内容"
+        mock_retriever_class.return_value = mock_retriever_instance
+
+        mock_agent_instance = mock.Mock()
+        original_stream = mock_agent_instance.stream
+        original_stream.return_value = iter([])
+        mock_create_agent.return_value = mock_agent_instance
+
+        agent = create_specialized_agent(
+            agent_type="default",
+            model=mock_llm_instance,
+            enable_context_retrieval=True,
+            project_root=str(tmp_path),
+        )
+
+        list(
+            agent.stream({"messages": [HumanMessage(content="检查第1章")]}, stream_mode="messages")
+        )
+
+        sent = original_stream.call_args.args[0]["messages"]
+        assert sent[0].content == "## 自动加载的相关文档\n第一章内容"
+        assert original_stream.call_args.kwargs["stream_mode"] == "messages"
+
     @mock.patch("novel_agent.agent.create_react_agent")
     @mock.patch("novel_agent.agent.ContextRetriever")
     @mock.patch("novel_agent.agent.ChatGoogleGenerativeAI")
@@ -1,12 +1,25 @@
 """上下文检索器测试"""
 
+import io
 import json
+import os
+from dataclasses import replace
 from pathlib import Path
 from unittest import mock
 
+import pytest
+
 from novel_agent.context_retriever import ContextRetriever, Document
 
 
+def _rg_process(stdout: str) -> mock.MagicMock:
+    """模拟 ripgrep 进程，stdout 可逐行读取"""
+    proc = mock.MagicMock()
+    proc.__enter__.return_value = proc
+    proc.stdout = io.StringIO(stdout)
+    return proc
+
+
 class TestDocument:
     """测试 Document 数据类"""
 
@@ -157,6 +170,9 @@ class TestContextRetriever:
         assert ranked[1].path == "spec/knowledge/characters.md"
         assert ranked[2].path == "spec/outline.md"
 
+        # 只取前 N 个时与全量排序的前 N 个一致
+        assert retriever._rank_documents(docs, "test", limit=2) == ranked[:2]
+
     def test_load_document_content(self, tmp_path: Path) -> None:
         """测试加载文档内容"""
         # 创建测试文档
@@ -246,8 +262,9 @@ class TestContextRetriever:
         assert "第一章内容" in context_text
         assert "角色设定" in context_text
 
+    @mock.patch("novel_agent.context_retriever._IN_PROCESS_SEARCH_MAX_FILES", 0)
     @mock.patch("novel_agent.context_retriever.GraphQuerier")
-    @mock.patch("novel_agent.context_retriever.subprocess.run")
+    @mock.patch("novel_agent.context_retriever.subprocess.Popen")
     def test_retrieve_context_integration(
         self, mock_subprocess: mock.Mock, mock_graph: mock.Mock, tmp_path: Path
     ) -> None:
@@ -265,18 +282,19 @@ class TestContextRetriever:
         }
         mock_graph.return_value = mock_graph_instance
 
-        # Mock grep
-        mock_result = mock.Mock()
-        mock_result.stdout = json.dumps(
-            {
-                "type": "match",
-                "data": {
-                    "path": {"text": str(tmp_path / "chapters" / "ch002.md")},
-                    "lines": {"text": "李四出现了"},
+        # Mock grep（与 ripgrep 一样输出紧凑 JSON）
+        mock_subprocess.return_value = _rg_process(
+            json.dumps(
+                {
+                    "type": "match",
+                    "data": {
+                        "path": {"text": str(tmp_path / "chapters" / "ch002.md")},
+                        "lines": {"text": "李四出现了"},
+                    },
                 },
-            }
+                separators=(",", ":"),
+            )
         )
-        mock_subprocess.return_value = mock_result
 
         # 创建测试文档
         chapters_dir = tmp_path / "chapters"
@@ -298,3 +316,275 @@ class TestContextRetriever:
         # 验证结果
         assert len(docs) >= 1
         assert any("ch001.md" in doc.path or "ch002.md" in doc.path for doc in docs)
+
+    @mock.patch("novel_agent.context_retriever.subprocess.Popen")
+    def test_grep_search_in_process(self, mock_subprocess: mock.Mock, tmp_path: Path) -> None:
+        """小项目在进程内搜索，不启动 ripgrep"""
+        chapters_dir = tmp_path / "chapters"
+        chapters_dir.mkdir()
+        (chapters_dir / "ch001.md").write_text("# 第一章\n\nAlice 走进了酒馆", encoding="utf-8")
+        (chapters_dir / "ch002.md").write_text("# 第二章\n\n无人出现", encoding="utf-8")
+
+        retriever = ContextRetriever(project_root=tmp_path)
+        docs = retriever._grep_search("alice")
+
+        assert [doc.path for doc in docs] == ["chapters/ch001.md"]
+        assert docs[0].context == "Alice 走进了酒馆"
+        mock_subprocess.assert_not_called()
+
+    @mock.patch("novel_agent.context_retriever.subprocess.Popen")
+    def test_grep_search_large_corpus_uses_ripgrep(
+        self, mock_subprocess: mock.Mock, tmp_path: Path
+    ) -> None:
+        """文件数超过上限时交给 ripgrep"""
+        chapters_dir = tmp_path / "chapters"
+        chapters_dir.mkdir()
+        (chapters_dir / "ch001.md").write_text("张三", encoding="utf-8")
+        mock_subprocess.return_value = _rg_process("")
+
+        retriever = ContextRetriever(project_root=tmp_path)
+        with mock.patch("novel_agent.context_retriever._IN_PROCESS_SEARCH_MAX_FILES", 0):
+            assert retriever._grep_search("张三") == []
+
+        mock_subprocess.assert_called_once()
+
+    @mock.patch("novel_agent.context_retriever._IN_PROCESS_SEARCH_MAX_FILES", 0)
+    @mock.patch("novel_agent.context_retriever.subprocess.Popen")
+    def test_grep_search_ripgrep_args(self, mock_subprocess: mock.Mock, tmp_path: Path) -> None:
+        """ripgrep 默认按字面量搜索 Markdown，literal=False 时按正则搜索"""
+        (tmp_path / "chapters").mkdir()
+        (tmp_path / "chapters" / "ch001.md").write_text("张三", encoding="utf-8")
+        mock_subprocess.return_value = _rg_process("")
+        retriever = ContextRetriever(project_root=tmp_path)
+
+        retriever._grep_search("张三")
+        cmd = mock_subprocess.call_args.args[0]
+        assert "-F" in cmd
+        assert "--type=md" in cmd
+        assert "--no-messages" in cmd
+
+        retriever._grep_search("张.", literal=False)
+        assert "-F" not in mock_subprocess.call_args.args[0]
+
+    def test_grep_search_in_process_regex(self, tmp_path: Path) -> None:
+        """进程内搜索同样区分字面量与正则"""
+        chapters_dir = tmp_path / "chapters"
+        chapters_dir.mkdir()
+        (chapters_dir / "ch001.md").write_text("张三来了", encoding="utf-8")
+
+        retriever = ContextRetriever(project_root=tmp_path)
+
+        assert retriever._grep_search("张.") == []
+        assert len(retriever._grep_search("张.", literal=False)) == 1
+
+    def test_extract_entities_tracks_index_reload(self, tmp_path: Path) -> None:
+        """重新加载索引后实体匹配随之更新，同名的角色和地点都能识别"""
+        index_path = tmp_path / "data" / "continuity" / "index.json"
+        index_path.parent.mkdir(parents=True)
+        index_path.write_text(
+            json.dumps({"characters": [{"name": "张三"}], "locations": []}, ensure_ascii=False)
+        )
+        retriever = ContextRetriever(project_root=tmp_path)
+        assert retriever._extract_entities("长安的张三") == [("character", "张三")]
+
+        index_path.write_text(
+            json.dumps(
+                {"characters": [{"name": "长安"}], "locations": [{"name": "长安"}]},
+                ensure_ascii=False,
+            )
+        )
+        retriever._load_index()
+
+        assert retriever._extract_entities("长安的张三") == [
+            ("character", "长安"),
+            ("location", "长安"),
+        ]
+
+    @mock.patch("novel_agent.context_retriever._IN_PROCESS_SEARCH_MAX_FILES", 0)
+    @mock.patch("novel_agent.context_retriever.subprocess.Popen")
+    def test_grep_search_parses_only_match_events(
+        self, mock_subprocess: mock.Mock, tmp_path: Path
+    ) -> None:
+        """只解析 match 事件，其余记录和损坏的行被跳过"""
+        chapters_dir = tmp_path / "chapters"
+        chapters_dir.mkdir()
+        (chapters_dir / "ch001.md").write_text("张三", encoding="utf-8")
+        path_text = str(chapters_dir / "ch001.md")
+
+        events = [
+            {"type": "begin", "data": {"path": {"text": path_text}}},
+            {"type": "match", "data": {"path": {"text": path_text}, "lines": {"text": "张三\n"}}},
+            {"type": "end", "data": {"path": {"text": path_text}}},
+            {"type": "summary", "data": {}},
+        ]
+        lines = [json.dumps(event, separators=(",", ":")) for event in events]
+        lines.insert(2, '{"type":"match",broken')
+        mock_subprocess.return_value = _rg_process("\n".join(lines))
+
+        retriever = ContextRetriever(project_root=tmp_path)
+        docs = retriever._grep_search("张三")
+
+        assert [(doc.path, doc.context) for doc in docs] == [("chapters/ch001.md", "张三")]
+
+    @mock.patch("novel_agent.context_retriever._IN_PROCESS_SEARCH_MAX_FILES", 0)
+    @mock.patch("novel_agent.context_retriever.subprocess.Popen")
+    def test_grep_search_stops_after_max_files(
+        self, mock_subprocess: mock.Mock, tmp_path: Path
+    ) -> None:
+        """收集到足够的文件后停止读取并结束 ripgrep"""
+        chapters_dir = tmp_path / "chapters"
+        chapters_dir.mkdir()
+        (chapters_dir / "ch001.md").write_text("张三", encoding="utf-8")
+
+        lines = [
+            json.dumps(
+                {
+                    "type": "match",
+                    "data": {
+                        "path": {"text": str(chapters_dir / f"ch{i:03d}.md")},
+                        "lines": {"text": "张三"},
+                    },
+                },
+                separators=(",", ":"),
+            )
+            for i in range(1, 6)
+        ]
+        proc = _rg_process("\n".join(lines))
+        mock_subprocess.return_value = proc
+
+        retriever = ContextRetriever(project_root=tmp_path)
+        docs = retriever._grep_search("张三", max_files=2)
+
+        assert [doc.path for doc in docs] == ["chapters/ch001.md", "chapters/ch002.md"]
+        assert proc.stdout.readline()  # 剩余输出未被读取
+        proc.terminate.assert_called_once()
+
+    def test_retrieve_context_cache(self, tmp_path: Path) -> None:
+        """相同查询命中缓存，文档修改后缓存失效"""
+        chapters_dir = tmp_path / "chapters"
+        chapters_dir.mkdir()
+        chapter = chapters_dir / "ch001.md"
+        chapter.write_text("张三登场", encoding="utf-8")
+
+        retriever = ContextRetriever(project_root=tmp_path)
+        first = retriever.retrieve_context("张三")
+        first[0].content = "被调用方修改"
+
+        with mock.patch.object(retriever, "_grep_search") as mock_grep:
+            second = retriever.retrieve_context("张三")
+            mock_grep.assert_not_called()
+        assert second[0].content == "张三登场"
+
+        chapter.write_text("张三离场", encoding="utf-8")
+        os.utime(chapter, (chapter.stat().st_atime, chapter.stat().st_mtime + 10))
+
+        assert retriever.retrieve_context("张三")[0].content == "张三离场"
+
+    def test_retrieve_context_cache_tracks_nested_documents(self, tmp_path: Path) -> None:
+        """子目录中文档的新增和就地修改（含 spec/）都使缓存失效"""
+        chapters_dir = tmp_path / "chapters"
+        volume_dir = chapters_dir / "vol2"
+        volume_dir.mkdir(parents=True)
+        (chapters_dir / "ch001.md").write_text("张三登场", encoding="utf-8")
+
+        retriever = ContextRetriever(project_root=tmp_path)
+        assert len(retriever.retrieve_context("张三")) == 1
+
+        (volume_dir / "ch101.md").write_text("张三归来", encoding="utf-8")
+        os.utime(volume_dir, (volume_dir.stat().st_atime, volume_dir.stat().st_mtime + 10))
+        assert len(retriever.retrieve_context("张三")) == 2
+
+        knowledge_dir = tmp_path / "spec" / "knowledge"
+        knowledge_dir.mkdir(parents=True)
+        profile = knowledge_dir / "characters.md"
+        profile.write_text("张三：剑客", encoding="utf-8")
+        assert retriever.retrieve_context("张三")
+        # 就地修改不改变目录 mtime
+        profile.write_text("张三：刀客", encoding="utf-8")
+        os.utime(profile, (profile.stat().st_atime, profile.stat().st_mtime + 20))
+        contents = [doc.content for doc in retriever.retrieve_context("张三")]
+        assert "张三：刀客" in contents
+
+    def test_warmup_content_cache(self, tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+        """设置 NOVEL_ENABLE_WARMUP 后预先读入最近章节，文件修改后重新读取"""
+        chapters_dir = tmp_path / "chapters"
+        chapters_dir.mkdir()
+        for i in range(1, 4):
+            chapter = chapters_dir / f"ch{i:03d}.md"
+            chapter.write_text(f"第{i}章", encoding="utf-8")
+            os.utime(chapter, (i, i))
+
+        assert ContextRetriever(project_root=tmp_path)._content_cache == {}
+
+        monkeypatch.setenv("NOVEL_ENABLE_WARMUP", "1")
+        assert len(ContextRetriever(project_root=tmp_path)._content_cache) == 3
+
+        retriever = ContextRetriever(project_root=tmp_path, warmup_count=2)
+        assert set(retriever._content_cache) == {"chapters/ch002.md", "chapters/ch003.md"}
+
+        (chapters_dir / "ch003.md").write_text("改写后的第3章", encoding="utf-8")
+        assert retriever._load_document_content("chapters/ch003.md") == "改写后的第3章"
+
+    def test_query_by_graph_concurrent(self, tmp_path: Path) -> None:
+        """多个实体并发查询，结果按实体顺序返回，单个失败不影响其他实体"""
+        retriever = ContextRetriever(project_root=tmp_path)
+
+        def fake_search(query: str, **_: object) -> dict[str, object]:
+            if query == "王五":
+                raise RuntimeError("boom")
+            chapter = {"张三": 1, "李四": 2}[query]
+            return {"results": [{"metadata": {"chapter": chapter}, "confidence": 0.9}]}
+
+        retriever.graph_querier = mock.Mock()
+        retriever.graph_querier.smart_context_search.side_effect = fake_search
+
+        docs = retriever._query_by_graph(
+            [("character", "张三"), ("character", "王五"), ("character", "李四")]
+        )
+
+        assert [doc.path for doc in docs] == ["chapters/ch001.md", "chapters/ch002.md"]
+        assert retriever.graph_querier.smart_context_search.call_count == 3
+
+    def test_limit_documents_reads_only_budget(self, tmp_path: Path) -> None:
+        """超出预算的长文档只读取预算内的前缀，截断结果与整篇读取一致"""
+        chapters_dir = tmp_path / "chapters"
+        chapters_dir.mkdir()
+        (chapters_dir / "ch001.md").write_text("长" * 1000, encoding="utf-8")
+
+        retriever = ContextRetriever(project_root=tmp_path)
+        docs = [Document(path="chapters/ch001.md", content="", source="grep", confidence=0.8)]
+
+        with mock.patch.object(
+            retriever, "_load_document_content", wraps=retriever._load_document_content
+        ) as mock_load:
+            limited = retriever._limit_documents(docs, max_docs=1, max_tokens=100)
+
+        mock_load.assert_called_once_with("chapters/ch001.md", max_chars=151)
+        assert limited[0].content == "长" * 150 + "\n\n... (已截断)"
+        assert "chapters/ch001.md" not in retriever._content_cache
+
+    def test_document_precomputes_priority_fields(self) -> None:
+        """路径相关的排序依据在构造时算好，复制后保持一致"""
+        doc = Document(path="Spec/Knowledge/人物.md", content="", source="grep", confidence=0.8)
+        assert doc.path_lower == "spec/knowledge/人物.md"
+        assert doc.prio_bucket == 0.0
+
+        doc = Document(path="spec/knowledge/人物.md", content="", source="grep", confidence=0.8)
+        assert doc.prio_bucket == 0.8
+        assert replace(doc, content="x").prio_bucket == 0.8
+
+    def test_extract_entities_max_entities(self, tmp_path: Path) -> None:
+        """提取到 max_entities 个实体后停止"""
+        retriever = ContextRetriever(project_root=tmp_path)
+        retriever.index = {
+            "characters": [{"name": "张三"}, {"name": "李四"}],
+            "locations": [{"name": "长安"}],
+        }
+        retriever._build_entity_matcher()
+
+        query = "张三和李四在长安，第3章"
+        assert len(retriever._extract_entities(query)) == 4
+        assert retriever._extract_entities(query, max_entities=2) == [
+            ("character", "张三"),
+            ("character", "李四"),
+        ]
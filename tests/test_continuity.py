@@ -1,6 +1,9 @@
 """Tests for the continuity index builder."""
 
+import os
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
+from unittest import mock
 
 from novel_agent import continuity
 
@@ -19,3 +22,149 @@ def test_build_continuity_index(tmp_path: Path) -> None:
 
     references = {ref["id"] for ref in data["references"]}
     assert "childhood-trauma" in references
+
+
+def test_load_or_build_reuses_fresh_index(tmp_path: Path) -> None:
+    chapters_dir = tmp_path / "chapters"
+    chapters_dir.mkdir()
+    chapter = chapters_dir / "ch001.md"
+    chapter.write_text("# 第一章\n开头", encoding="utf-8")
+    output_path = tmp_path / "data" / "index.json"
+
+    first = continuity.load_or_build_continuity_index(tmp_path, output_path=output_path)
+    cached = continuity.load_or_build_continuity_index(
+        tmp_path, output_path=output_path, refresh=False
+    )
+    assert cached == first
+
+    # a chapter edited after the index was written makes it stale
+    chapter.write_text("# 第一章（修订）\n开头", encoding="utf-8")
+    mtime = output_path.stat().st_mtime + 10
+    os.utime(chapter, (mtime, mtime))
+    rebuilt = continuity.load_or_build_continuity_index(
+        tmp_path, output_path=output_path, refresh=False
+    )
+    assert rebuilt["chapters"][0]["title"] == "第一章（修订）"
+
+    # restoring an older copy (older mtime) also invalidates the index
+    chapter.write_text("# 第一章\n开头", encoding="utf-8")
+    os.utime(chapter, (mtime - 100, mtime - 100))
+    restored = continuity.load_or_build_continuity_index(
+        tmp_path, output_path=output_path, refresh=False
+    )
+    assert restored["chapters"][0]["title"] == "第一章"
+
+
+def test_index_file_round_trip(tmp_path: Path) -> None:
+    chapters_dir = tmp_path / "chapters"
+    chapters_dir.mkdir()
+    (chapters_dir / "ch001.md").write_text("# 第一章\n开头", encoding="utf-8")
+    output_path = tmp_path / "index.json"
+
+    data = continuity.build_continuity_index(tmp_path, output_path=output_path)
+
+    assert "第一章" in output_path.read_text(encoding="utf-8")
+    assert continuity.read_continuity_index(output_path) == data
+
+
+def test_extract_markers_single_pass() -> None:
+    lines = [
+        "# 第一章",
+        "[TIME:清晨] 李明醒来 [REF:dream]",
+        "普通段落",
+        "[REF:a] 与 [REF:b]",
+    ]
+    markers, refs = continuity._extract_markers(lines)
+
+    assert markers == [{"value": "清晨", "context": "李明醒来 [REF:dream]", "line": 2}]
+    assert [(ref["id"], ref["line"]) for ref in refs] == [("dream", 2), ("a", 4), ("b", 4)]
+
+
+def test_character_profiles_reparsed_only_on_change(tmp_path: Path) -> None:
+    profiles = tmp_path / "spec" / "knowledge" / "character-profiles.md"
+    profiles.parent.mkdir(parents=True)
+    profiles.write_text("## 主角：李明\n- **年龄**：25\n", encoding="utf-8")
+    os.utime(profiles, (1, 1))
+
+    first = continuity._load_character_profiles(tmp_path)
+    first[0]["attributes"]["年龄"] = "改动"
+    assert continuity._load_character_profiles(tmp_path)[0]["attributes"] == {"年龄": "25"}
+
+    profiles.write_text("## 主角：王芳\n", encoding="utf-8")
+    os.utime(profiles, (2, 2))
+    assert [p["name"] for p in continuity._load_character_profiles(tmp_path)] == ["王芳"]
+
+
+def test_incremental_update_matches_full_rebuild(tmp_path: Path) -> None:
+    chapters_dir = tmp_path / "chapters"
+    chapters_dir.mkdir()
+    profiles = tmp_path / "spec" / "knowledge" / "character-profiles.md"
+    profiles.parent.mkdir(parents=True)
+    profiles.write_text("## 主角：李明\n## 配角：王芳\n", encoding="utf-8")
+    for i in (1, 2, 3):
+        (chapters_dir / f"ch00{i}.md").write_text(
+            f"# 第{i}章\n李明出场 [REF:ref-{i}]", encoding="utf-8"
+        )
+    output_path = tmp_path / "data" / "index.json"
+    continuity.build_continuity_index(tmp_path, output_path=output_path)
+    assert (tmp_path / "data" / "index.manifest.json").exists()
+
+    (chapters_dir / "ch002.md").write_text("# 第二章\n王芳出场 [REF:ref-x]", encoding="utf-8")
+    (chapters_dir / "ch003.md").unlink()
+    (chapters_dir / "ch004.md").write_text("# 第四章\n[TIME:黄昏] 李明离开", encoding="utf-8")
+    changed = [chapters_dir / name for name in ("ch002.md", "ch003.md", "ch004.md")]
+
+    with mock.patch.object(
+        continuity, "_chapter_entry", wraps=continuity._chapter_entry
+    ) as mock_parse:
+        updated = continuity.build_continuity_index(
+            tmp_path, output_path=output_path, changed_files=changed
+        )
+    assert mock_parse.call_count == 2  # ch001 was not re-parsed
+
+    full = continuity.build_continuity_index(tmp_path)
+    for data in (updated, full):
+        data.pop("generated_at")
+    assert updated == full
+    assert continuity.read_continuity_index(output_path)["chapters"] == full["chapters"]
+
+
+def test_incremental_update_falls_back_without_manifest(tmp_path: Path) -> None:
+    chapters_dir = tmp_path / "chapters"
+    chapters_dir.mkdir()
+    chapter = chapters_dir / "ch001.md"
+    chapter.write_text("# 第一章\n开头", encoding="utf-8")
+    output_path = tmp_path / "index.json"
+    continuity.build_continuity_index(tmp_path, output_path=output_path)
+    (tmp_path / "index.manifest.json").unlink()
+
+    (chapters_dir / "ch002.md").write_text("# 第二章\n后续", encoding="utf-8")
+    data = continuity.build_continuity_index(
+        tmp_path, output_path=output_path, changed_files=[chapter]
+    )
+
+    # the unreported ch002 is picked up because the whole project was rebuilt
+    assert [c["chapter_id"] for c in data["chapters"]] == ["ch001", "ch002"]
+    assert (tmp_path / "index.manifest.json").exists()
+
+
+def test_concurrent_builds_never_share_a_temp_file(tmp_path: Path) -> None:
+    chapters_dir = tmp_path / "chapters"
+    chapters_dir.mkdir()
+    (chapters_dir / "ch001.md").write_text("# 第一章\n开头", encoding="utf-8")
+    output_path = tmp_path / "index.json"
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        list(
+            executor.map(
+                lambda _: continuity.build_continuity_index(tmp_path, output_path=output_path),
+                range(8),
+            )
+        )
+
+    assert continuity.read_continuity_index(output_path)["chapters"][0]["title"] == "第一章"
+    assert sorted(p.name for p in tmp_path.iterdir()) == [
+        "chapters",
+        "index.json",
+        "index.manifest.json",
+    ]
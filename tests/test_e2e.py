@@ -15,10 +15,12 @@ from novel_agent.cli import app
 runner = CliRunner()
 
 
+# check 会在当前目录写入 .cache/
+@pytest.mark.usefixtures("isolated_cwd")
 class TestE2ECheckCommand:
     """测试端到端check命令流程（核心功能）"""
 
-    @patch("novel_agent.cli.create_novel_agent")
+    @patch("novel_agent.agent.create_novel_agent")
     def test_check_command_e2e(self, mock_create_agent: MagicMock) -> None:
         """测试check命令的完整端到端流程
 
@@ -55,7 +57,7 @@ class TestE2ECheckCommand:
             assert mock_create_agent.called
             assert mock_agent.invoke.called
 
-    @patch("novel_agent.cli.create_novel_agent")
+    @patch("novel_agent.agent.create_novel_agent")
     def test_check_command_with_issues(self, mock_create_agent: MagicMock) -> None:
         """测试check命令发现问题的场景
 
@@ -14,6 +14,9 @@ import pytest
 from novel_agent.logging_config import get_logger, setup_logging
 from novel_agent.tools import read_file, search_content, write_chapter
 
+# check / chat 会在当前目录写入 .cache/ 和 .novel-agent/
+pytestmark = pytest.mark.usefixtures("isolated_cwd")
+
 
 class TestLoggingConfig:
     """测试日志配置"""
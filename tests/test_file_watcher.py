@@ -1,5 +1,6 @@
 """文件监控模块测试"""
 
+import enum
 import time
 from pathlib import Path
 from unittest import mock
@@ -13,6 +14,14 @@ from novel_agent.file_watcher import (
 )
 
 
+class _Change(enum.IntEnum):
+    """与 watchfiles.Change 相同的变更类型"""
+
+    added = 1
+    modified = 2
+    deleted = 3
+
+
 class TestNovelFileHandler:
     """测试文件事件处理器"""
 
@@ -50,7 +59,9 @@ class TestNovelFileHandler:
 
         # 验证索引更新被调用
         assert mock_build.called
-        mock_build.assert_called_once_with(tmp_path, output_path=index_path)
+        mock_build.assert_called_once_with(
+            tmp_path, output_path=index_path, changed_files=[str(test_file)]
+        )
 
     def test_ignore_non_md_files(self, tmp_path: Path) -> None:
         """测试忽略非 .md 文件"""
@@ -110,6 +121,44 @@ class TestNovelFileHandler:
         # 应该只调用一次
         assert mock_build.call_count == 1
 
+    @mock.patch("novel_agent.file_watcher.build_continuity_index")
+    def test_coalesce_event_bursts(self, mock_build: mock.Mock, tmp_path: Path) -> None:
+        """测试合并事件：删除+创建+修改视为修改，创建后又删除的文件被丢弃"""
+        handler = NovelFileHandler(
+            project_root=tmp_path,
+            index_path=tmp_path / "index.json",
+            debounce_seconds=0.1,
+        )
+
+        saved = str(tmp_path / "ch001.md")
+        for event_type in ("deleted", "created", "modified"):
+            handler._handle_file_change(saved, event_type)
+        scratch = str(tmp_path / "ch002.md")
+        handler._handle_file_change(scratch, "created")
+        handler._handle_file_change(scratch, "deleted")
+
+        time.sleep(0.3)
+
+        mock_build.assert_called_once_with(
+            tmp_path, output_path=tmp_path / "index.json", changed_files=[saved]
+        )
+        handler.stop()
+
+    @mock.patch("novel_agent.file_watcher.build_continuity_index")
+    def test_stop_flushes_pending(self, mock_build: mock.Mock, tmp_path: Path) -> None:
+        """测试停止时刷新尚未到期的变更"""
+        handler = NovelFileHandler(
+            project_root=tmp_path,
+            index_path=tmp_path / "index.json",
+            debounce_seconds=10,
+        )
+
+        handler._handle_file_change(str(tmp_path / "ch001.md"), "modified")
+        handler.stop()
+
+        assert mock_build.call_count == 1
+        assert handler._worker is None
+
     @mock.patch("novel_agent.file_watcher.build_continuity_index")
     def test_on_update_callback(self, mock_build: mock.Mock, tmp_path: Path) -> None:
         """测试更新回调"""
@@ -181,10 +230,11 @@ class TestFileWatcher:
         assert thread.is_alive()
         assert watcher.is_running()
 
-        # 停止监控
+        # 停止监控：线程应随停止信号立即退出
         watcher.stop()
-        time.sleep(0.1)
+        thread.join(timeout=1)
 
+        assert not thread.is_alive()
         assert not watcher.is_running()
 
     @mock.patch("novel_agent.file_watcher.build_continuity_index")
@@ -221,6 +271,33 @@ class TestFileWatcher:
         # 停止监控
         watcher.stop()
 
+    @mock.patch("novel_agent.file_watcher.build_continuity_index")
+    def test_watchfiles_backend(self, mock_build: mock.Mock, tmp_path: Path) -> None:
+        """测试 watchfiles 后端：每批变更直接更新索引"""
+        chapters_dir = tmp_path / "chapters"
+        chapters_dir.mkdir()
+        chapter = str(chapters_dir / "ch001.md")
+
+        def fake_watch(*paths: Path, **kwargs: object):  # type: ignore[no-untyped-def]
+            assert paths == (chapters_dir,)
+            yield {(_Change.modified, chapter)}
+            kwargs["stop_event"].wait(1)  # type: ignore[attr-defined]
+
+        fake_module = mock.Mock(watch=fake_watch)
+        index_path = tmp_path / "index.json"
+        watcher = FileWatcher(project_root=tmp_path, index_path=index_path)
+
+        with mock.patch("novel_agent.file_watcher.watchfiles", fake_module):
+            watcher.start_daemon()
+            time.sleep(0.1)
+            assert watcher.is_running()
+            watcher.stop()
+
+        assert not watcher.is_running()
+        mock_build.assert_called_once_with(
+            tmp_path, output_path=index_path, changed_files=[chapter]
+        )
+
 
 class TestGlobalWatcher:
     """测试全局单例"""
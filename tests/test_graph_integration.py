@@ -1,8 +1,11 @@
 """图数据库集成测试"""
 
+import json
 from pathlib import Path
 from unittest import mock
 
+import pytest
+
 from novel_agent.graph_ingest import ChapterParser, Entity, GraphBuilder, Relation
 from novel_agent.graph_query import GraphQuerier
 
@@ -84,24 +87,22 @@ class TestGraphBuilder:
     """测试图构建器"""
 
     @mock.patch("novel_agent.graph_ingest.cypher_query")
-    def test_create_node(self, mock_cypher: mock.Mock) -> None:
-        """测试创建节点"""
+    def test_create_nodes_bulk(self, mock_cypher: mock.Mock) -> None:
+        """测试批量创建节点"""
         mock_cypher.return_value = {"rows": []}
 
         builder = GraphBuilder("test.nervusdb")
-        entity = Entity(name="alice", type="character", properties={"age": 25, "gender": "female"})
+        entity = Entity(name="alice", type="character", properties={"age": 25, "gender": None})
 
-        builder._create_node(entity)
+        builder._create_nodes_bulk("character", [entity])
 
-        # 验证调用了 Cypher
-        assert mock_cypher.called
         call_args = mock_cypher.call_args
         assert "MERGE" in call_args.kwargs["query"]
-        assert call_args.kwargs["params"]["name"] == "alice"
+        assert call_args.kwargs["params"]["rows"] == [{"name": "alice", "props": {"age": 25}}]
 
     @mock.patch("novel_agent.graph_ingest.cypher_query")
-    def test_create_edge(self, mock_cypher: mock.Mock) -> None:
-        """测试创建关系"""
+    def test_create_edges_bulk(self, mock_cypher: mock.Mock) -> None:
+        """测试批量创建关系"""
         mock_cypher.return_value = {"rows": []}
 
         builder = GraphBuilder("test.nervusdb")
@@ -112,15 +113,30 @@ class TestGraphBuilder:
             properties={"since": 2021},
         )
 
-        builder._create_edge(relation)
+        builder._create_edges_bulk("knows", [relation])
 
-        # 验证调用了 Cypher
-        assert mock_cypher.called
         call_args = mock_cypher.call_args
         assert "MATCH" in call_args.kwargs["query"]
         assert "MERGE" in call_args.kwargs["query"]
-        assert call_args.kwargs["params"]["source"] == "alice"
-        assert call_args.kwargs["params"]["target"] == "bob"
+        assert call_args.kwargs["params"]["rows"] == [
+            {"source": "alice", "target": "bob", "props": {"since": 2021}}
+        ]
+
+    @mock.patch("novel_agent.graph_ingest.cypher_query")
+    def test_query_text_cached_per_shape(self, mock_cypher: mock.Mock) -> None:
+        """测试同类型节点复用同一查询文本，非法标签被拒绝"""
+        mock_cypher.return_value = {"rows": []}
+
+        builder = GraphBuilder("test.nervusdb")
+        alice = Entity(name="alice", type="character", properties={"age": 25})
+        builder._create_nodes_bulk("character", [alice])
+        builder._create_nodes_bulk("character", [alice])
+
+        first, second = (c.kwargs["query"] for c in mock_cypher.call_args_list)
+        assert first is second
+
+        with pytest.raises(ValueError):
+            builder._create_nodes_bulk("a}) DETACH DELETE (n", [alice])
 
     @mock.patch("novel_agent.graph_ingest.cypher_query")
     def test_ingest_chapter(self, mock_cypher: mock.Mock, tmp_path: Path) -> None:
@@ -138,6 +154,65 @@ class TestGraphBuilder:
         assert stats["relations_created"] > 0
         assert isinstance(stats["errors"], list)
 
+    @mock.patch("novel_agent.graph_ingest.cypher_query")
+    def test_ingest_chapter_batches_by_type(self, mock_cypher: mock.Mock, tmp_path: Path) -> None:
+        """测试摄取按节点类型和关系谓词批量写入"""
+        mock_cypher.return_value = {"rows": []}
+
+        chapter = tmp_path / "ch001.md"
+        chapter.write_text(
+            "# 第一章\n\n张三说话，李四看着\n`2024-01-15` 早上\n`2024-01-16` 晚上\n",
+            encoding="utf-8",
+        )
+
+        builder = GraphBuilder("test.nervusdb")
+        stats = builder.ingest_chapter(str(chapter))
+
+        # chapter / event / character 三类节点 + contains_event / contains_character 两类关系
+        assert mock_cypher.call_count == 5
+        assert stats["entities_created"] == 5
+        assert stats["relations_created"] == 4
+        queries = [c.kwargs["query"] for c in mock_cypher.call_args_list]
+        assert all("UNWIND $rows" in q for q in queries)
+        event_call = next(c for c in mock_cypher.call_args_list if ":event" in c.kwargs["query"])
+        assert [row["name"] for row in event_call.kwargs["params"]["rows"]] == [
+            "event_ch001_0",
+            "event_ch001_1",
+        ]
+
+    @mock.patch("novel_agent.graph_ingest._MAX_PARAMS_BYTES", 200)
+    @mock.patch("novel_agent.graph_ingest.cypher_query")
+    def test_bulk_rows_chunked_by_size(self, mock_cypher: mock.Mock) -> None:
+        """测试批量写入按参数大小分块，避免超出命令行参数长度限制"""
+        mock_cypher.return_value = {"rows": []}
+
+        entities = [
+            Entity(name=f"角色{i}", type="character", properties={"name": f"角色{i}"})
+            for i in range(20)
+        ]
+        GraphBuilder("test.nervusdb")._create_nodes_bulk("character", entities)
+
+        assert mock_cypher.call_count > 1
+        chunks = [c.kwargs["params"]["rows"] for c in mock_cypher.call_args_list]
+        assert all(len(json.dumps(chunk, ensure_ascii=False).encode()) <= 200 for chunk in chunks)
+        assert [row["name"] for chunk in chunks for row in chunk] == [e.name for e in entities]
+
+    @mock.patch("novel_agent.graph_ingest.cypher_query")
+    def test_ingest_chapter_records_batch_error(
+        self, mock_cypher: mock.Mock, tmp_path: Path
+    ) -> None:
+        """测试批量写入失败时记录整组错误"""
+        mock_cypher.side_effect = RuntimeError("boom")
+
+        chapter = tmp_path / "ch001.md"
+        chapter.write_text("# 第一章\n\n张三说话\n", encoding="utf-8")
+
+        stats = GraphBuilder("test.nervusdb").ingest_chapter(str(chapter))
+
+        assert stats["entities_created"] == 0
+        assert stats["errors"]
+        assert all("boom" in err for err in stats["errors"])
+
 
 class TestGraphQuerier:
     """测试图查询器"""
@@ -278,3 +353,186 @@ class TestGraphIntegration:
         assert stats["chapters_processed"] == 2
         assert stats["entities_created"] > 0
         assert stats["relations_created"] > 0
+
+    @mock.patch("novel_agent.graph_ingest.cypher_query")
+    def test_incremental_ingest_skips_unchanged(
+        self, mock_cypher: mock.Mock, tmp_path: Path
+    ) -> None:
+        """测试增量摄取：未变化章节跳过，修改和删除的章节先清理旧子图"""
+        mock_cypher.return_value = {"rows": []}
+
+        chapters_dir = tmp_path / "chapters"
+        chapters_dir.mkdir()
+        (chapters_dir / "ch001.md").write_text("# 第一章\n\n张三说话\n", encoding="utf-8")
+        (chapters_dir / "ch002.md").write_text("# 第二章\n\n李四出现\n", encoding="utf-8")
+        manifest = tmp_path / "graph.nervusdb.hashes.json"
+
+        builder = GraphBuilder("test.nervusdb")
+        stats = builder.ingest_directory(str(chapters_dir), manifest_path=manifest)
+        assert stats["chapters_processed"] == 2
+        assert manifest.exists()
+
+        mock_cypher.reset_mock()
+        stats = builder.ingest_directory(str(chapters_dir), manifest_path=manifest)
+        assert stats["chapters_processed"] == 0
+        assert stats["chapters_skipped"] == 2
+        assert not mock_cypher.called
+
+        (chapters_dir / "ch001.md").write_text("# 第一章\n\n王五说话\n", encoding="utf-8")
+        (chapters_dir / "ch002.md").unlink()
+        mock_cypher.reset_mock()
+        stats = builder.ingest_directory(str(chapters_dir), manifest_path=manifest)
+        assert stats["chapters_processed"] == 1
+        assert stats["chapters_removed"] == 1
+        deleted = [
+            c.kwargs["params"]
+            for c in mock_cypher.call_args_list
+            if "DETACH DELETE" in c.kwargs["query"]
+        ]
+        assert {"name": "ch001"} in deleted
+        assert {"name": "ch002"} in deleted
+
+        mock_cypher.reset_mock()
+        stats = builder.ingest_directory(str(chapters_dir), manifest_path=manifest, force=True)
+        assert stats["chapters_processed"] == 1
+
+    @mock.patch("novel_agent.graph_ingest.cypher_query")
+    def test_failed_chapter_is_cleaned_up_later(
+        self, mock_cypher: mock.Mock, tmp_path: Path
+    ) -> None:
+        """测试写入失败的章节标记为未完成，删除后仍会清理残留子图"""
+        chapters_dir = tmp_path / "chapters"
+        chapters_dir.mkdir()
+        chapter = chapters_dir / "ch001.md"
+        chapter.write_text("# 第一章\n\n张三说话\n", encoding="utf-8")
+        manifest = tmp_path / "graph.nervusdb.hashes.json"
+
+        builder = GraphBuilder("test.nervusdb")
+        mock_cypher.side_effect = RuntimeError("boom")
+        stats = builder.ingest_directory(str(chapters_dir), manifest_path=manifest)
+        assert stats["errors"]
+        assert json.loads(manifest.read_text(encoding="utf-8")) == {"ch001.md": ""}
+
+        mock_cypher.side_effect = None
+        mock_cypher.return_value = {"rows": []}
+        chapter.unlink()
+        stats = builder.ingest_directory(str(chapters_dir), manifest_path=manifest)
+        assert stats["chapters_removed"] == 1
+        assert json.loads(manifest.read_text(encoding="utf-8")) == {}
+
+    @mock.patch("novel_agent.graph_ingest.cypher_query")
+    def test_force_ingest_still_prunes(self, mock_cypher: mock.Mock, tmp_path: Path) -> None:
+        """测试 force 全量摄取时仍清理已删除章节和旧子图"""
+        mock_cypher.return_value = {"rows": []}
+
+        chapters_dir = tmp_path / "chapters"
+        chapters_dir.mkdir()
+        (chapters_dir / "ch001.md").write_text("# 第一章\n\n张三说话\n", encoding="utf-8")
+        (chapters_dir / "ch002.md").write_text("# 第二章\n\n李四出现\n", encoding="utf-8")
+        manifest = tmp_path / "graph.nervusdb.hashes.json"
+
+        builder = GraphBuilder("test.nervusdb")
+        builder.ingest_directory(str(chapters_dir), manifest_path=manifest)
+
+        (chapters_dir / "ch002.md").unlink()
+        mock_cypher.reset_mock()
+        stats = builder.ingest_directory(str(chapters_dir), manifest_path=manifest, force=True)
+
+        assert stats["chapters_processed"] == 1
+        assert stats["chapters_removed"] == 1
+        deleted = [
+            c.kwargs["params"]
+            for c in mock_cypher.call_args_list
+            if "DETACH DELETE" in c.kwargs["query"]
+        ]
+        assert {"name": "ch001"} in deleted
+        assert {"name": "ch002"} in deleted
+        assert list(json.loads(manifest.read_text(encoding="utf-8"))) == ["ch001.md"]
+
+    @mock.patch("novel_agent.graph_ingest.cypher_query")
+    def test_manifest_independent_of_dir_spelling(
+        self, mock_cypher: mock.Mock, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """测试相对路径与绝对路径指定同一目录时，章节不会被当作删除而清理"""
+        mock_cypher.return_value = {"rows": []}
+        monkeypatch.chdir(tmp_path)
+
+        chapters_dir = tmp_path / "chapters"
+        chapters_dir.mkdir()
+        (chapters_dir / "ch001.md").write_text("# 第一章\n\n张三说话\n", encoding="utf-8")
+        manifest = tmp_path / "graph.nervusdb.hashes.json"
+
+        builder = GraphBuilder("test.nervusdb")
+        builder.ingest_directory("chapters", manifest_path=manifest)
+
+        mock_cypher.reset_mock()
+        stats = builder.ingest_directory(str(chapters_dir), manifest_path=manifest)
+        assert stats["chapters_skipped"] == 1
+        assert stats["chapters_removed"] == 0
+        assert not mock_cypher.called
+
+        # 旧版清单以完整路径为键，同样视为未变化
+        legacy = {str(chapters_dir / k): v for k, v in json.loads(manifest.read_text()).items()}
+        manifest.write_text(json.dumps(legacy), encoding="utf-8")
+        stats = builder.ingest_directory(str(chapters_dir), manifest_path=manifest)
+        assert stats["chapters_skipped"] == 1
+        assert not mock_cypher.called
+
+    @mock.patch("novel_agent.graph_ingest.cypher_query")
+    def test_renamed_chapter_deleted_before_rewrite(
+        self, mock_cypher: mock.Mock, tmp_path: Path
+    ) -> None:
+        """测试改名章节（ch1.md -> ch001.md）先清理旧子图再写入，且不清理仍存在的章节号"""
+        mock_cypher.return_value = {"rows": []}
+
+        chapters_dir = tmp_path / "chapters"
+        chapters_dir.mkdir()
+        (chapters_dir / "ch1.md").write_text("# 第一章\n\n张三说话\n", encoding="utf-8")
+        (chapters_dir / "ch2.md").write_text("# 第二章\n\n李四出现\n", encoding="utf-8")
+        manifest = tmp_path / "graph.nervusdb.hashes.json"
+
+        builder = GraphBuilder("test.nervusdb")
+        builder.ingest_directory(str(chapters_dir), manifest_path=manifest)
+
+        (chapters_dir / "ch1.md").rename(chapters_dir / "ch001.md")
+        mock_cypher.reset_mock()
+        stats = builder.ingest_directory(str(chapters_dir), manifest_path=manifest)
+
+        assert stats["chapters_processed"] == 1
+        assert stats["chapters_removed"] == 1
+        queries = [c.kwargs["query"] for c in mock_cypher.call_args_list]
+        last_delete = max(i for i, q in enumerate(queries) if "DETACH DELETE" in q)
+        first_write = min(i for i, q in enumerate(queries) if "MERGE" in q)
+        assert last_delete < first_write
+        assert json.loads(manifest.read_text(encoding="utf-8")).keys() == {"ch001.md", "ch2.md"}
+
+        # 同章节号的另一个文件被删除时，不清理仍存在且未变化的章节
+        (chapters_dir / "ch02.md").write_text("# 第二章\n\n李四出现\n", encoding="utf-8")
+        builder.ingest_directory(str(chapters_dir), manifest_path=manifest)
+        (chapters_dir / "ch2.md").unlink()
+        mock_cypher.reset_mock()
+        stats = builder.ingest_directory(str(chapters_dir), manifest_path=manifest)
+        assert stats["chapters_removed"] == 1
+        assert not mock_cypher.called
+
+    @mock.patch("novel_agent.graph_ingest._WRITE_BATCH_CHAPTERS", 2)
+    @mock.patch("novel_agent.graph_ingest.cypher_query")
+    def test_ingest_batches_writes(self, mock_cypher: mock.Mock, tmp_path: Path) -> None:
+        """测试按章节批次合并写入"""
+        mock_cypher.return_value = {"rows": []}
+
+        chapters_dir = tmp_path / "chapters"
+        chapters_dir.mkdir()
+        for i in range(1, 4):
+            (chapters_dir / f"ch00{i}.md").write_text(f"# 第{i}章\n\n张三说话\n", encoding="utf-8")
+
+        stats = GraphBuilder("test.nervusdb").ingest_directory(str(chapters_dir))
+
+        assert stats["chapters_processed"] == 3
+        assert stats["errors"] == []
+        chapter_batches = [
+            [row["name"] for row in c.kwargs["params"]["rows"]]
+            for c in mock_cypher.call_args_list
+            if ":chapter" in c.kwargs["query"]
+        ]
+        assert chapter_batches == [["ch001", "ch002"], ["ch003"]]
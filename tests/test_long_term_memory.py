@@ -206,6 +206,23 @@ class TestLongTermMemory:
 
         assert len(results) == 5
 
+    def test_search_index_tracks_updates(self, memory: LongTermMemory) -> None:
+        """测试全文索引随更新和删除同步
+
+        验收标准：
+        - 长查询走索引，能匹配中文子串
+        - 更新、删除后的结果与表内容一致
+        """
+        memory.save("project_info", "setting", "繁华的现代都市")
+        assert len(memory.search("现代都市")) == 1
+
+        memory.save("project_info", "setting", "偏远的山村")
+        assert memory.search("现代都市") == []
+        assert memory.search("偏远的山")[0]["value"] == "偏远的山村"
+
+        memory.delete("project_info", "setting")
+        assert memory.search("偏远的山") == []
+
     def test_get_relevant_memories(self, memory: LongTermMemory) -> None:
         """测试获取相关记忆
 
@@ -21,3 +21,6 @@ def test_ingest_dry_run(mock_cypher: mock.Mock) -> None:
     stats = memory_ingest.ingest_from_index(data, db_path="demo.nervusdb", dry_run=True)
     assert stats["chapters"] >= 3
     mock_cypher.assert_not_called()
+
+    # dry-run counts match what a real ingest reports
+    assert stats == memory_ingest.ingest_from_index(data, db_path="demo.nervusdb")
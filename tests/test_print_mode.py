@@ -3,18 +3,22 @@
 import json
 from unittest.mock import MagicMock, patch
 
+import pytest
 from typer.testing import CliRunner
 
 from novel_agent.cli import app
 
 runner = CliRunner()
 
+# check / chat 会在当前目录写入 .cache/ 和 .novel-agent/
+pytestmark = pytest.mark.usefixtures("isolated_cwd")
+
 
 class TestPrintMode:
     """测试 --print 模式"""
 
-    @patch("novel_agent.cli.create_specialized_agent")
-    @patch("novel_agent.cli.open_checkpointer")
+    @patch("novel_agent.agent.create_specialized_agent")
+    @patch("novel_agent.session_store.open_checkpointer")
     def test_print_mode_with_prompt_text_output(
         self, mock_checkpointer: MagicMock, mock_create_agent: MagicMock
     ) -> None:
@@ -33,8 +37,8 @@ class TestPrintMode:
         assert result.exit_code == 0
         assert "这是测试响应" in result.stdout
 
-    @patch("novel_agent.cli.create_specialized_agent")
-    @patch("novel_agent.cli.open_checkpointer")
+    @patch("novel_agent.agent.create_specialized_agent")
+    @patch("novel_agent.session_store.open_checkpointer")
     def test_print_mode_with_json_output(
         self, mock_checkpointer: MagicMock, mock_create_agent: MagicMock
     ) -> None:
@@ -73,8 +77,8 @@ class TestPrintMode:
         assert result.exit_code == 1
         assert "无效" in result.stdout or "invalid" in result.stdout.lower()
 
-    @patch("novel_agent.cli.create_specialized_agent")
-    @patch("novel_agent.cli.open_checkpointer")
+    @patch("novel_agent.agent.create_specialized_agent")
+    @patch("novel_agent.session_store.open_checkpointer")
     def test_print_mode_with_pipe_input(
         self, mock_checkpointer: MagicMock, mock_create_agent: MagicMock
     ) -> None:
@@ -94,17 +98,17 @@ class TestPrintMode:
         assert result.exit_code == 0
         assert "管道响应" in result.stdout
 
-    @patch("novel_agent.cli.create_specialized_agent")
-    @patch("novel_agent.cli.open_checkpointer")
+    @patch("novel_agent.agent.create_specialized_agent")
+    @patch("novel_agent.session_store.open_checkpointer")
     def test_print_mode_with_stream_json_format(
         self, mock_checkpointer: MagicMock, mock_create_agent: MagicMock
     ) -> None:
-        """测试 stream-json 格式（暂时等同于 json）"""
-        # Mock Agent 响应
+        """测试 stream-json 格式（无需 --stream 也逐行输出 NDJSON）"""
+        # Mock Agent 流式响应
         mock_agent = MagicMock()
         mock_message = MagicMock()
         mock_message.content = "流式响应"
-        mock_agent.invoke.return_value = {"messages": [mock_message]}
+        mock_agent.stream.return_value = iter([{"messages": [mock_message]}])
         mock_create_agent.return_value = mock_agent
         mock_checkpointer.return_value.__enter__.return_value = MagicMock()
 
@@ -112,12 +116,15 @@ class TestPrintMode:
         result = runner.invoke(app, ["chat", "--print", "--output-format", "stream-json", "测试"])
 
         assert result.exit_code == 0
-        output = json.loads(result.stdout)
-        assert "response" in output
-        assert "confidence" in output
-
-    @patch("novel_agent.cli.create_specialized_agent")
-    @patch("novel_agent.cli.open_checkpointer")
+        lines = [json.loads(line) for line in result.stdout.strip().split("\n")]
+        assert lines[0] == {"chunk": "流式响应", "done": False}
+        assert lines[-1]["done"] is True
+        assert lines[-1]["response"] == "流式响应"
+        assert "confidence" in lines[-1]
+        mock_agent.invoke.assert_not_called()
+
+    @patch("novel_agent.agent.create_specialized_agent")
+    @patch("novel_agent.session_store.open_checkpointer")
     def test_print_mode_with_error(
         self, mock_checkpointer: MagicMock, mock_create_agent: MagicMock
     ) -> None:
@@ -42,7 +42,13 @@ def test_list_and_delete_sessions(tmp_path: Path) -> None:
 
     sessions = session_store.list_sessions(db_path)
     assert sessions == ["villain", "hero"] or sessions == ["hero", "villain"]
+    assert list(session_store.iter_sessions(db_path)) == sessions
+    assert list(session_store.iter_sessions(db_path, limit=1)) == sessions[:1]
 
     session_store.delete_session("hero", db_path)
     sessions_after = session_store.list_sessions(db_path)
     assert "hero" not in sessions_after
+
+
+def test_iter_sessions_missing_db(tmp_path: Path) -> None:
+    assert list(session_store.iter_sessions(tmp_path / "missing.sqlite")) == []
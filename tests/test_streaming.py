@@ -4,18 +4,22 @@ import json
 from typing import Any
 from unittest.mock import MagicMock, patch
 
+import pytest
 from typer.testing import CliRunner
 
 from novel_agent.cli import app
 
 runner = CliRunner()
 
+# check / chat 会在当前目录写入 .cache/ 和 .novel-agent/
+pytestmark = pytest.mark.usefixtures("isolated_cwd")
+
 
 class TestStreaming:
     """测试 --stream 模式"""
 
-    @patch("novel_agent.cli.create_specialized_agent")
-    @patch("novel_agent.cli.open_checkpointer")
+    @patch("novel_agent.agent.create_specialized_agent")
+    @patch("novel_agent.session_store.open_checkpointer")
     def test_stream_text_output(
         self, mock_checkpointer: MagicMock, mock_create_agent: MagicMock
     ) -> None:
@@ -50,8 +54,8 @@ class TestStreaming:
         assert result.exit_code == 0
         assert "这是流式响应" in result.stdout
 
-    @patch("novel_agent.cli.create_specialized_agent")
-    @patch("novel_agent.cli.open_checkpointer")
+    @patch("novel_agent.agent.create_specialized_agent")
+    @patch("novel_agent.session_store.open_checkpointer")
     def test_stream_json_output(
         self, mock_checkpointer: MagicMock, mock_create_agent: MagicMock
     ) -> None:
@@ -88,8 +92,8 @@ class TestStreaming:
         assert "confidence" in last_line
         assert "response" in last_line
 
-    @patch("novel_agent.cli.create_specialized_agent")
-    @patch("novel_agent.cli.open_checkpointer")
+    @patch("novel_agent.agent.create_specialized_agent")
+    @patch("novel_agent.session_store.open_checkpointer")
     def test_stream_without_print_flag(
         self, mock_checkpointer: MagicMock, mock_create_agent: MagicMock
     ) -> None:
@@ -104,8 +108,8 @@ class TestStreaming:
         # 实际上 --stream 主要用于 --print 模式
         pass
 
-    @patch("novel_agent.cli.create_specialized_agent")
-    @patch("novel_agent.cli.open_checkpointer")
+    @patch("novel_agent.agent.create_specialized_agent")
+    @patch("novel_agent.session_store.open_checkpointer")
     def test_stream_with_pipe_input(
         self, mock_checkpointer: MagicMock, mock_create_agent: MagicMock
     ) -> None:
@@ -126,8 +130,8 @@ class TestStreaming:
         assert result.exit_code == 0
         assert "管道流式响应" in result.stdout
 
-    @patch("novel_agent.cli.create_specialized_agent")
-    @patch("novel_agent.cli.open_checkpointer")
+    @patch("novel_agent.agent.create_specialized_agent")
+    @patch("novel_agent.session_store.open_checkpointer")
     def test_stream_empty_chunks(
         self, mock_checkpointer: MagicMock, mock_create_agent: MagicMock
     ) -> None:
@@ -23,3 +23,13 @@ def test_chapter_workflow_runs_without_nervus() -> None:
     result = workflow.invoke({"prompt": "Hello"})
     assert result["draft"] == "dummy"
     assert "issues" in result
+
+
+def test_chapter_workflow_verifies_in_parallel_with_drafting() -> None:
+    index = {"chapters": [], "characters": [], "references": []}
+    dummy_model = RunnableLambda(lambda _: AIMessage(content="dummy"))
+    workflow = build_chapter_workflow(dummy_model, continuity_index=index)
+
+    edges = {(edge.source, edge.target) for edge in workflow.get_graph().edges}
+    assert ("__start__", "verify") in edges
+    assert ("draft", "verify") not in edges